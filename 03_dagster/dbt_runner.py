@@ -0,0 +1,233 @@
+"""
+In-process dbt execution for the proto_loc platform.
+
+dbt commands run through dbt's programmatic runner (dbtRunner) inside the
+Dagster process instead of shelling out to the dbt CLI. The project is
+parsed once and the resulting manifest is reused by every seed/run/test
+invocation until a project file or a parse-time environment variable
+changes; dbt's partial parse state in target/ keeps that parse cheap on a
+cold process, and loading the code location reuses target/manifest.json
+without parsing while it is current. Per-node results are streamed to the caller as each node
+finishes rather than when the command exits.
+
+Key Design Principles:
+- No subprocesses and no os.chdir: project and profiles dirs are passed explicitly
+- The parsed manifest is cached per project and invalidated on change
+- One dbt invocation at a time per process (dbtRunner is not re-entrant)
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+
+from dbt.adapters.duckdb.connections import DuckDBConnectionManager
+from dbt.cli.main import dbtRunner, dbtRunnerResult
+from dbt.constants import DEFAULT_ENV_PLACEHOLDER
+
+# Project paths whose changes require the project to be re-parsed
+PROJECT_PATHS = ["dbt_project.yml", "packages.yml", "models", "macros", "seeds", "snapshots", "tests", "analyses"]
+
+# Compiled SQL of data tests, keyed by dbt unique_id, with the project
+# fingerprint it was compiled from (see compile_tests)
+COMPILED_TESTS_FILE = "target/compiled_tests.json"
+
+# Project fingerprint and parse-time environment of the last parse that
+# wrote target/manifest.json (see ensure_manifest_file)
+MANIFEST_STATE_FILE = "target/manifest_state.json"
+
+# project_dir -> (fingerprint, manifest)
+_manifest_cache = {}
+_dbt_lock = threading.Lock()
+
+
+class DbtCommandError(Exception):
+    """Raised when a dbt command fails."""
+
+    def __init__(self, command: list, result: dbtRunnerResult):
+        self.command = command
+        self.result = result
+        reason = result.exception or "one or more nodes failed"
+        super().__init__(f"dbt {' '.join(command)} failed: {reason}")
+
+
+def project_fingerprint(project_dir: str) -> tuple:
+    """
+    Cheap fingerprint of a dbt project's files (count, newest mtime, total size).
+
+    Only file metadata is read, so checking it before each invocation costs
+    a directory walk rather than a parse.
+    """
+    count, newest, total_size = 0, 0.0, 0
+    for name in PROJECT_PATHS:
+        root = Path(project_dir) / name
+        paths = [root] if root.is_file() else root.rglob("*") if root.is_dir() else []
+        for path in paths:
+            if path.is_file():
+                stat = path.stat()
+                count += 1
+                newest = max(newest, stat.st_mtime)
+                total_size += stat.st_size
+    return count, newest, total_size
+
+
+def env_unchanged(env_vars: dict) -> bool:
+    """
+    Return True if the environment variables read during a parse still have the recorded values.
+
+    dbt records variables that were unset (env_var() fell back to its
+    default) as a placeholder; those must still be unset.
+    """
+    return all(
+        name not in os.environ if value == DEFAULT_ENV_PLACEHOLDER else os.environ.get(name) == value
+        for name, value in env_vars.items()
+    )
+
+
+def get_manifest(project_dir: str, profiles_dir: str, target: str):
+    """
+    Return the parsed manifest for a dbt project, parsing only when needed.
+
+    The cached manifest is reused while the project files and the values of
+    the environment variables read during parsing are unchanged.
+    """
+    fingerprint = project_fingerprint(project_dir)
+    cached = _manifest_cache.get(project_dir)
+    if cached is not None:
+        cached_fingerprint, manifest = cached
+        if cached_fingerprint == fingerprint and env_unchanged(manifest.env_vars):
+            return manifest
+
+    command = ["parse", "--project-dir", project_dir, "--profiles-dir", profiles_dir, "--target", target]
+    result = dbtRunner().invoke(command)
+    if not result.success:
+        raise DbtCommandError(command, result)
+    _manifest_cache[project_dir] = (fingerprint, result.result)
+
+    state_path = Path(project_dir) / MANIFEST_STATE_FILE
+    tmp_path = state_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({
+        "fingerprint": list(fingerprint),
+        "target": target,
+        "env_vars": dict(result.result.env_vars),
+    }))
+    os.replace(tmp_path, state_path)
+    return result.result
+
+
+def ensure_manifest_file(project_dir: str, profiles_dir: str, target: str) -> Path:
+    """
+    Return the path of the project's target/manifest.json, parsing only if it is stale.
+
+    Building the asset graph only needs the manifest file, so one written by
+    an earlier parse of the same project files, target and parse-time
+    environment is reused without invoking dbt.
+    """
+    manifest_path = Path(project_dir) / "target" / "manifest.json"
+    state_path = Path(project_dir) / MANIFEST_STATE_FILE
+    if manifest_path.exists() and state_path.exists():
+        state = json.loads(state_path.read_text())
+        if (
+            state["fingerprint"] == list(project_fingerprint(project_dir))
+            and state["target"] == target
+            and env_unchanged(state["env_vars"])
+        ):
+            return manifest_path
+    get_manifest(project_dir, profiles_dir, target)
+    return manifest_path
+
+
+def run_dbt(
+    args: list,
+    project_dir: str,
+    profiles_dir: str,
+    target: str,
+    on_node_finished=None,
+) -> dbtRunnerResult:
+    """
+    Invoke a dbt command in-process against the cached project manifest.
+
+    Args:
+        args: dbt command and arguments, e.g. ["run", "--vars", "{...}"]
+        project_dir: dbt project directory
+        profiles_dir: Directory containing profiles.yml
+        target: Profile target
+        on_node_finished: Optional callback(node_info, run_result) called as
+            each node finishes, with the node's status and execution time
+
+    Returns:
+        The dbtRunnerResult; callers decide whether an unsuccessful result is fatal
+    """
+    def forward_node_events(event):
+        if on_node_finished is not None and event.info.name == "NodeFinished":
+            on_node_finished(event.data.node_info, event.data.run_result)
+
+    command = list(args) + ["--project-dir", project_dir, "--profiles-dir", profiles_dir, "--target", target]
+    with _dbt_lock:
+        manifest = get_manifest(project_dir, profiles_dir, target)
+        runner = dbtRunner(manifest=manifest, callbacks=[forward_node_events])
+        try:
+            result = runner.invoke(command)
+        finally:
+            # dbt-duckdb keeps its database handle open for the life of the
+            # process; close it so the file lock does not outlive the caller's lease
+            DuckDBConnectionManager.close_all_connections()
+
+    # Errors raised before any node ran (bad config, unreachable database)
+    if result.exception is not None:
+        raise DbtCommandError(command, result)
+    return result
+
+
+def load_compiled_tests(project_dir: str) -> dict:
+    """
+    Return {test unique_id: compiled SQL} from the last compile_tests calls.
+
+    SQL compiled from an older version of the project (any model, macro or
+    test file changed since, per project_fingerprint) is discarded, so
+    stale tests are recompiled rather than run.
+    """
+    path = Path(project_dir) / COMPILED_TESTS_FILE
+    if not path.exists():
+        return {}
+    stored = json.loads(path.read_text())
+    if stored.get("fingerprint") != list(project_fingerprint(project_dir)):
+        return {}
+    return stored["tests"]
+
+
+def compile_tests(select: list, project_dir: str, profiles_dir: str, target: str) -> dict:
+    """
+    Compile the selected data tests (by test name) and store their SQL.
+
+    Compiled test SQL only changes with the project, so tests can later be
+    executed directly on read-only DuckDB connections without invoking dbt
+    (or taking the database write lock) again. Results are merged into
+    COMPILED_TESTS_FILE, replacing SQL compiled from an older version of
+    the project. The caller must hold the dev writer lease, since dbt-duckdb
+    opens the target database read-write even to compile, and a raw reader
+    lease, since the profile attaches raw.duckdb.
+
+    Returns:
+        {test unique_id: compiled SQL} for the tests compiled in this call
+    """
+    result = run_dbt(
+        ["compile", "--select", *select],
+        project_dir,
+        profiles_dir,
+        target,
+    )
+    compiled = {
+        run_result.node.unique_id: run_result.node.compiled_code
+        for run_result in result.result
+        if run_result.node.compiled_code
+    }
+
+    path = Path(project_dir) / COMPILED_TESTS_FILE
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({
+        "fingerprint": list(project_fingerprint(project_dir)),
+        "tests": {**load_compiled_tests(project_dir), **compiled},
+    }, indent=2))
+    os.replace(tmp_path, path)
+    return compiled
@@ -6,353 +6,2014 @@ This file contains the data pipeline definitions for the platform.
 NYC Taxi data ingestion and validation assets.
 
 Key Design Principles:
-- Robust connection management with proper cleanup to prevent database locks
-- Retry logic for handling concurrent access conflicts
+- All DuckDB access goes through the duckdb_manager resource: writers queue
+  on a cross-process lease per file, readers share a pooled read-only
+  connection, and lease wait times are reported as metadata
+- Month-partitioned trip assets, so parallel partitions never collide on the write lock
 - Clear separation between raw data ingestion and validation
+- One asset per dbt model and seed, rebuilt only when upstream data or the
+  model's own code changes
 - Environment-aware database path configuration
+- Heavy statements, dbt nodes and steps report timings, throughput, memory
+  and spill as materialization metadata (see instrumentation.py)
+- Optional hot/cold tiering keeps only recent raw trip months in DuckDB and
+  older months in sealed Parquet behind one view (see storage_tiers.py)
 
 """
 
 import os
+import re
+import json
 import time
+import hashlib
+from datetime import timedelta
 import pandas as pd
 import duckdb
-import subprocess
-from dagster import asset, AssetExecutionContext, AssetSelection, define_asset_job, op, In
+from concurrent.futures import ThreadPoolExecutor
+from dagster_dbt import DagsterDbtTranslator, DagsterDbtTranslatorSettings, dbt_assets
+from duckdb_resource import DuckDBConnectionManager, missing_extensions, sql_literal
+from instrumentation import StepInstrumentation, clustering_disorder, zonemap_pruning
+from dbt_runner import DbtCommandError, compile_tests, ensure_manifest_file, load_compiled_tests, run_dbt
+from parquet_export import DEFAULT_ROW_GROUP_SIZE, export_changed_partitions, read_export_manifest, write_export_manifest
+from superset_warmup import SupersetClient, warm_up_dashboards
+from prod_publish import build_snapshot, rollback, snapshot_path, swap_in
+from storage_tiers import (
+    cold_months,
+    ensure_tier_manifest,
+    read_tier_manifest,
+    refresh_unified_view,
+    remove_unsealed_files,
+    seal_month,
+    sync_hot_copy,
+    unseal_month,
+)
+from profiling import (
+    delete_profiles,
+    ensure_profile_table,
+    profile_relation,
+    replace_profiles,
+    summarize_profiles,
+)
+from dagster import (
+    asset,
+    AssetCheckExecutionContext,
+    AssetCheckResult,
+    AssetCheckSeverity,
+    AssetCheckSpec,
+    AssetExecutionContext,
+    AssetKey,
+    AssetSelection,
+    AutomationCondition,
+    AutomationConditionSensorDefinition,
+    BackfillPolicy,
+    Config,
+    DefaultSensorStatus,
+    MaterializeResult,
+    MonthlyPartitionsDefinition,
+    RunRequest,
+    SensorEvaluationContext,
+    SensorResult,
+    define_asset_job,
+    get_dagster_logger,
+    job,
+    multi_asset_check,
+    op,
+    sensor,
+    In,
+)
+
+
+from pathlib import Path
+
+# Manifest of source files already loaded into raw_taxi_trips (one row per file)
+INGEST_MANIFEST_TABLE = "nyc_taxi_data._ingest_manifest"
+
+# Precomputed column profiles (see profiling.py): raw trips are profiled per
+# source file during ingestion, dbt marts per pickup month after each run
+RAW_PROFILE_TABLE = "nyc_taxi_data._table_profiles"
+DEV_PROFILE_TABLE = "main._table_profiles"
+
+# Trip data is partitioned by tpep_pickup_datetime month. TLC publishes one file
+# per pickup month (yellow_tripdata_YYYY-MM.parquet), so a partition maps to the
+# file(s) for that month. Keys are the month start date, e.g. "2024-01-01".
+# The first month is configurable, for deployments that hold a different history.
+TRIP_PARTITIONS_START_DATE = os.getenv("TRIP_PARTITIONS_START_DATE", "2023-01-01")
+monthly_partitions = MonthlyPartitionsDefinition(start_date=TRIP_PARTITIONS_START_DATE, end_offset=0)
+TRIP_FILE_MONTH_PATTERN = re.compile(r"(\d{4})-(\d{2})")
+
+# AutomationCondition.eager() without its in_latest_time_window(): files for
+# any month can land or be replaced, so downstream assets rebuild whichever
+# monthly partitions were updated upstream, not just the latest one
+UPSTREAM_UPDATED = (
+    AutomationCondition.any_deps_updated().since_last_handled()
+    & ~AutomationCondition.any_deps_missing()
+    & ~AutomationCondition.any_deps_in_progress()
+    & ~AutomationCondition.in_progress()
+).with_label("upstream_updated")
+
+
+def file_content_hash(file_path: Path, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 digest of a file, reading it in fixed-size chunks.
+    
+    Args:
+        file_path: Path to the file to hash
+        chunk_size: Number of bytes read per chunk
+        
+    Returns:
+        Hex-encoded SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def trip_file_partition_month(file_path: Path, known_months: dict = None) -> str:
+    """
+    Return the pickup-month partition key ("YYYY-MM-01") a trip file belongs to.
+    
+    The month is taken from the TLC file name. Files without a YYYY-MM in
+    their name reuse the month recorded in known_months (see
+    read_file_months) while their size and mtime are unchanged, and are only
+    scanned for their most common pickup month otherwise.
+    """
+    match = TRIP_FILE_MONTH_PATTERN.search(file_path.name)
+    if match:
+        return f"{match.group(1)}-{match.group(2)}-01"
+    
+    known = (known_months or {}).get(str(file_path))
+    if known is not None:
+        stat = file_path.stat()
+        if known[0] == stat.st_size and known[1] == stat.st_mtime:
+            return known[2]
+    
+    row = duckdb.execute("""
+        SELECT STRFTIME(DATE_TRUNC('month', tpep_pickup_datetime), '%Y-%m-01')
+        FROM read_parquet(?)
+        GROUP BY 1
+        ORDER BY COUNT(*) DESC
+        LIMIT 1
+    """, [str(file_path)]).fetchone()
+    if row is None:
+        raise ValueError(f"Cannot determine pickup month of empty trip file {file_path}")
+    return row[0]
 
 
-def connect_with_retry(db_path: str, read_only: bool = False, max_retries: int = 3, retry_delay: float = 1.0):
+def ensure_ingest_manifest(conn) -> None:
+    """Create the ingestion manifest table if it does not exist yet."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {INGEST_MANIFEST_TABLE} (
+            file_path VARCHAR,
+            file_size BIGINT,
+            file_mtime DOUBLE,
+            content_hash VARCHAR,
+            row_count BIGINT,
+            ingested_at TIMESTAMP WITH TIME ZONE,
+            partition_month DATE
+        )
+    """)
+    # Manifests created before monthly partitioning lack the partition column
+    conn.execute(f"ALTER TABLE {INGEST_MANIFEST_TABLE} ADD COLUMN IF NOT EXISTS partition_month DATE")
+
+
+def table_columns(conn, schema: str, table: str) -> list:
+    """Return the column names of a table, or an empty list if it does not exist."""
+    rows = conn.execute("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = ? AND table_name = ?
+        ORDER BY ordinal_position
+    """, [schema, table]).fetchall()
+    return [r[0] for r in rows]
+
+
+def read_ingest_manifest(conn, partition_month: str) -> dict:
+    """Return {file_path: (size, mtime, content_hash)} for one partition's manifest entries."""
+    return {
+        row[0]: row[1:]
+        for row in conn.execute(f"""
+            SELECT file_path, file_size, file_mtime, content_hash
+            FROM {INGEST_MANIFEST_TABLE}
+            WHERE partition_month = CAST(? AS DATE)
+        """, [partition_month]).fetchall()
+    }
+
+
+def read_file_months(conn) -> dict:
+    """Return {file_path: (size, mtime, partition key)} for every trip file in the ingestion manifest."""
+    return {
+        row[0]: row[1:]
+        for row in conn.execute(f"""
+            SELECT file_path, file_size, file_mtime, STRFTIME(partition_month, '%Y-%m-%d')
+            FROM {INGEST_MANIFEST_TABLE}
+            WHERE partition_month IS NOT NULL
+        """).fetchall()
+    }
+
+
+def plan_file_ingestion(manifest: dict, files: list) -> dict:
     """
-    Connect to DuckDB with retry logic to handle lock conflicts.
+    Compare source files against a snapshot of the ingestion manifest.
+    
+    Size and mtime are checked first; the content hash is only computed when
+    either differs, so unchanged files cost a single stat() call. No database
+    connection is needed, so parallel partitions hash their files without
+    holding a lease.
     
     Args:
-        db_path: Path to the DuckDB database file
-        read_only: Whether to open in read-only mode
-        max_retries: Maximum number of connection attempts
-        retry_delay: Delay between retry attempts in seconds
+        manifest: {file_path: (size, mtime, content_hash)} from read_ingest_manifest
+        files: Source file paths currently on disk
         
     Returns:
-        DuckDB connection object
+        Dict with 'new', 'changed', 'touched' and 'unchanged' lists of
+        (path, size, mtime, hash) tuples and a 'removed' list of paths
+        that are in the manifest but no longer on disk
+    """
+    plan = {"new": [], "changed": [], "touched": [], "unchanged": [], "removed": []}
+    
+    for file_path in files:
+        stat = file_path.stat()
+        path_str = str(file_path)
+        previous = manifest.get(path_str)
+        
+        if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime:
+            plan["unchanged"].append((path_str, stat.st_size, stat.st_mtime, previous[2]))
+            continue
         
-    Raises:
-        Exception: If all retry attempts fail
+        content_hash = file_content_hash(file_path)
+        entry = (path_str, stat.st_size, stat.st_mtime, content_hash)
+        if previous is None:
+            plan["new"].append(entry)
+        elif previous[2] == content_hash:
+            # File was rewritten with identical contents - only the mtime moved
+            plan["touched"].append(entry)
+        else:
+            plan["changed"].append(entry)
+    
+    on_disk = {str(f) for f in files}
+    plan["removed"] = [path for path in manifest if path not in on_disk]
+    return plan
+
+
+# DuckDB resource limits for ingestion; empty / 0 keeps DuckDB's defaults
+# (80% of RAM, one thread per core, spill next to the database file)
+INGEST_MEMORY_LIMIT = os.getenv("INGEST_MEMORY_LIMIT", "")
+INGEST_THREADS = int(os.getenv("INGEST_THREADS", "0"))
+INGEST_TEMP_DIRECTORY = os.getenv("INGEST_TEMP_DIRECTORY", "")
+INGEST_MAX_TEMP_DIRECTORY_SIZE = os.getenv("INGEST_MAX_TEMP_DIRECTORY_SIZE", "")
+
+
+class IngestionConfig(Config):
     """
-    for attempt in range(max_retries):
-        try:
-            conn = duckdb.connect(db_path, read_only=read_only)
-            return conn
-        except Exception as e:
-            if "lock" in str(e).lower() and attempt < max_retries - 1:
-                print(f"🔄 Database lock detected (attempt {attempt + 1}/{max_retries}), retrying in {retry_delay}s...")
-                time.sleep(retry_delay)
-                retry_delay *= 1.5  # Exponential backoff
-                continue
-            else:
-                raise e
+    Run config bounding the memory ingestion uses.
+    
+    With a memory_limit set, DuckDB spills sorts, aggregates and buffered
+    inserts to temp_directory instead of growing, and files are loaded and
+    committed one at a time, so peak memory depends on the largest file
+    rather than on how much history is loaded.
+    """
+    
+    # DuckDB memory_limit, e.g. "2GB"
+    memory_limit: str = INGEST_MEMORY_LIMIT
+    threads: int = INGEST_THREADS
+    # Spill directory, e.g. a local SSD volume
+    temp_directory: str = INGEST_TEMP_DIRECTORY
+    # Cap on spilled bytes, e.g. "50GB"
+    max_temp_directory_size: str = INGEST_MAX_TEMP_DIRECTORY_SIZE
+    # Raw rows have no meaningful order; relaxing it lets inserts stream
+    # without buffering rows to restore file order
+    preserve_insertion_order: bool = False
 
 
-from pathlib import Path
+def apply_ingestion_settings(conn, config: IngestionConfig) -> None:
+    """Apply the ingestion memory, thread and spill settings to a DuckDB connection."""
+    if config.memory_limit:
+        conn.execute("SET memory_limit = ?", [config.memory_limit])
+    if config.threads > 0:
+        conn.execute(f"SET threads = {int(config.threads)}")
+    if config.temp_directory:
+        Path(config.temp_directory).mkdir(parents=True, exist_ok=True)
+        conn.execute("SET temp_directory = ?", [config.temp_directory])
+    if config.max_temp_directory_size:
+        conn.execute("SET max_temp_directory_size = ?", [config.max_temp_directory_size])
+    conn.execute(f"SET preserve_insertion_order = {str(config.preserve_insertion_order).lower()}")
 
-@asset(group_name="raw_data_ingestion")
-def ingest_raw_data(context: AssetExecutionContext) -> None:
+
+def load_trip_file(
+    conn,
+    path: str,
+    size: int,
+    mtime: float,
+    content_hash: str,
+    partition_month: str,
+    instrumentation: StepInstrumentation,
+) -> int:
+    """
+    Atomically (re)load a single Parquet file into raw_taxi_trips.
+    
+    Any rows previously loaded from the same file are deleted, and the manifest
+    entry and column profile are replaced inside one transaction, so readers
+    never observe a partially replaced file. The insert and the profiling
+    scan are recorded in instrumentation.
+    
+    Returns:
+        Number of rows loaded from the file
+    """
+    # Add any columns a newer file introduces (e.g. new surcharges) before inserting
+    existing = {c.lower() for c in table_columns(conn, "nyc_taxi_data", "raw_taxi_trips")}
+    added = False
+    for column_name, column_type, *_ in conn.execute("DESCRIBE SELECT * FROM read_parquet(?)", [path]).fetchall():
+        if column_name.lower() not in existing:
+            conn.execute(f'ALTER TABLE nyc_taxi_data.raw_taxi_trips ADD COLUMN "{column_name}" {column_type}')
+            added = True
+    if added:
+        refresh_unified_view(conn, read_tier_manifest(conn))
+    
+    conn.begin()
+    try:
+        conn.execute("DELETE FROM nyc_taxi_data.raw_taxi_trips WHERE _source_file = ?", [path])
+        instrumentation.execute(conn, "insert_trips", f"""
+            INSERT INTO nyc_taxi_data.raw_taxi_trips BY NAME
+            SELECT 
+                *,
+                CURRENT_TIMESTAMP as _ingested_at,
+                ? as _source_file
+            FROM read_parquet(?)
+        """, [path, path])
+        with instrumentation.timed("profile_trips") as measures:
+            row_count = measures["rows"] = profile_trip_file(conn, path)
+        conn.execute(f"DELETE FROM {INGEST_MANIFEST_TABLE} WHERE file_path = ?", [path])
+        conn.execute(f"""
+            INSERT INTO {INGEST_MANIFEST_TABLE}
+                (file_path, file_size, file_mtime, content_hash, row_count, ingested_at, partition_month)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CAST(? AS DATE))
+        """, [path, size, mtime, content_hash, row_count, partition_month])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return row_count
+
+
+def profile_trip_file(conn, path: str) -> int:
+    """
+    Profile the raw_taxi_trips rows of one source file and store the result.
+    
+    Only the file's own rows are scanned, once, so profiling cost tracks the
+    size of what was loaded rather than the table.
+    
+    Returns:
+        Number of rows loaded from the file
+    """
+    profiles = profile_relation(
+        conn,
+        "nyc_taxi_data.raw_taxi_trips",
+        partition_expr="_source_file",
+        where="_source_file = ?",
+        params=[path],
+    )
+    replace_profiles(conn, RAW_PROFILE_TABLE, "raw_taxi_trips", [path], profiles)
+    return profiles[0]["row_count"] if profiles else 0
+
+
+def remove_trip_file(conn, path: str) -> None:
+    """Atomically drop the rows, manifest entry and profile of a file that no longer exists."""
+    conn.begin()
+    try:
+        conn.execute("DELETE FROM nyc_taxi_data.raw_taxi_trips WHERE _source_file = ?", [path])
+        conn.execute(f"DELETE FROM {INGEST_MANIFEST_TABLE} WHERE file_path = ?", [path])
+        delete_profiles(conn, RAW_PROFILE_TABLE, "raw_taxi_trips", [path])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def copy_partition_to_dev(
+    duckdb_manager: DuckDBConnectionManager,
+    source_files: list,
+    config: IngestionConfig,
+    instrumentation: StepInstrumentation,
+) -> int:
+    """
+    Replace the rows of the given source files in dev.duckdb's copy of raw_taxi_trips.
+    
+    Only the partition's files are moved, inside one dev transaction, under
+    the ingestion memory settings, and dev's raw_taxi_trips_all view is
+    refreshed to raw's sealed months (see storage_tiers.py). Takes the dev
+    writer lease and then a raw reader lease (see duckdb_resource lock ordering).
+    
+    Returns:
+        Number of rows copied
+    """
+    with duckdb_manager.writer("dev") as dev_conn:
+        apply_ingestion_settings(dev_conn, config)
+        with duckdb_manager.lease("raw", exclusive=False):
+            dev_conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_data")
+            dev_conn.execute(f"ATTACH {sql_literal(duckdb_manager.path('raw'))} AS raw_db (READ_ONLY)")
+            try:
+                # Full copies made before _source_file existed are rebuilt partition by partition
+                dev_columns = table_columns(dev_conn, "nyc_taxi_data", "raw_taxi_trips")
+                if dev_columns and "_source_file" not in dev_columns:
+                    dev_conn.execute("DROP TABLE nyc_taxi_data.raw_taxi_trips")
+                dev_conn.execute("""
+                    CREATE TABLE IF NOT EXISTS nyc_taxi_data.raw_taxi_trips AS 
+                    SELECT * FROM raw_db.nyc_taxi_data.raw_taxi_trips LIMIT 0
+                """)
+                existing = {c.lower() for c in table_columns(dev_conn, "nyc_taxi_data", "raw_taxi_trips")}
+                for column_name, column_type, *_ in dev_conn.execute(
+                    "DESCRIBE SELECT * FROM raw_db.nyc_taxi_data.raw_taxi_trips"
+                ).fetchall():
+                    if column_name.lower() not in existing:
+                        dev_conn.execute(
+                            f'ALTER TABLE nyc_taxi_data.raw_taxi_trips ADD COLUMN "{column_name}" {column_type}'
+                        )
+                
+                dev_conn.begin()
+                try:
+                    dev_conn.execute(
+                        "DELETE FROM nyc_taxi_data.raw_taxi_trips WHERE list_contains(?, _source_file)",
+                        [source_files],
+                    )
+                    copied = instrumentation.execute(dev_conn, "copy_trips_to_dev", """
+                        INSERT INTO nyc_taxi_data.raw_taxi_trips BY NAME
+                        SELECT * FROM raw_db.nyc_taxi_data.raw_taxi_trips
+                        WHERE list_contains(?, _source_file)
+                    """, [source_files])
+                    refresh_unified_view(dev_conn, read_tier_manifest(dev_conn, "raw_db"))
+                    dev_conn.commit()
+                except Exception:
+                    dev_conn.rollback()
+                    raise
+            finally:
+                dev_conn.execute("DETACH raw_db")
+    return copied
+
+
+def dev_copy_is_current(duckdb_manager: DuckDBConnectionManager, source_files: list, expected_rows: int) -> bool:
+    """
+    Return True if dev.duckdb already holds expected_rows rows from the given source files.
+    
+    Rows are counted through the raw_taxi_trips_all view, so sealed months count as present.
+    """
+    if not Path(duckdb_manager.path("dev")).exists():
+        return False
+    with duckdb_manager.reader("dev") as dev_conn:
+        if "_source_file" not in table_columns(dev_conn, "nyc_taxi_data", "raw_taxi_trips_all"):
+            return False
+        dev_rows = dev_conn.execute(
+            "SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_trips_all WHERE list_contains(?, _source_file)",
+            [source_files],
+        ).fetchone()[0]
+    return dev_rows == expected_rows
+
+
+def drop_dev_raw_copies(duckdb_manager: DuckDBConnectionManager) -> list:
+    """
+    Drop the raw table copies left in dev.duckdb by copy mode.
+    
+    In attach mode dbt reads raw.duckdb directly, so these copies only cost disk.
+    
+    Returns:
+        Names of the dropped tables
+    """
+    if not Path(duckdb_manager.path("dev")).exists():
+        return []
+    with duckdb_manager.writer("dev") as dev_conn:
+        dropped = []
+        dev_conn.execute("DROP VIEW IF EXISTS nyc_taxi_data.raw_taxi_trips_all")
+        for table in ("raw_taxi_trips", "raw_taxi_zones"):
+            if table_columns(dev_conn, "nyc_taxi_data", table):
+                dev_conn.execute(f"DROP TABLE nyc_taxi_data.{table}")
+                dropped.append(table)
+    return dropped
+
+
+# How dbt's nyc_taxi_data source reaches the raw tables:
+# - "copy":   ingestion copies changed partitions into dev.duckdb (readers of
+#             dev.duckdb such as the Cube raw_* cubes still see the raw tables)
+# - "attach": dbt ATTACHes raw.duckdb read-only (see profiles.yml) and nothing
+#             is copied, halving disk usage and write time for trip rows
+RAW_SOURCE_MODE = os.getenv("RAW_SOURCE_MODE", "copy")
+
+# Source file locations (mounted into the Dagster container); overridable so
+# benchmarks can point ingestion at generated data
+SOURCE_DATA_PATH = Path(os.getenv("SOURCE_DATA_PATH", "/app/01_source_data/nyc_yellow_taxi_demo_data"))
+TRIPS_SOURCE_PATH = SOURCE_DATA_PATH / "yellow_cab_data_monthly"
+ZONES_SOURCE_FILE = SOURCE_DATA_PATH / "taxi_zones" / "taxi_zone_lookup.csv"
+
+
+@asset(
+    group_name="raw_data_ingestion",
+    partitions_def=monthly_partitions,
+    pool="duckdb_raw_writer",
+)
+def ingest_raw_data(
+    context: AssetExecutionContext,
+    config: IngestionConfig,
+    duckdb_manager: DuckDBConnectionManager,
+) -> None:
     """
-    Consolidated raw data ingestion for NYC taxi data.
+    Incremental, month-partitioned ingestion of NYC taxi trips.
+    
+    Each partition covers one tpep_pickup_datetime month and loads only that
+    month's trip file(s), so backfills fan out into parallel runs and a bad
+    month can be re-run on its own.
+    
+    Trip files are loaded incrementally against a file manifest
+    (nyc_taxi_data._ingest_manifest): new files are appended, changed files
+    have their rows replaced atomically, unchanged files are skipped and
+    rows from files removed from disk are dropped. Every trip row carries
+    the _source_file it was loaded from.
+    
+    Parallel partitions share raw.duckdb through the duckdb_manager
+    resource: file hashing happens without any lease, and writes queue for
+    the exclusive writer lease instead of failing on DuckDB's single-writer
+    lock. Lease wait/hold times and per-statement timings, rows/sec, memory
+    and spill are attached as materialization metadata.
     
-    This asset loads both taxi trips and zones sequentially within a single 
-    database connection to prevent DuckDB locking conflicts.
+    Files are loaded one batch (file) at a time, each committed on its own,
+    with progress logged per batch. DuckDB's memory limit, threads, spill
+    directory and insertion-order preservation come from the run config
+    (defaults from the INGEST_* environment variables), so multi-year
+    backfills run with flat memory on small workers.
+    
+    A month sealed into the cold tier (see raw_trip_storage_tiers) is moved
+    back to the hot table before any of its files are loaded or removed.
     
     Reads from: 
     - /app/01_source_data/nyc_yellow_taxi_demo_data/yellow_cab_data_monthly/*.parquet
-    - /app/01_source_data/nyc_yellow_taxi_demo_data/taxi_zones/taxi_zone_lookup.csv
     
     Writes to: 
-    - raw.duckdb.nyc_taxi_data.raw_taxi_trips
-    - raw.duckdb.nyc_taxi_data.raw_taxi_zones
+    - raw.duckdb.nyc_taxi_data.raw_taxi_trips (and the raw_taxi_trips_all view)
+    - raw.duckdb.nyc_taxi_data._ingest_manifest
+    - raw.duckdb.nyc_taxi_data._table_profiles (per source file)
+    - dev.duckdb.nyc_taxi_data.raw_taxi_trips (partition rows only, copy mode)
     """
+    partition_month = context.partition_key
+    trips_pattern = str(TRIPS_SOURCE_PATH / "*.parquet")
+    instrumentation = StepInstrumentation()
     
-    # File paths
-    base_path = Path("/app/01_source_data/nyc_yellow_taxi_demo_data")
-    trips_path = base_path / "yellow_cab_data_monthly"
-    zones_path = base_path / "taxi_zones"
-    trips_pattern = str(trips_path / "*.parquet")
-    zones_file = str(zones_path / "taxi_zone_lookup.csv")
-
     # Check if source files exist
-    if not Path(zones_file).exists():
-        raise FileNotFoundError(f"Zones lookup file not found at {zones_file}")
-    if not list(trips_path.glob("*.parquet")):
+    all_trip_files = sorted(TRIPS_SOURCE_PATH.glob("*.parquet"))
+    if not all_trip_files:
         raise FileNotFoundError(f"No trip data found at {trips_pattern}")
-    raw_db_path = os.getenv("DUCKDB_RAW_PATH", "/app/02_duck_db/01_raw/raw.duckdb")
-    
-    # Connect to raw DuckDB with retry logic (single connection for both operations)
-    conn = connect_with_retry(raw_db_path, read_only=False)
     
     try:
-        # Create schema for NYC taxi data (one schema per data source)
-        conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_data")
-        
-        # Step 1: Load taxi trips from Parquet files
-        context.log.info(f"Loading NYC taxi trips from: {trips_pattern}")
-        conn.execute(f"""
-            CREATE OR REPLACE TABLE nyc_taxi_data.raw_taxi_trips AS 
-            SELECT 
-                *,
-                CURRENT_TIMESTAMP as _ingested_at
-            FROM read_parquet('{trips_pattern}')
-        """)
-        
-        # Get trip statistics
-        trip_stats = conn.execute("""
-            SELECT 
-                COUNT(*) as total_trips,
-                MIN(tpep_pickup_datetime) as earliest_trip,
-                MAX(tpep_pickup_datetime) as latest_trip,
-                COUNT(DISTINCT DATE_TRUNC('month', tpep_pickup_datetime)) as months_covered
-            FROM nyc_taxi_data.raw_taxi_trips
-        """).fetchone()
-        
-        context.log.info(f"✅ Successfully loaded {trip_stats[0]:,} taxi trips")
-        context.log.info(f"📅 Date range: {trip_stats[1]} to {trip_stats[2]}")
-        context.log.info(f"📊 Months covered: {trip_stats[3]}")
-        
-        # Step 2: Load taxi zones from CSV
-        context.log.info(f"Loading taxi zones from: {zones_file}")
-        conn.execute(f"""
-            CREATE OR REPLACE TABLE nyc_taxi_data.raw_taxi_zones AS 
-            SELECT 
-                *,
-                CURRENT_TIMESTAMP as _ingested_at
-            FROM read_csv_auto('{zones_file}')
-        """)
-        
-        # Get zone statistics
-        zone_count = conn.execute("SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_zones").fetchone()[0]
-        sample_zones = conn.execute("""
-            SELECT DISTINCT Borough 
-            FROM nyc_taxi_data.raw_taxi_zones 
-            ORDER BY Borough
-        """).fetchall()
-        
-        context.log.info(f"✅ Successfully loaded {zone_count} taxi zones")
-        context.log.info(f"📍 Boroughs: {', '.join([b[0] for b in sample_zones])}")
+        # Step 1: Prepare tables and snapshot this partition's manifest (files are hashed after the lease is released)
+        with duckdb_manager.writer("raw") as conn:
+            # Create schema for NYC taxi data (one schema per data source)
+            conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_data")
+            ensure_ingest_manifest(conn)
+            ensure_profile_table(conn, RAW_PROFILE_TABLE)
+            
+            # Tables created before the manifest existed have no _source_file lineage,
+            # so they are rebuilt from scratch, partition by partition
+            trip_columns = table_columns(conn, "nyc_taxi_data", "raw_taxi_trips")
+            if trip_columns and "_source_file" not in trip_columns:
+                context.log.warning("raw_taxi_trips has no _source_file column - rebuilding it from all files")
+                conn.execute("DROP TABLE nyc_taxi_data.raw_taxi_trips")
+                conn.execute(f"DELETE FROM {INGEST_MANIFEST_TABLE}")
+                conn.execute(f"DELETE FROM {RAW_PROFILE_TABLE} WHERE table_name = 'raw_taxi_trips'")
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS nyc_taxi_data.raw_taxi_trips AS 
+                SELECT 
+                    *,
+                    CURRENT_TIMESTAMP as _ingested_at,
+                    CAST(NULL AS VARCHAR) as _source_file
+                FROM read_parquet(?)
+                LIMIT 0
+            """, [str(all_trip_files[0])])
+            ensure_tier_manifest(conn)
+            refresh_unified_view(conn, read_tier_manifest(conn))
+            manifest = read_ingest_manifest(conn, partition_month)
+            file_months = read_file_months(conn)
         
-        # Step 3: Copy raw data to dev database for dbt transformations
-        context.log.info("Copying raw data to dev database for dbt access...")
-        dev_db_path = os.getenv("DUCKDB_DEV_PATH", "/app/02_duck_db/02_dev/dev.duckdb")
-        dev_conn = connect_with_retry(dev_db_path, read_only=False)
+        # Files without a month in their name are only scanned if not yet ingested as they are
+        trip_files = [f for f in all_trip_files if trip_file_partition_month(f, file_months) == partition_month]
+        context.log.info(f"📂 Partition {partition_month}: {len(trip_files)} trip file(s) on disk")
+        plan = plan_file_ingestion(manifest, trip_files)
+        context.log.info(
+            f"📂 Files - new: {len(plan['new'])}, changed: {len(plan['changed'])}, "
+            f"unchanged: {len(plan['unchanged']) + len(plan['touched'])}, removed: {len(plan['removed'])}"
+        )
         
-        try:
-            # Create schema in dev database
-            dev_conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_data")
+        # Step 2: Apply the plan under the raw writer lease
+        with duckdb_manager.writer("raw") as conn:
+            apply_ingestion_settings(conn, config)
             
-            # Attach raw database and copy data
-            dev_conn.execute(f"ATTACH '{raw_db_path}' AS raw_db")
+            # Sealed months are immutable: move the month back to the hot table before changing it
+            if plan["new"] or plan["changed"] or plan["removed"]:
+                unsealed = unseal_month(conn, partition_month)
+                if unsealed:
+                    context.log.info(f"🔓 Unsealed {unsealed:,} archived rows of {partition_month} for re-ingestion")
             
-            # Copy trips data
-            dev_conn.execute("""
-                CREATE OR REPLACE TABLE nyc_taxi_data.raw_taxi_trips AS 
-                SELECT * FROM raw_db.nyc_taxi_data.raw_taxi_trips
-            """)
+            for path in plan["removed"]:
+                remove_trip_file(conn, path)
+                context.log.info(f"🗑️  Removed rows from deleted file: {path}")
             
-            # Copy zones data
-            dev_conn.execute("""
-                CREATE OR REPLACE TABLE nyc_taxi_data.raw_taxi_zones AS 
-                SELECT * FROM raw_db.nyc_taxi_data.raw_taxi_zones
-            """)
+            for path, size, mtime, content_hash in plan["touched"]:
+                conn.execute(
+                    f"UPDATE {INGEST_MANIFEST_TABLE} SET file_mtime = ? WHERE file_path = ?", [mtime, path]
+                )
             
-            context.log.info("✅ Raw data copied to dev database for dbt access")
+            # One batch per file, each in its own transaction
+            batches = plan["new"] + plan["changed"]
+            loaded_rows = 0
+            for batch_number, (path, size, mtime, content_hash) in enumerate(batches, start=1):
+                batch_start = time.perf_counter()
+                row_count = load_trip_file(conn, path, size, mtime, content_hash, partition_month, instrumentation)
+                batch_seconds = time.perf_counter() - batch_start
+                loaded_rows += row_count
+                insert = instrumentation.last_statement
+                context.log.info(
+                    f"✅ Batch {batch_number}/{len(batches)}: loaded {row_count:,} rows from {Path(path).name} "
+                    f"in {batch_seconds:.1f}s ({row_count / max(batch_seconds, 1e-6):,.0f} rows/s, "
+                    f"peak {insert['peak_memory_bytes'] / 1024 ** 2:,.0f} MB, "
+                    f"spilled {insert['spill_bytes'] / 1024 ** 2:,.0f} MB) - {loaded_rows:,} rows so far"
+                )
             
-        except Exception as e:
-            context.log.error(f"Failed to copy raw data to dev database: {e}")
-            raise
-        finally:
-            dev_conn.execute("DETACH raw_db")
-            dev_conn.close()
+            # Files loaded before profiling existed are profiled once
+            partition_files = [str(f) for f in trip_files]
+            profiled = {
+                row[0] for row in conn.execute(f"""
+                    SELECT DISTINCT partition_key FROM {RAW_PROFILE_TABLE}
+                    WHERE table_name = 'raw_taxi_trips' AND list_contains(?, partition_key)
+                """, [partition_files]).fetchall()
+            }
+            for path in partition_files:
+                if path not in profiled:
+                    with instrumentation.timed("profile_trips") as measures:
+                        measures["rows"] = profile_trip_file(conn, path)
+            
+            # Get trip statistics for this partition's files from the stored profiles
+            pickup_profile = summarize_profiles(
+                conn, RAW_PROFILE_TABLE, "raw_taxi_trips", partition_files
+            ).get("tpep_pickup_datetime", {})
+            trip_stats = (
+                pickup_profile.get("row_count", 0),
+                pickup_profile.get("min_value"),
+                pickup_profile.get("max_value"),
+            )
+        
+        context.log.info(f"✅ Partition {partition_month} holds {trip_stats[0]:,} taxi trips")
+        context.log.info(f"📅 Date range: {trip_stats[1]} to {trip_stats[2]}")
+        
+        # Step 3: Copy this partition's rows to the dev database for dbt transformations
+        if RAW_SOURCE_MODE == "attach":
+            context.log.info("🔗 RAW_SOURCE_MODE=attach - dbt reads raw.duckdb directly, nothing to copy")
+        else:
+            source_files = [str(f) for f in trip_files] + plan["removed"]
+            changed_files = [entry[0] for entry in plan["new"] + plan["changed"]] + plan["removed"]
+            if changed_files or not dev_copy_is_current(duckdb_manager, source_files, trip_stats[0]):
+                context.log.info("Copying partition rows to dev database for dbt access...")
+                copied = copy_partition_to_dev(duckdb_manager, source_files, config, instrumentation)
+                context.log.info(f"✅ {copied:,} rows copied to dev database for dbt access")
+            else:
+                context.log.info("⏭️  No file changes in this partition - dev copy is up to date")
         
         # Summary
-        context.log.info("🎉 Raw data ingestion completed successfully!")
-        context.log.info(f"   Total trips: {trip_stats[0]:,}")
-        context.log.info(f"   Total zones: {zone_count}")
-        context.log.info("   Data available in both raw and dev databases")
+        context.log.info("🎉 Raw trip ingestion completed successfully!")
+        context.log.info(f"   Partition: {partition_month}")
+        context.log.info(f"   Trips: {trip_stats[0]:,}")
+        context.add_output_metadata({
+            "partition_trips": trip_stats[0],
+            "files_loaded": len(plan["new"]) + len(plan["changed"]),
+            "ingest_memory_limit": config.memory_limit or "default",
+            "ingest_threads": config.threads,
+            **instrumentation.metadata(),
+            **duckdb_manager.metadata(),
+        })
         
     except Exception as e:
         context.log.error(f"Failed to ingest raw data: {e}")
         raise
-    finally:
-        conn.close()
 
-@asset(group_name="data_validation", deps=[ingest_raw_data])
-def raw_data_validation(context: AssetExecutionContext) -> None:
+
+@asset(group_name="raw_data_ingestion", pool="duckdb_raw_writer")
+def ingest_taxi_zones(context: AssetExecutionContext, duckdb_manager: DuckDBConnectionManager) -> None:
     """
-    Validate the loaded raw NYC taxi data and log data quality metrics.
+    Load the NYC taxi zone lookup.
+    
+    The zone lookup is a single small CSV shared by every month, so it is
+    unpartitioned. It is tracked in the ingestion manifest and only reloaded
+    (and copied to dev in copy mode) when its contents change.
+    
+    Reads from: 
+    - /app/01_source_data/nyc_yellow_taxi_demo_data/taxi_zones/taxi_zone_lookup.csv
+    
+    Writes to: 
+    - raw.duckdb.nyc_taxi_data.raw_taxi_zones
+    - dev.duckdb.nyc_taxi_data.raw_taxi_zones (copy mode)
     """
+    zones_file = str(ZONES_SOURCE_FILE)
+    if not ZONES_SOURCE_FILE.exists():
+        raise FileNotFoundError(f"Zones lookup file not found at {zones_file}")
+    instrumentation = StepInstrumentation()
     
-    raw_db_path = os.getenv("DUCKDB_RAW_PATH", "/app/02_duck_db/01_raw/raw.duckdb")
-    conn = connect_with_retry(raw_db_path, read_only=True)
+    try:
+        with duckdb_manager.writer("raw") as conn:
+            conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_data")
+            ensure_ingest_manifest(conn)
+            
+            # The lookup shares the trip manifest (without a partition month)
+            manifest = {
+                row[0]: row[1:]
+                for row in conn.execute(f"""
+                    SELECT file_path, file_size, file_mtime, content_hash
+                    FROM {INGEST_MANIFEST_TABLE}
+                    WHERE file_path = ?
+                """, [zones_file]).fetchall()
+            }
+            plan = plan_file_ingestion(manifest, [ZONES_SOURCE_FILE])
+            zones_changed = bool(plan["new"] or plan["changed"]) or not table_columns(
+                conn, "nyc_taxi_data", "raw_taxi_zones"
+            )
+            
+            for path, size, mtime, content_hash in plan["touched"]:
+                conn.execute(
+                    f"UPDATE {INGEST_MANIFEST_TABLE} SET file_mtime = ? WHERE file_path = ?", [mtime, path]
+                )
+            
+            if zones_changed:
+                # Load taxi zones from CSV
+                context.log.info(f"Loading taxi zones from: {zones_file}")
+                # The plan holds exactly one entry for the single lookup file
+                (_, size, mtime, content_hash), = plan["new"] + plan["changed"] + plan["touched"] + plan["unchanged"]
+                conn.begin()
+                try:
+                    instrumentation.execute(conn, "load_zones", """
+                        CREATE OR REPLACE TABLE nyc_taxi_data.raw_taxi_zones AS 
+                        SELECT 
+                            *,
+                            CURRENT_TIMESTAMP as _ingested_at
+                        FROM read_csv_auto(?)
+                    """, [zones_file])
+                    conn.execute(f"DELETE FROM {INGEST_MANIFEST_TABLE} WHERE file_path = ?", [zones_file])
+                    conn.execute(f"""
+                        INSERT INTO {INGEST_MANIFEST_TABLE}
+                            (file_path, file_size, file_mtime, content_hash, row_count, ingested_at)
+                        SELECT ?, ?, ?, ?, COUNT(*), CURRENT_TIMESTAMP FROM nyc_taxi_data.raw_taxi_zones
+                    """, [zones_file, size, mtime, content_hash])
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            else:
+                context.log.info("⏭️  Taxi zone lookup unchanged - skipping reload")
+            
+            # Get zone statistics
+            zone_count = conn.execute("SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_zones").fetchone()[0]
+            sample_zones = conn.execute("""
+                SELECT DISTINCT Borough 
+                FROM nyc_taxi_data.raw_taxi_zones 
+                ORDER BY Borough
+            """).fetchall()
+        
+        context.log.info(f"✅ {zone_count} taxi zones available")
+        context.log.info(f"📍 Boroughs: {', '.join([b[0] for b in sample_zones])}")
+        
+        if RAW_SOURCE_MODE == "attach":
+            # dbt reads raw.duckdb directly; reclaim any copies left over from copy mode
+            dropped = drop_dev_raw_copies(duckdb_manager)
+            if dropped:
+                context.log.info(f"🧹 Dropped raw copies from dev database: {', '.join(dropped)}")
+        else:
+            # Copy zones to the dev database for dbt access, only when they changed
+            with duckdb_manager.writer("dev") as dev_conn:
+                if zones_changed or not table_columns(dev_conn, "nyc_taxi_data", "raw_taxi_zones"):
+                    with duckdb_manager.lease("raw", exclusive=False):
+                        dev_conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_data")
+                        dev_conn.execute(f"ATTACH {sql_literal(duckdb_manager.path('raw'))} AS raw_db (READ_ONLY)")
+                        try:
+                            instrumentation.execute(dev_conn, "copy_zones_to_dev", """
+                                CREATE OR REPLACE TABLE nyc_taxi_data.raw_taxi_zones AS 
+                                SELECT * FROM raw_db.nyc_taxi_data.raw_taxi_zones
+                            """)
+                        finally:
+                            dev_conn.execute("DETACH raw_db")
+                    context.log.info("✅ Taxi zones copied to dev database for dbt access")
+        
+        context.add_output_metadata({
+            "zones": zone_count,
+            **instrumentation.metadata(),
+            **duckdb_manager.metadata(),
+        })
+        
+    except Exception as e:
+        context.log.error(f"Failed to ingest taxi zones: {e}")
+        raise
+
+@asset(
+    group_name="data_validation",
+    deps=[ingest_raw_data, ingest_taxi_zones],
+    partitions_def=monthly_partitions,
+)
+def raw_data_validation(context: AssetExecutionContext, duckdb_manager: DuckDBConnectionManager) -> None:
+    """
+    Validate one month of loaded raw NYC taxi data and log data quality metrics.
+    
+    Metrics come from the per-file profiles written during ingestion, so the
+    trips table itself is never rescanned. Runs under a shared reader lease,
+    so validations of different partitions proceed concurrently while
+    ingestion writes queue behind them.
+    """
+    partition_month = context.partition_key
+    instrumentation = StepInstrumentation()
     
     try:
+        with duckdb_manager.reader("raw") as conn:
+            partition_files = [
+                row[0] for row in conn.execute(
+                    f"SELECT file_path FROM {INGEST_MANIFEST_TABLE} WHERE partition_month = CAST(? AS DATE)",
+                    [partition_month],
+                ).fetchall()
+            ]
+            profile = summarize_profiles(conn, RAW_PROFILE_TABLE, "raw_taxi_trips", partition_files)
+            zones_count = conn.execute("SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_zones").fetchone()[0]
+        
         # Validate NYC taxi data
-        trips_count = conn.execute("SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_trips").fetchone()[0]
-        zones_count = conn.execute("SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_zones").fetchone()[0]
+        trips_count = profile["tpep_pickup_datetime"]["row_count"] if profile else 0
         
-        context.log.info(f"📊 NYC Taxi Data Quality Report:")
+        context.log.info(f"📊 NYC Taxi Data Quality Report ({partition_month}):")
         context.log.info(f"   - Taxi Trips: {trips_count:,} records")
         context.log.info(f"   - Taxi Zones: {zones_count:,} records")
         
         if trips_count > 0:
             # Check for nulls in key columns
-            null_checks = conn.execute("""
-                SELECT 
-                    SUM(CASE WHEN tpep_pickup_datetime IS NULL THEN 1 ELSE 0 END) as null_pickup_datetime,
-                    SUM(CASE WHEN tpep_dropoff_datetime IS NULL THEN 1 ELSE 0 END) as null_dropoff_datetime,
-                    SUM(CASE WHEN trip_distance IS NULL THEN 1 ELSE 0 END) as null_trip_distance,
-                    SUM(CASE WHEN fare_amount IS NULL THEN 1 ELSE 0 END) as null_fare_amount
-                FROM nyc_taxi_data.raw_taxi_trips
-            """).fetchone()
-            
-            context.log.info(f"   - Null pickup_datetime: {null_checks[0]:,}")
-            context.log.info(f"   - Null dropoff_datetime: {null_checks[1]:,}")
-            context.log.info(f"   - Null trip_distance: {null_checks[2]:,}")
-            context.log.info(f"   - Null fare_amount: {null_checks[3]:,}")
+            context.log.info(f"   - Null pickup_datetime: {profile['tpep_pickup_datetime']['null_count']:,}")
+            context.log.info(f"   - Null dropoff_datetime: {profile['tpep_dropoff_datetime']['null_count']:,}")
+            context.log.info(f"   - Null trip_distance: {profile['trip_distance']['null_count']:,}")
+            context.log.info(f"   - Null fare_amount: {profile['fare_amount']['null_count']:,}")
             
             # Get date range and basic stats
-            stats = conn.execute("""
-                SELECT 
-                    MIN(tpep_pickup_datetime) as earliest_trip,
-                    MAX(tpep_pickup_datetime) as latest_trip,
-                    AVG(trip_distance) as avg_trip_distance,
-                    AVG(fare_amount) as avg_fare_amount
-                FROM nyc_taxi_data.raw_taxi_trips
-                WHERE tpep_pickup_datetime IS NOT NULL
-            """).fetchone()
-            
-            context.log.info(f"   - Date range: {stats[0]} to {stats[1]}")
-            context.log.info(f"   - Avg trip distance: {stats[2]:.2f} miles")
-            context.log.info(f"   - Avg fare amount: ${stats[3]:.2f}")
+            pickup = profile["tpep_pickup_datetime"]
+            context.log.info(f"   - Date range: {pickup['min_value']} to {pickup['max_value']}")
+            context.log.info(f"   - Avg trip distance: {profile['trip_distance']['mean_value']:.2f} miles")
+            context.log.info(f"   - Avg fare amount: ${profile['fare_amount']['mean_value']:.2f}")
             
+        context.add_output_metadata({
+            "trips": trips_count,
+            "zones": zones_count,
+            **instrumentation.metadata(),
+            **duckdb_manager.metadata(),
+        })
         context.log.info("✅ Raw data validation completed")
         
     except Exception as e:
         context.log.error(f"Validation failed: {e}")
         raise
-    finally:
-        conn.close()
 
-# Configure dbt project integration
-DBT_PROJECT_DIR = "/app/04_dbt"
+# Hot/cold tiering of raw_taxi_trips (see storage_tiers.py): months older than
+# the STORAGE_HOT_MONTHS most recent ones are sealed into Parquet under
+# STORAGE_ARCHIVE_PATH; 0 keeps every month in DuckDB
+STORAGE_HOT_MONTHS = int(os.getenv("STORAGE_HOT_MONTHS", "0"))
+STORAGE_ARCHIVE_PATH = os.getenv("STORAGE_ARCHIVE_PATH", "/app/02_duck_db/05_archive")
+
+
+class StorageTieringConfig(Config):
+    """Run config for hot/cold tiering of the raw trip table."""
+    
+    # Most recent pickup months kept in DuckDB; 0 seals nothing
+    hot_months: int = STORAGE_HOT_MONTHS
+
 
 @asset(
-    group_name="dbt_transformations",
-    deps=[raw_data_validation] # Explicitly depend on raw data validation
+    group_name="raw_data_ingestion",
+    deps=[raw_data_validation],
+    pool="duckdb_raw_writer",
+    automation_condition=AutomationCondition.eager(),
 )
-def dbt_transformation_asset(context: AssetExecutionContext):
+def raw_trip_storage_tiers(
+    context: AssetExecutionContext,
+    config: StorageTieringConfig,
+    duckdb_manager: DuckDBConnectionManager,
+) -> None:
     """
-    Materializes dbt models after raw data is ingested and validated.
+    Seal raw trip months that left the hot window into immutable Parquet.
+    
+    Keeps the config.hot_months most recent ingested pickup months in
+    raw_taxi_trips and moves each older, validated month into one sorted,
+    zstd-compressed file under STORAGE_ARCHIVE_PATH, so loads, copies and
+    checkpoints of raw.duckdb and dev.duckdb stay bounded as history grows.
+    dbt and Cube read the nyc_taxi_data.raw_taxi_trips_all view (hot table
+    plus sealed files) and see the same rows before and after.
+    
+    Runs after validation of each ingested partition. Takes the raw writer
+    lease to seal, then (copy mode) the dev writer and a raw reader lease to
+    drop the sealed months from dev's copy, and finally deletes archive files
+    of months that were unsealed for re-ingestion.
     
-    This includes:
-    - Seed dimension tables (vendors, rate codes, payment types)  
-    - Staging models (stg_taxi_trips, stg_taxi_zones)
-    - Mart models (fct_taxi_trips, mart_taxi_trips)
+    Writes to:
+    - STORAGE_ARCHIVE_PATH/raw_taxi_trips/<YYYY-MM-01>_<sealed at>.parquet
+    - raw.duckdb.nyc_taxi_data._storage_tiers and the raw_taxi_trips_all views
     """
+    archive_dir = STORAGE_ARCHIVE_PATH
+    instrumentation = StepInstrumentation()
+    sealed_now = {}
+    
     try:
-        # Change to dbt directory
-        os.chdir(DBT_PROJECT_DIR)
-        
-        context.log.info("Starting dbt seed...")
-        result = subprocess.run(["dbt", "seed", "--target", "dev"], 
-                              capture_output=True, text=True, check=True)
-        context.log.info("✅ dbt seed completed successfully")
-        context.log.info(f"dbt seed output: {result.stdout}")
-        
-        context.log.info("Starting dbt run...")
-        result = subprocess.run(["dbt", "run", "--target", "dev"], 
-                              capture_output=True, text=True, check=True)
-        context.log.info("✅ dbt run completed successfully")
-        context.log.info(f"dbt run output: {result.stdout}")
-        
-        context.log.info("Starting dbt test...")
-        try:
-            result = subprocess.run(["dbt", "test", "--target", "dev"], 
-                                  capture_output=True, text=True, check=True)
-            context.log.info("✅ dbt test completed successfully")
-            context.log.info(f"dbt test output: {result.stdout}")
-        except subprocess.CalledProcessError as test_error:
-            context.log.warning(f"dbt tests failed but continuing pipeline: {test_error}")
-            context.log.warning(f"dbt test stdout: {test_error.stdout}")
-            context.log.warning(f"dbt test stderr: {test_error.stderr}")
-            context.log.info("⚠️ dbt tests failed but data transformations completed - proceeding with pipeline")
+        with duckdb_manager.writer("raw") as conn:
+            ensure_tier_manifest(conn)
+            ingested = {
+                row[0].isoformat(): row[1]
+                for row in conn.execute(f"""
+                    SELECT partition_month, list(file_path ORDER BY file_path)
+                    FROM {INGEST_MANIFEST_TABLE}
+                    WHERE partition_month IS NOT NULL
+                    GROUP BY partition_month
+                """).fetchall()
+            }
+            sealed = read_tier_manifest(conn)
+            for partition_month in cold_months(list(ingested), config.hot_months):
+                if partition_month in sealed:
+                    continue
+                entry = seal_month(conn, archive_dir, partition_month, ingested[partition_month], instrumentation)
+                sealed_now[partition_month] = entry
+                context.log.info(
+                    f"🧊 Sealed {partition_month}: {entry['row_count']:,} rows, "
+                    f"{entry['file_size'] / 1024 ** 2:,.1f} MB -> {entry['file_path']}"
+                )
+            if sealed_now:
+                with instrumentation.timed("checkpoint_raw"):
+                    conn.execute("CHECKPOINT")
+            hot_rows = conn.execute("SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_trips").fetchone()[0]
+        
+        # Bring dev's copy and view in line with raw; the manifest is re-read under the raw reader lease
+        with duckdb_manager.lease("dev", exclusive=True), duckdb_manager.lease("raw", exclusive=False):
+            conn = duckdb_manager.connect("raw", read_only=True)
+            try:
+                sealed = read_tier_manifest(conn)
+            finally:
+                conn.close()
+            if RAW_SOURCE_MODE != "attach" and Path(duckdb_manager.path("dev")).exists():
+                dev_conn = duckdb_manager.connect("dev", read_only=False)
+                try:
+                    if table_columns(dev_conn, "nyc_taxi_data", "raw_taxi_trips"):
+                        deleted = sync_hot_copy(dev_conn, sealed)
+                        if deleted:
+                            context.log.info(f"🧊 Dropped {deleted:,} sealed rows from the dev copy")
+                            with instrumentation.timed("checkpoint_dev"):
+                                dev_conn.execute("CHECKPOINT")
+                finally:
+                    dev_conn.close()
+            removed = remove_unsealed_files(archive_dir, sealed)
+            for path in removed:
+                context.log.info(f"🗑️  Removed unsealed archive file {path}")
+        
+        context.log.info(
+            f"✅ {len(ingested) - len(sealed)} hot month(s) ({hot_rows:,} rows) in DuckDB, "
+            f"{len(sealed)} sealed month(s) in {archive_dir}"
+        )
+        context.add_output_metadata({
+            "hot_months_setting": config.hot_months,
+            "hot_months": len(ingested) - len(sealed),
+            "hot_rows": hot_rows,
+            "sealed_months": len(sealed),
+            "sealed_rows": sum(entry["row_count"] for entry in sealed.values()),
+            "sealed_mb": round(sum(entry["file_size"] for entry in sealed.values()) / 1024 ** 2, 1),
+            "months_sealed_now": len(sealed_now),
+            "archive_files_removed": len(removed),
+            **instrumentation.metadata(),
+            **duckdb_manager.metadata(),
+        })
+        
+    except Exception as e:
+        context.log.error(f"Storage tiering failed: {e}")
+        raise
+
+
+# Configure dbt project integration (dbt runs in-process, see dbt_runner.py)
+DBT_PROJECT_DIR = os.getenv("DBT_PROJECT_DIR", str(Path(__file__).resolve().parent.parent / "04_dbt"))
+DBT_PROFILES_DIR = os.getenv("DBT_PROFILES_DIR", DBT_PROJECT_DIR)
+
+# Only warn at load; DuckDBConnectionManager fails the steps that need the extensions
+if missing := missing_extensions():
+    get_dagster_logger().warning(
+        f"DuckDB extensions {', '.join(missing)} are not vendored; steps using DuckDB will fail until "
+        f"z_other/scripts/scripts/init_duckdb.py has been run"
+    )
+
+# Every dbt model and seed is exposed as its own asset; the project is only
+# re-parsed at load when it changed since the manifest was written
+DBT_MANIFEST_PATH = ensure_manifest_file(DBT_PROJECT_DIR, DBT_PROFILES_DIR, "dev")
+
+# Trip models are partitioned by pickup month; everything else is reference data
+DBT_TRIP_MODELS_SELECT = "stg_taxi_trips+"
+
+# dbt sources are the tables written by the ingestion assets
+DBT_SOURCE_ASSET_KEYS = {
+    "raw_taxi_trips": AssetKey("ingest_raw_data"),
+    "raw_taxi_zones": AssetKey("ingest_taxi_zones"),
+}
+
+
+class ProtoLocDbtTranslator(DagsterDbtTranslator):
+    """
+    Map dbt nodes onto the platform's asset graph.
+    
+    Models and seeds are keyed by name (e.g. fct_taxi_trips, dim_vendor) and
+    sources resolve to the ingestion assets that write them, so lineage runs
+    from ingest_raw_data through every dbt model. Code versions come from the
+    node SQL, so editing a model marks only that model as changed.
+    
+    Every dbt asset rebuilds when an upstream asset or partition (of any
+    month, see UPSTREAM_UPDATED) is updated, or when its own code version
+    changes; only the affected subgraph is requested by the automation sensor.
+    """
+    
+    def get_asset_key(self, dbt_resource_props):
+        if dbt_resource_props["resource_type"] == "source":
+            return DBT_SOURCE_ASSET_KEYS.get(
+                dbt_resource_props["name"], super().get_asset_key(dbt_resource_props)
+            )
+        return AssetKey(dbt_resource_props["name"])
+    
+    def get_group_name(self, dbt_resource_props):
+        return "dbt_transformations"
+    
+    def get_automation_condition(self, dbt_resource_props):
+        return UPSTREAM_UPDATED | AutomationCondition.code_version_changed()
+
+
+# dbt tests are defined separately as dbt_test_checks so they run outside the dbt step
+dbt_translator = ProtoLocDbtTranslator(settings=DagsterDbtTranslatorSettings(enable_asset_checks=False))
+
+
+def selected_dbt_nodes(context: AssetExecutionContext) -> dict:
+    """Return {node name: resource type} for the dbt assets selected in this step."""
+    manifest = json.loads(DBT_MANIFEST_PATH.read_text())
+    return {
+        props["name"]: props["resource_type"]
+        for props in sorted(manifest["nodes"].values(), key=lambda props: props["name"])
+        if props["resource_type"] in ("model", "seed")
+        and dbt_translator.get_asset_key(props) in context.selected_asset_keys
+    }
+
+
+def materialize_dbt_nodes(
+    context: AssetExecutionContext,
+    duckdb_manager: DuckDBConnectionManager,
+    nodes: dict,
+    run_args: list = None,
+    cluster: bool = False,
+    force_recluster: bool = False,
+):
+    """
+    Seed and run the given dbt nodes and yield one materialization per node.
+    
+    dbt runs in-process (see dbt_runner.py) under the dev writer lease and a
+    raw reader lease (profiles.yml attaches raw.duckdb read-only). Each
+    node's status and timing is logged as it finishes and attached to its
+    materialization (compile/execute seconds, rows affected). The nodes'
+    tests are compiled but not run here, so the write lease is held for
+    transform time only; dbt_test_checks executes them afterwards. Time
+    spent queued for the leases and the step's phase timings are reported
+    on every materialization. With cluster set, clustered trip relations
+    whose sort order has degraded (or all of them, with force_recluster)
+    are re-sorted before the pruning report.
+    """
+    run_args = run_args or []
+    finished = {}
+    pruning = {}
+    instrumentation = StepInstrumentation()
+    
+    def log_node(node_info, run_result):
+        node_metadata = {
+            "dbt_status": str(run_result.status),
+            "dbt_execution_seconds": round(run_result.execution_time, 3),
+        }
+        for timing in run_result.timing_info:
+            phase_seconds = (
+                timing.completed_at.ToNanoseconds() - timing.started_at.ToNanoseconds()
+            ) / 1e9
+            node_metadata[f"dbt_{timing.name}_seconds"] = round(max(phase_seconds, 0.0), 3)
+        # dbt-duckdb reports -1 when the row count is unknown (e.g. CREATE TABLE AS)
+        rows_affected = dict(run_result.adapter_response.items()).get("rows_affected", -1)
+        if rows_affected >= 0:
+            node_metadata["dbt_rows_affected"] = int(rows_affected)
+        finished[node_info.node_name] = node_metadata
+        context.log.info(
+            f"   {node_info.resource_type} {node_info.node_name}: "
+            f"{run_result.status} in {run_result.execution_time:.2f}s"
+        )
+    
+    def dbt(args):
+        result = run_dbt(args, DBT_PROJECT_DIR, DBT_PROFILES_DIR, "dev", on_node_finished=log_node)
+        if not result.success:
+            raise DbtCommandError(args, result)
+        return result
+    
+    seeds = [name for name, resource_type in nodes.items() if resource_type == "seed"]
+    models = [name for name, resource_type in nodes.items() if resource_type == "model"]
+    context.log.info(f"dbt nodes: {', '.join(nodes)}")
+    
+    try:
+        with duckdb_manager.lease("dev", exclusive=True), duckdb_manager.lease("raw", exclusive=False):
+            if seeds:
+                context.log.info("Starting dbt seed...")
+                with instrumentation.timed("dbt_seed"):
+                    dbt(["seed", "--select", *seeds])
+                context.log.info("✅ dbt seed completed successfully")
+            
+            if models:
+                context.log.info("Starting dbt run...")
+                with instrumentation.timed("dbt_run"):
+                    dbt(["run", "--select", *models, *run_args])
+                context.log.info("✅ dbt run completed successfully")
+            
+            # Profile the rebuilt months while the dev writer lease is still held
+            if context.assets_def.partitions_def is not None:
+                with instrumentation.timed("profile_partitions"):
+                    profile_dbt_partitions(context, duckdb_manager, nodes, full_refresh="--full-refresh" in run_args)
+                reclustered = {}
+                if cluster:
+                    with instrumentation.timed("recluster"):
+                        reclustered = recluster_degraded_relations(context, duckdb_manager, nodes, force_recluster)
+                pruning = report_zonemap_pruning(context, duckdb_manager, nodes)
+                for node, metadata in reclustered.items():
+                    pruning.setdefault(node, {}).update(metadata)
+            
+            # Tests run afterwards as asset checks (dbt_test_checks); only compile them here
+            tests = [spec.name for spec in DBT_TEST_CHECK_SPECS if spec.asset_key.path[-1] in nodes]
+            if tests:
+                with instrumentation.timed("dbt_compile_tests"):
+                    compiled = compile_tests(tests, DBT_PROJECT_DIR, DBT_PROFILES_DIR, "dev")
+                context.log.info(f"✅ Compiled {len(compiled)} dbt tests for asset checks")
         
         context.log.info("🎉 All dbt transformations completed successfully!")
         
-    except subprocess.CalledProcessError as e:
+    except DbtCommandError as e:
         context.log.error(f"dbt command failed: {e}")
-        context.log.error(f"stdout: {e.stdout}")
-        context.log.error(f"stderr: {e.stderr}")
         raise
     except Exception as e:
         context.log.error(f"dbt transformation failed: {e}")
         raise
+    
+    # Multi-assets must report in topological order, which is the order dbt finished them in
+    step_metadata = {**instrumentation.metadata(), **duckdb_manager.metadata()}
+    for node in [name for name in finished if name in nodes] + [name for name in nodes if name not in finished]:
+        yield MaterializeResult(
+            asset_key=AssetKey(node),
+            metadata={
+                **finished.get(node, {"dbt_execution_seconds": 0.0}),
+                **pruning.get(node, {}),
+                **step_metadata,
+            },
+        )
+
+
+class DbtTransformationConfig(Config):
+    """Run config for the month-partitioned dbt trip models."""
+    
+    # Rebuild the incremental trip models from all history instead of only
+    # the months in the selected partition range
+    full_refresh: bool = False
+    # Write fct_taxi_trips / mart_taxi_trips sorted by pickup date and location
+    # (the cluster_trip_models dbt var). Existing months keep their old order
+    # until they are rebuilt, so combine a change with full_refresh.
+    cluster: bool = True
+    # Re-sort the clustered relations after the run even if their order has
+    # not degraded past CLUSTER_MAX_OUT_OF_ORDER_RATIO
+    recluster: bool = False
+
+
+# dbt relations profiled per pickup month after each run
+PROFILED_DBT_RELATIONS = {
+    "fct_taxi_trips": "main.fct_taxi_trips",
+    "mart_taxi_trips": "main_mart.mart_taxi_trips",
+}
+
+
+def profile_dbt_partitions(
+    context: AssetExecutionContext,
+    duckdb_manager: DuckDBConnectionManager,
+    nodes: list,
+    full_refresh: bool = False,
+) -> None:
+    """
+    Refresh the stored profiles of the rebuilt dbt relations for the partitions in this run.
+    
+    A full refresh rebuilds every month, so every month is re-profiled and
+    profiles of months that no longer have rows are cleared; otherwise
+    only the run's partition range is.
+    
+    The caller must already hold the dev writer lease, so the connection is
+    opened with duckdb_manager.connect rather than writer().
+    """
+    time_window = context.partition_time_window
+    where, params = ("TRUE", []) if full_refresh else (
+        "pickup_date >= ? AND pickup_date < ?",
+        [time_window.start.date(), time_window.end.date()],
+    )
+    conn = duckdb_manager.connect("dev", read_only=False)
+    try:
+        ensure_profile_table(conn, DEV_PROFILE_TABLE)
+        for table_name, relation in PROFILED_DBT_RELATIONS.items():
+            if table_name not in nodes:
+                continue
+            profiles = profile_relation(
+                conn,
+                relation,
+                partition_expr="DATE_TRUNC('month', pickup_date)::DATE",
+                where=where,
+                params=params,
+            )
+            partition_keys = list(context.partition_keys)
+            if full_refresh:
+                stored_keys = [
+                    row[0] for row in conn.execute(
+                        f"SELECT DISTINCT partition_key FROM {DEV_PROFILE_TABLE} WHERE table_name = ?",
+                        [table_name],
+                    ).fetchall()
+                ]
+                partition_keys = sorted(
+                    set(partition_keys) | set(stored_keys) | {p["partition_key"] for p in profiles}
+                )
+            conn.begin()
+            try:
+                replace_profiles(conn, DEV_PROFILE_TABLE, table_name, partition_keys, profiles)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            context.log.info(f"📈 Profiled {table_name} for {len(partition_keys)} partition(s)")
+    finally:
+        conn.close()
+
+
+# Pickup location column of each profiled relation, for the zone filter of the pruning report
+CLUSTERED_LOCATION_COLUMNS = {
+    "fct_taxi_trips": "PULocationID",
+    "mart_taxi_trips": "pickup_location_id",
+}
+
+# Zone used by the pruning report's zone filter (JFK Airport)
+PRUNING_REPORT_LOCATION_ID = 132
+
+# Sort order of each clustered relation; must match the cluster_order_by call in its dbt model
+CLUSTER_ORDER = {
+    "fct_taxi_trips": ["pickup_date", "pickup_borough", "PULocationID"],
+    "mart_taxi_trips": ["pickup_date", "pickup_location_id"],
+}
+
+# Share of out-of-order row groups (see clustering_disorder) above which a
+# clustered relation is re-sorted after an incremental run
+CLUSTER_MAX_OUT_OF_ORDER_RATIO = float(os.getenv("CLUSTER_MAX_OUT_OF_ORDER_RATIO", "0.25"))
+
+
+def recluster_degraded_relations(
+    context: AssetExecutionContext,
+    duckdb_manager: DuckDBConnectionManager,
+    nodes: list,
+    force: bool = False,
+) -> dict:
+    """
+    Re-sort the clustered trip relations whose row groups have drifted out of order.
+    
+    Each delete+insert run appends re-inserted months behind the existing
+    rows and leaves deleted rows in the old row groups' statistics, so
+    zonemap pruning degrades run by run. Once the share of out-of-order row
+    groups exceeds CLUSTER_MAX_OUT_OF_ORDER_RATIO (or with force), the
+    relation is rewritten with CREATE TABLE AS ... ORDER BY and swapped in
+    within one transaction. Called under the dev writer lease, like
+    profile_dbt_partitions.
+    
+    Returns:
+        {node name: zonemap_out_of_order_* and zonemap_reclustered metadata}
+    """
+    report = {}
+    conn = duckdb_manager.connect("dev", read_only=False)
+    try:
+        for table_name, relation in PROFILED_DBT_RELATIONS.items():
+            if table_name not in nodes:
+                continue
+            disorder = clustering_disorder(conn, relation, "pickup_date")
+            reclustered = force or disorder["out_of_order_ratio"] > CLUSTER_MAX_OUT_OF_ORDER_RATIO
+            if reclustered:
+                context.log.info(
+                    f"🔀 Re-sorting {table_name}: {disorder['out_of_order_row_groups']} of "
+                    f"{disorder['row_groups']} row groups out of order"
+                )
+                schema, name = relation.split(".")
+                conn.begin()
+                try:
+                    conn.execute(f"""
+                        CREATE TABLE {schema}.{name}__reclustered AS
+                        SELECT * FROM {relation} ORDER BY {', '.join(CLUSTER_ORDER[table_name])}
+                    """)
+                    conn.execute(f"DROP TABLE {relation}")
+                    conn.execute(f"ALTER TABLE {schema}.{name}__reclustered RENAME TO {name}")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            report[table_name] = {
+                "zonemap_out_of_order_row_groups": disorder["out_of_order_row_groups"],
+                "zonemap_out_of_order_ratio": disorder["out_of_order_ratio"],
+                "zonemap_reclustered": reclustered,
+            }
+    finally:
+        conn.close()
+    return report
+
+
+def report_zonemap_pruning(
+    context: AssetExecutionContext,
+    duckdb_manager: DuckDBConnectionManager,
+    nodes: list,
+) -> dict:
+    """
+    Measure how well the rebuilt trip relations prune row groups for typical dashboard filters.
+    
+    The filters cover one day, one week, and one pickup zone over a month,
+    ending on the last day of the run's partition range. The ratios show
+    whether the clustering (cluster_order_by dbt macro) is holding up.
+    Called under the dev writer lease, like profile_dbt_partitions.
+    
+    Returns:
+        {node name: zonemap_* metadata}
+    """
+    last_day = (context.partition_time_window.end - timedelta(days=1)).date()
+    month_start = last_day.replace(day=1)
+    report = {}
+    conn = duckdb_manager.connect("dev", read_only=False)
+    try:
+        for table_name, relation in PROFILED_DBT_RELATIONS.items():
+            if table_name not in nodes:
+                continue
+            location_column = CLUSTERED_LOCATION_COLUMNS[table_name]
+            filters = {
+                "day": {"pickup_date": (last_day, last_day)},
+                "week": {"pickup_date": (last_day - timedelta(days=6), last_day)},
+                "zone_month": {
+                    "pickup_date": (month_start, last_day),
+                    location_column: (PRUNING_REPORT_LOCATION_ID, PRUNING_REPORT_LOCATION_ID),
+                },
+            }
+            metadata = {}
+            for filter_name, ranges in filters.items():
+                pruning = zonemap_pruning(conn, relation, ranges)
+                metadata["zonemap_row_groups"] = pruning["row_groups"]
+                metadata[f"zonemap_{filter_name}_row_groups_scanned"] = pruning["row_groups_scanned"]
+                metadata[f"zonemap_{filter_name}_pruned_ratio"] = pruning["pruned_ratio"]
+            report[table_name] = metadata
+            context.log.info(
+                f"🧭 {table_name}: {metadata['zonemap_row_groups']} row groups; scans "
+                + ", ".join(
+                    f"{metadata[f'zonemap_{name}_row_groups_scanned']} for one {name.replace('_', '-')}"
+                    for name in filters
+                )
+            )
+    finally:
+        conn.close()
+    return report
+
+
+@dbt_assets(
+    manifest=DBT_MANIFEST_PATH,
+    select=DBT_TRIP_MODELS_SELECT,
+    name="dbt_trip_models",
+    dagster_dbt_translator=dbt_translator,
+    partitions_def=monthly_partitions,
+    backfill_policy=BackfillPolicy.single_run(),
+    pool="duckdb_dev_writer",
+)
+def dbt_trip_models(
+    context: AssetExecutionContext,
+    config: DbtTransformationConfig,
+    duckdb_manager: DuckDBConnectionManager,
+):
+    """
+    Month-partitioned dbt trip models (stg_taxi_trips and everything downstream).
+    
+    Backfills run dbt once over the whole selected partition range rather than
+    once per month. The range is passed to dbt as the partition_start /
+    partition_end vars (month start dates, end exclusive), and the
+    incremental models delete and re-insert only those pickup months. Set
+    full_refresh in the run config to rebuild them from all history.
+    fct_taxi_trips and mart_taxi_trips are written sorted by pickup date and
+    location so date and zone filters skip row groups (config.cluster), and
+    re-sorted when incremental runs have scrambled that order; the resulting
+    pruning ratios are reported on their materializations.
+    """
+    time_window = context.partition_time_window
+    dbt_vars = json.dumps({
+        "partition_start": time_window.start.strftime("%Y-%m-%d"),
+        "partition_end": time_window.end.strftime("%Y-%m-%d"),
+        "cluster_trip_models": config.cluster,
+    })
+    context.log.info(f"dbt partition range: {dbt_vars}")
+    
+    run_args = ["--vars", dbt_vars]
+    if config.full_refresh:
+        context.log.info("Full refresh requested - rebuilding incremental models from all history")
+        run_args.append("--full-refresh")
+    
+    yield from materialize_dbt_nodes(
+        context,
+        duckdb_manager,
+        selected_dbt_nodes(context),
+        run_args,
+        cluster=config.cluster,
+        force_recluster=config.recluster,
+    )
+
+
+@dbt_assets(
+    manifest=DBT_MANIFEST_PATH,
+    exclude=DBT_TRIP_MODELS_SELECT,
+    name="dbt_reference_models",
+    dagster_dbt_translator=dbt_translator,
+    pool="duckdb_dev_writer",
+)
+def dbt_reference_models(context: AssetExecutionContext, duckdb_manager: DuckDBConnectionManager):
+    """
+    Unpartitioned dbt reference data: seeds (vendors, rate codes, payment types),
+    stg_taxi_zones and the zone spatial models (dim_taxi_zones_geospatial,
+    dim_taxi_zone_shapes, dim_taxi_zone_pairs).
+    
+    These rebuild only when their own inputs change, so a trip partition
+    never re-reads the shapefile and a zone change never re-runs the seeds.
+    """
+    yield from materialize_dbt_nodes(context, duckdb_manager, selected_dbt_nodes(context))
+
+
+# Concurrent read-only connections used to execute dbt tests
+DBT_TEST_THREADS = int(os.getenv("DBT_TEST_THREADS", "4"))
+
+
+def dbt_test_check_specs() -> list:
+    """
+    Build one asset check per dbt data test, attached to the model or seed it tests.
+    
+    Tests spanning two models (relationships) attach to the model the test is
+    declared on. Source tests are skipped.
+    """
+    manifest = json.loads(DBT_MANIFEST_PATH.read_text())
+    specs = []
+    for props in sorted(manifest["nodes"].values(), key=lambda props: props["name"]):
+        if props["resource_type"] != "test":
+            continue
+        parent_id = props.get("attached_node") or next(
+            (node for node in props["depends_on"]["nodes"] if node.split(".")[0] in ("model", "seed")),
+            None,
+        )
+        if parent_id is None or parent_id not in manifest["nodes"]:
+            continue
+        specs.append(AssetCheckSpec(
+            name=props["name"],
+            asset=dbt_translator.get_asset_key(manifest["nodes"][parent_id]),
+            description=props.get("description") or f"dbt test {props['name']}",
+            metadata={
+                "dbt_unique_id": props["unique_id"],
+                "dbt_severity": props["config"].get("severity", "error").lower(),
+            },
+        ))
+    return specs
+
+
+DBT_TEST_CHECK_SPECS = dbt_test_check_specs()
+
+
+def run_dbt_tests(conn, tests: list) -> dict:
+    """
+    Execute compiled dbt tests on DBT_TEST_THREADS cursors of one read-only connection.
+    
+    Args:
+        conn: Read-only DuckDB connection or cursor
+        tests: List of (key, compiled SQL)
+    
+    Returns:
+        {key: (failing row count or None, seconds, error message or None)}
+    """
+    def run_group(group):
+        results = {}
+        cursor = conn.cursor()
+        try:
+            for key, sql in group:
+                start = time.perf_counter()
+                try:
+                    failures = cursor.execute(f"SELECT COUNT(*) FROM ({sql}) AS dbt_test").fetchone()[0]
+                    results[key] = (failures, time.perf_counter() - start, None)
+                except duckdb.Error as e:
+                    results[key] = (None, time.perf_counter() - start, str(e))
+        finally:
+            cursor.close()
+        return results
+    
+    # Each worker gets its own cursor; DuckDB cursors are not shared across threads
+    groups = [tests[i::DBT_TEST_THREADS] for i in range(DBT_TEST_THREADS)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=DBT_TEST_THREADS) as executor:
+        for group_results in executor.map(run_group, [group for group in groups if group]):
+            results.update(group_results)
+    return results
+
+
+@multi_asset_check(
+    specs=DBT_TEST_CHECK_SPECS,
+    name="dbt_test_checks",
+    can_subset=True,
+)
+def dbt_test_checks(context: AssetCheckExecutionContext, duckdb_manager: DuckDBConnectionManager):
+    """
+    Execute dbt data tests as non-blocking asset checks.
+    
+    The SQL compiled during the dbt step is run directly on DBT_TEST_THREADS
+    read-only cursors under a shared reader lease, so tests run concurrently
+    with each other and with downstream readers, and results are reported per
+    model. Tests whose SQL has not been compiled yet (or was compiled from an
+    older version of the project) are compiled first under the dev writer
+    lease and a raw reader lease, since the dbt profile attaches raw.duckdb.
+    """
+    specs = [
+        spec for spec in DBT_TEST_CHECK_SPECS
+        if spec.key in context.selected_asset_check_keys
+    ]
+    
+    compiled = load_compiled_tests(DBT_PROJECT_DIR)
+    missing = [spec.name for spec in specs if spec.metadata["dbt_unique_id"] not in compiled]
+    if missing:
+        context.log.info(f"Compiling {len(missing)} dbt tests...")
+        with duckdb_manager.lease("dev", exclusive=True), duckdb_manager.lease("raw", exclusive=False):
+            compiled.update(compile_tests(missing, DBT_PROJECT_DIR, DBT_PROFILES_DIR, "dev"))
+    
+    with duckdb_manager.reader("dev") as conn:
+        results = run_dbt_tests(conn, [
+            (spec.key, compiled[spec.metadata["dbt_unique_id"]])
+            for spec in specs
+            if spec.metadata["dbt_unique_id"] in compiled
+        ])
+    
+    for spec in specs:
+        severity = AssetCheckSeverity.WARN if spec.metadata["dbt_severity"] == "warn" else AssetCheckSeverity.ERROR
+        failures, seconds, error = results.get(spec.key, (None, 0.0, "test SQL could not be compiled"))
+        if error is not None:
+            context.log.warning(f"dbt test {spec.name} errored: {error}")
+            yield AssetCheckResult(
+                asset_key=spec.asset_key,
+                check_name=spec.name,
+                passed=False,
+                severity=severity,
+                metadata={"error": error},
+            )
+        else:
+            yield AssetCheckResult(
+                asset_key=spec.asset_key,
+                check_name=spec.name,
+                passed=failures == 0,
+                severity=severity,
+                metadata={"failing_rows": failures, "execution_seconds": round(seconds, 3)},
+            )
+
 
 @asset(
     group_name="analytics_validation", 
-    deps=[dbt_transformation_asset] # Now depends on the new dbt transformation asset
+    deps=[AssetKey("fct_taxi_trips"), AssetKey("mart_taxi_trips")],
 )
-def analytics_data_validation(context: AssetExecutionContext) -> None:
+def analytics_data_validation(context: AssetExecutionContext, duckdb_manager: DuckDBConnectionManager) -> None:
     """
     Validate the transformed analytics data and log key metrics.
-    """
     
-    dev_db_path = os.getenv("DUCKDB_DEV_PATH", "/app/02_duck_db/02_dev/dev.duckdb")
-    conn = connect_with_retry(dev_db_path, read_only=True)
+    Metrics are merged from the per-month profiles stored after each dbt run
+    instead of rescanning the fact and mart tables.
+    """
+    instrumentation = StepInstrumentation()
     
     try:
+        with duckdb_manager.reader("dev") as conn:
+            fact_profile = summarize_profiles(conn, DEV_PROFILE_TABLE, "fct_taxi_trips")
+            mart_profile = summarize_profiles(conn, DEV_PROFILE_TABLE, "mart_taxi_trips")
+        
         # Check if mart tables exist and have data
-        fact_count = conn.execute("SELECT COUNT(*) FROM main.fct_taxi_trips").fetchone()[0]
-        mart_count = conn.execute("SELECT COUNT(*) FROM main_mart.mart_taxi_trips").fetchone()[0]
+        fact_count = fact_profile["pickup_date"]["row_count"] if fact_profile else 0
+        mart_count = mart_profile["pickup_date"]["row_count"] if mart_profile else 0
         
         context.log.info(f"📊 Analytics Data Quality Report:")
         context.log.info(f"   - Fact Taxi Trips: {fact_count:,} records")
         context.log.info(f"   - Mart Taxi Trips: {mart_count:,} records")
         
         if fact_count > 0:
-            # Get data quality metrics
-            quality_stats = conn.execute("""
-                SELECT 
-                    SUM(total_amount_mismatch_flag) as total_mismatches,
-                    SUM(negative_duration_flag) as negative_durations,
-                    COUNT(DISTINCT pickup_borough) as pickup_boroughs,
-                    COUNT(DISTINCT dropoff_borough) as dropoff_boroughs
-                FROM main.fct_taxi_trips
-            """).fetchone()
-            
-            context.log.info(f"   - Total amount mismatches: {quality_stats[0]:,}")
-            context.log.info(f"   - Negative duration trips: {quality_stats[1]:,}")
-            context.log.info(f"   - Pickup boroughs: {quality_stats[2]}")
-            context.log.info(f"   - Dropoff boroughs: {quality_stats[3]}")
+            # Get data quality metrics (borough counts are approximate lower bounds)
+            context.log.info(f"   - Total amount mismatches: {fact_profile['total_amount_mismatch_flag']['sum_value']:,.0f}")
+            context.log.info(f"   - Negative duration trips: {fact_profile['negative_duration_flag']['sum_value']:,.0f}")
+            context.log.info(f"   - Pickup boroughs: {fact_profile['pickup_borough']['approx_distinct']}")
+            context.log.info(f"   - Dropoff boroughs: {fact_profile['dropoff_borough']['approx_distinct']}")
             
+        context.add_output_metadata({
+            "fct_taxi_trips_rows": fact_count,
+            "mart_taxi_trips_rows": mart_count,
+            **instrumentation.metadata(),
+            **duckdb_manager.metadata(),
+        })
         context.log.info("✅ Analytics data validation completed")
         
     except Exception as e:
         context.log.error(f"Analytics validation failed: {e}")
         raise
-    finally:
-        conn.close()
+
+
+# Parquet snapshots of the marts for BI readers (see parquet_export.py)
+PARQUET_EXPORT_PATH = os.getenv("PARQUET_EXPORT_PATH", "/app/02_duck_db/04_export")
+
+
+class ParquetExportConfig(Config):
+    """Run config for the Parquet export of the analytics marts."""
+    
+    # Rewrite every month in the partition range, even if unchanged
+    force: bool = False
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+
+
+@asset(
+    group_name="analytics_export",
+    deps=[AssetKey("fct_taxi_trips"), AssetKey("mart_taxi_trips")],
+    partitions_def=monthly_partitions,
+    backfill_policy=BackfillPolicy.single_run(),
+    automation_condition=UPSTREAM_UPDATED,
+)
+def export_analytics_parquet(
+    context: AssetExecutionContext,
+    config: ParquetExportConfig,
+    duckdb_manager: DuckDBConnectionManager,
+) -> None:
+    """
+    Export fct_taxi_trips and mart_taxi_trips to hive-partitioned Parquet.
+    
+    Each pickup month is written to <table>/year=YYYY/month=M/data.parquet
+    under PARQUET_EXPORT_PATH (zstd, config.row_group_size rows per row
+    group). Only months whose rows changed since the last export (by a
+    content hash of the month) are rewritten, and each file is swapped in atomically, so Cube and
+    Superset can read the snapshots with partition pruning while dbt holds
+    the dev write lock.
+    
+    Reads from:
+    - dev.duckdb.main.fct_taxi_trips, dev.duckdb.main_mart.mart_taxi_trips
+    
+    Writes to:
+    - PARQUET_EXPORT_PATH/<table>/year=YYYY/month=M/data.parquet
+    - PARQUET_EXPORT_PATH/_export_manifest.json
+    """
+    export_dir = PARQUET_EXPORT_PATH
+    Path(export_dir).mkdir(parents=True, exist_ok=True)
+    metadata = {}
+    instrumentation = StepInstrumentation()
+    
+    try:
+        # Concurrent exports of different months serialize on the manifest
+        with duckdb_manager.lease(str(Path(export_dir) / "_export_manifest.json"), exclusive=True):
+            manifest = read_export_manifest(export_dir)
+            with duckdb_manager.reader("dev") as conn:
+                for table_name, relation in PROFILED_DBT_RELATIONS.items():
+                    outcome = export_changed_partitions(
+                        conn,
+                        export_dir,
+                        table_name,
+                        relation,
+                        context.partition_keys,
+                        row_group_size=config.row_group_size,
+                        force=config.force,
+                        manifest=manifest,
+                        instrumentation=instrumentation,
+                    )
+                    for partition_key, row_count in outcome["exported"].items():
+                        context.log.info(f"📦 Exported {table_name} {partition_key}: {row_count:,} rows")
+                    for partition_key in outcome["removed"]:
+                        context.log.info(f"🗑️  Removed {table_name} {partition_key} export (no rows)")
+                    if outcome["unchanged"]:
+                        context.log.info(f"⏭️  {table_name}: {len(outcome['unchanged'])} month(s) unchanged")
+                    metadata[f"{table_name}_months_exported"] = len(outcome["exported"])
+                    metadata[f"{table_name}_rows_exported"] = sum(outcome["exported"].values())
+            write_export_manifest(export_dir, manifest)
+        
+        context.add_output_metadata({
+            "export_path": export_dir,
+            **metadata,
+            **instrumentation.metadata(),
+            **duckdb_manager.metadata(),
+        })
+        context.log.info(f"✅ Parquet export up to date at {export_dir}")
+        
+    except Exception as e:
+        context.log.error(f"Parquet export failed: {e}")
+        raise
+
+@asset(
+    group_name="prod_publish",
+    deps=[analytics_data_validation],
+)
+def publish_prod(context: AssetExecutionContext, duckdb_manager: DuckDBConnectionManager) -> None:
+    """
+    Publish the validated dev database to prod.duckdb (blue/green).
+    
+    Runs only after analytics_data_validation succeeds. A complete copy of
+    dev's tables, views and indexes (without the nyc_taxi_data raw copies),
+    plus raw.duckdb's nyc_taxi_data schema for the raw_* Cube cubes, is built
+    in prod.duckdb.next under dev and raw reader leases, then renamed over
+    prod.duckdb; the replaced
+    generation is kept as prod.duckdb.previous for the prod_rollback job.
+    Readers of prod never take a write lock and never see a partial publish.
+    
+    Reads from:
+    - dev.duckdb (all schemas except nyc_taxi_data)
+    - raw.duckdb (nyc_taxi_data)
+    
+    Writes to:
+    - prod.duckdb (swapped in atomically), prod.duckdb.previous
+    - prod.duckdb.main._publication
+    """
+    prod_path = duckdb_manager.path("prod")
+    snapshot = snapshot_path(prod_path)
+    Path(prod_path).parent.mkdir(parents=True, exist_ok=True)
+    instrumentation = StepInstrumentation()
+    
+    try:
+        # The prod writer lease serializes publishes and rollbacks
+        with duckdb_manager.lease("prod", exclusive=True):
+            with duckdb_manager.lease("dev", exclusive=False), duckdb_manager.lease("raw", exclusive=False):
+                context.log.info(f"Building prod snapshot in {snapshot}...")
+                published = build_snapshot(
+                    duckdb_manager.path("dev"), snapshot,
+                    instrumentation=instrumentation, raw_path=duckdb_manager.path("raw"),
+                )
+            with instrumentation.timed("swap_in"):
+                kept_previous = swap_in(snapshot, prod_path)
+        
+        tables = published["tables"]
+        row_count = sum(tables.values())
+        context.log.info(
+            f"✅ Published {len(tables)} tables ({row_count:,} rows), {len(published['views'])} views "
+            f"and {len(published['indexes'])} indexes to {prod_path}"
+        )
+        if kept_previous:
+            context.log.info("↩️  Previous generation kept for rollback")
+        context.add_output_metadata({
+            "published_tables": len(tables),
+            "published_views": len(published["views"]),
+            "published_indexes": len(published["indexes"]),
+            "published_rows": row_count,
+            "prod_size_bytes": Path(prod_path).stat().st_size,
+            "previous_generation_kept": kept_previous,
+            **instrumentation.metadata(),
+            **duckdb_manager.metadata(),
+        })
+        
+    except Exception as e:
+        snapshot.unlink(missing_ok=True)
+        context.log.error(f"Prod publish failed: {e}")
+        raise
+
+
+# Charts replayed at once when warming the Superset cache
+SUPERSET_WARMUP_CONCURRENCY = int(os.getenv("SUPERSET_WARMUP_CONCURRENCY", "4"))
+
+
+@asset(
+    group_name="bi_cache",
+    deps=[analytics_data_validation, publish_prod],
+)
+def warm_superset_cache(context: AssetExecutionContext, superset: SupersetClient) -> None:
+    """
+    Warm Superset's data cache after a pipeline run.
+    
+    Every chart on every dashboard is replayed through the Superset API,
+    SUPERSET_WARMUP_CONCURRENCY at a time, so results are cached in Redis
+    before anyone opens a dashboard. Results cached before the run are
+    recomputed, not reused. Timings are attached as metadata; charts that
+    fail are logged but do not fail the asset.
+    """
+    try:
+        stats = warm_up_dashboards(superset, SUPERSET_WARMUP_CONCURRENCY, log=context.log)
+    except Exception as e:
+        context.log.error(f"Superset cache warm-up failed: {e}")
+        raise
+    
+    context.log.info(
+        f"🔥 Warmed {stats['charts_warmed']}/{stats['charts']} charts on {stats['dashboards']} dashboards "
+        f"in {stats['total_seconds']:.1f}s"
+    )
+    if stats["errors"]:
+        context.log.warning(f"{stats['errors']} chart(s) could not be warmed")
+    context.add_output_metadata(stats)
+
+
+@op
+def rollback_prod(context, duckdb_manager: DuckDBConnectionManager) -> None:
+    """Swap prod.duckdb.previous back in as prod.duckdb (see prod_publish.py)."""
+    prod_path = duckdb_manager.path("prod")
+    with duckdb_manager.lease("prod", exclusive=True):
+        rollback(prod_path)
+    context.log.info(f"↩️  Rolled {prod_path} back to the previous generation")
+
+
+@job
+def prod_rollback():
+    """Roll prod.duckdb back to the generation before the last publish."""
+    rollback_prod()
+
 
 from dagster import Definitions
 
-# Define a job to orchestrate the full data pipeline
+# Define a job to orchestrate the trip pipeline (runs one pickup-month partition);
+# it selects only the monthly-partitioned assets
 nyc_taxi_pipeline_job = define_asset_job(
     "nyc_taxi_pipeline",
-    selection=AssetSelection.all(), # Selects all assets defined in this file
+    selection=AssetSelection.assets(ingest_raw_data, raw_data_validation, dbt_trip_models, export_analytics_parquet),
+    partitions_def=monthly_partitions,
+)
+
+# Unpartitioned follow-up: rebuild the reference models, validate the marts,
+# publish them to prod and warm Superset. Storage tiering and the reference
+# models also run under dbt_automation_sensor.
+nyc_taxi_publish_job = define_asset_job(
+    "nyc_taxi_publish",
+    selection=AssetSelection.assets(dbt_reference_models, analytics_data_validation, publish_prod, warm_superset_cache),
+)
+
+# Requests dbt rebuilds of the updated months (any month, see UPSTREAM_UPDATED)
+# when upstream data or a model's code changes, re-exports the Parquet
+# snapshots after them, and tiers raw storage after each validated ingestion
+dbt_automation_sensor = AutomationConditionSensorDefinition(
+    "dbt_automation_sensor",
+    target=AssetSelection.groups("dbt_transformations", "analytics_export")
+    | AssetSelection.assets(raw_trip_storage_tiers),
+    default_status=DefaultSensorStatus.RUNNING,
+)
+
+# Ingestion jobs launched by source_files_sensor; dbt models and exports
+# follow the new partitions through dbt_automation_sensor
+ingest_trip_files_job = define_asset_job(
+    "ingest_trip_files",
+    selection=AssetSelection.assets(ingest_raw_data, raw_data_validation),
+    partitions_def=monthly_partitions,
 )
+ingest_zone_lookup_job = define_asset_job(
+    "ingest_zone_lookup",
+    selection=AssetSelection.assets(ingest_taxi_zones),
+)
+
+# Seconds a landed source file must go unmodified before it is ingested
+SOURCE_SETTLE_SECONDS = int(os.getenv("SOURCE_SETTLE_SECONDS", "60"))
+
+# Seconds the sensor queues for a raw reader lease before scanning unnamed files instead
+SENSOR_LEASE_TIMEOUT = 5.0
+
+# Every complete Parquet file ends with its footer and this magic number
+PARQUET_MAGIC = b"PAR1"
+
+
+def source_file_is_settled(path: Path, mtime: float, now: float) -> bool:
+    """
+    Return True once a source file looks completely written.
+    
+    The file must not have been modified for SOURCE_SETTLE_SECONDS, and a
+    Parquet file must end with its footer magic (copies in progress do not).
+    """
+    if now - mtime < SOURCE_SETTLE_SECONDS:
+        return False
+    if path.suffix == ".parquet":
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < len(PARQUET_MAGIC):
+                return False
+            f.seek(-len(PARQUET_MAGIC), os.SEEK_END)
+            return f.read() == PARQUET_MAGIC
+    return True
+
+
+def sensor_file_months(duckdb_manager: DuckDBConnectionManager) -> dict:
+    """
+    Read the ingestion manifest's file months for the sensor (see read_file_months).
+    
+    Returns an empty dict, so months are scanned from the files, when
+    raw.duckdb has no manifest yet or a writer holds it longer than
+    SENSOR_LEASE_TIMEOUT.
+    """
+    if not Path(duckdb_manager.path("raw")).exists():
+        return {}
+    try:
+        with duckdb_manager.reader("raw", timeout=SENSOR_LEASE_TIMEOUT) as conn:
+            return read_file_months(conn)
+    except (TimeoutError, duckdb.Error):
+        return {}
+
+
+@sensor(
+    name="source_files_sensor",
+    jobs=[ingest_trip_files_job, ingest_zone_lookup_job],
+    minimum_interval_seconds=60,
+    default_status=DefaultSensorStatus.RUNNING,
+)
+def source_files_sensor(context: SensorEvaluationContext, duckdb_manager: DuckDBConnectionManager):
+    """
+    Launch ingestion for source files that landed, changed or disappeared.
+    
+    Watches yellow_cab_data_monthly/*.parquet and the taxi zone lookup.
+    Files still being written are skipped until they settle (see
+    source_file_is_settled). Each affected pickup month gets one
+    ingest_trip_files run for that partition only, and a changed zone
+    lookup gets an ingest_zone_lookup run. The cursor stores the size,
+    mtime and month of every file already requested; the first tick
+    requests every month on disk, which ingestion skips cheaply when its
+    manifest is already current. New files without a month in their name
+    take it from the ingestion manifest when they were ingested unchanged.
+    """
+    seen = json.loads(context.cursor) if context.cursor else {}
+    now = time.time()
+    candidates = sorted(TRIPS_SOURCE_PATH.glob("*.parquet")) + [ZONES_SOURCE_FILE]
+    
+    cursor, changed_months, settling, zones_signature = {}, {}, 0, None
+    file_months = None
+    for path in candidates:
+        try:
+            stat = path.stat()
+            settled = source_file_is_settled(path, stat.st_mtime, now)
+        except FileNotFoundError:
+            continue
+        key = str(path)
+        if not settled:
+            # Keep the last requested version until the new one settles
+            settling += 1
+            if key in seen:
+                cursor[key] = seen[key]
+            continue
+        
+        previous = seen.get(key)
+        if previous is not None and previous[:2] == [stat.st_size, stat.st_mtime]:
+            cursor[key] = previous
+            continue
+        if path == ZONES_SOURCE_FILE:
+            cursor[key] = [stat.st_size, stat.st_mtime, None]
+            zones_signature = f"{stat.st_size}:{stat.st_mtime}"
+        else:
+            if previous is None and file_months is None and not TRIP_FILE_MONTH_PATTERN.search(path.name):
+                file_months = sensor_file_months(duckdb_manager)
+            month = previous[2] if previous else trip_file_partition_month(path, file_months)
+            cursor[key] = [stat.st_size, stat.st_mtime, month]
+            changed_months.setdefault(month, []).append(cursor[key])
+    
+    # Removed trip files: their months are re-ingested so their rows are dropped
+    for key, (size, mtime, month) in seen.items():
+        if key not in cursor and month is not None and not Path(key).exists():
+            changed_months.setdefault(month, []).append(["removed", key])
+    
+    valid_months = set(monthly_partitions.get_partition_keys())
+    run_requests = []
+    for month in sorted(changed_months):
+        if month not in valid_months:
+            context.log.warning(f"Skipping trip file(s) for {month}: outside the monthly partitions")
+            continue
+        digest = hashlib.sha256(json.dumps(changed_months[month]).encode()).hexdigest()[:16]
+        run_requests.append(RunRequest(
+            job_name=ingest_trip_files_job.name,
+            partition_key=month,
+            run_key=f"trips:{month}:{digest}",
+        ))
+    if zones_signature is not None:
+        run_requests.append(RunRequest(
+            job_name=ingest_zone_lookup_job.name,
+            run_key=f"zones:{zones_signature}",
+        ))
+    
+    if settling:
+        context.log.info(f"⏳ {settling} source file(s) still settling")
+    if not run_requests:
+        return SensorResult(skip_reason="No new or changed source files", cursor=json.dumps(cursor))
+    context.log.info(f"📥 Requesting ingestion for {len(run_requests)} run(s): {', '.join(r.run_key for r in run_requests)}")
+    return SensorResult(run_requests=run_requests, cursor=json.dumps(cursor))
 
 # Define all assets and resources for Dagster
 defs = Definitions(
     assets=[
-        ingest_raw_data,  # Consolidated raw data ingestion asset
+        ingest_raw_data,  # Month-partitioned trip ingestion asset
+        ingest_taxi_zones,
         raw_data_validation,
-        dbt_transformation_asset, # Use subprocess-based dbt transformation
-        analytics_data_validation
+        raw_trip_storage_tiers,  # Seals old raw months into Parquet (see storage_tiers.py)
+        dbt_trip_models,  # One asset per dbt model/seed, run in-process (see dbt_runner.py)
+        dbt_reference_models,
+        analytics_data_validation,
+        export_analytics_parquet,  # Lock-free Parquet snapshots for Cube/Superset
+        publish_prod,  # Blue/green copy of dev for BI readers
+        warm_superset_cache,
     ],
-    jobs=[nyc_taxi_pipeline_job]
+    asset_checks=[dbt_test_checks],
+    jobs=[nyc_taxi_pipeline_job, nyc_taxi_publish_job, ingest_trip_files_job, ingest_zone_lookup_job, prod_rollback],
+    sensors=[dbt_automation_sensor, source_files_sensor],
+    resources={
+        # Leased, pooled access to the DuckDB files (see duckdb_resource.py)
+        "duckdb_manager": DuckDBConnectionManager(
+            raw_path=os.getenv("DUCKDB_RAW_PATH", "/app/02_duck_db/01_raw/raw.duckdb"),
+            dev_path=os.getenv("DUCKDB_DEV_PATH", "/app/02_duck_db/02_dev/dev.duckdb"),
+            prod_path=os.getenv("DUCKDB_PROD_PATH", "/app/02_duck_db/03_prod/prod.duckdb"),
+        ),
+        "superset": SupersetClient(
+            base_url=os.getenv("SUPERSET_URL", "http://superset:8088"),
+            username=os.getenv("SUPERSET_USERNAME", "admin"),
+            password=os.getenv("SUPERSET_PASSWORD", "admin"),
+        ),
+    },
 )
@@ -0,0 +1,282 @@
+"""
+DuckDB connection manager resource for the proto_loc platform.
+
+DuckDB admits either one read-write process or any number of read-only
+processes per database file. Instead of racing for the file lock and
+retrying, every Dagster step goes through this resource:
+
+- Writers are serialized per file by an exclusive lease (a flock on a
+  `<db>.lease` sidecar file), so they queue instead of failing.
+- Readers take a shared lease and borrow cursors from one pooled read-only
+  connection per file and process; the connection is closed when the last
+  reader in the process leaves, so it never blocks a queued writer.
+- Lease wait time, hold time and contention counts are recorded per file
+  and mode and can be attached to materializations as metadata.
+
+Lock ordering: a step that needs several databases acquires prod before
+dev before raw, and never waits for an earlier one while holding a later one. A step must not re-acquire a
+lease it already holds (a second flock on a new descriptor blocks); inside
+a held lease, open connections with `connect`.
+
+Processes outside Dagster (Cube, Superset) do not take leases; connects
+still retry briefly on lock errors to ride out their reads.
+
+Extensions (spatial) are vendored once into DUCKDB_EXTENSION_DIRECTORY by
+z_other/scripts/scripts/init_duckdb.py. Every connection reads extensions
+from there with automatic installs disabled, so a run never downloads one;
+verify_extensions() fails every step that uses this resource when one is
+missing, before it touches a database.
+"""
+
+import os
+import time
+import fcntl
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+import duckdb
+from dagster import ConfigurableResource, InitResourceContext, get_dagster_logger
+
+# Lease waits longer than this are logged
+SLOW_LEASE_WAIT_SECONDS = 1.0
+
+# Shared, pre-populated extension directory ("" keeps DuckDB's default ~/.duckdb/extensions)
+EXTENSION_DIRECTORY = os.getenv("DUCKDB_EXTENSION_DIRECTORY", "")
+
+# Extensions the dbt models LOAD, checked at startup
+REQUIRED_EXTENSIONS = [
+    name.strip() for name in os.getenv("DUCKDB_REQUIRED_EXTENSIONS", "spatial").split(",") if name.strip()
+]
+
+# (db_path, mode) -> counters; shared by every resource instance in the process
+_lease_metrics = {}
+_metrics_lock = threading.Lock()
+
+# db_path -> [read-only connection, active readers]
+_read_pools = {}
+_pool_lock = threading.Lock()
+
+
+def record_lease(db_path: str, mode: str, wait_seconds: float, hold_seconds: float, contended: bool) -> None:
+    """Add one lease acquisition to the process-wide metrics."""
+    with _metrics_lock:
+        stats = _lease_metrics.setdefault((db_path, mode), {
+            "acquisitions": 0,
+            "contended": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "hold_seconds_total": 0.0,
+            "hold_seconds_max": 0.0,
+        })
+        stats["acquisitions"] += 1
+        stats["contended"] += int(contended)
+        stats["wait_seconds_total"] += wait_seconds
+        stats["wait_seconds_max"] = max(stats["wait_seconds_max"], wait_seconds)
+        stats["hold_seconds_total"] += hold_seconds
+        stats["hold_seconds_max"] = max(stats["hold_seconds_max"], hold_seconds)
+
+
+def sql_literal(value) -> str:
+    """
+    Quote a value (e.g. a file path) as a SQL string literal.
+
+    Only for statements DuckDB cannot prepare (ATTACH, COPY ... TO, CREATE
+    VIEW); everywhere else values are bound as ? parameters.
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def apply_extension_settings(conn) -> None:
+    """
+    Point a connection at the vendored extension directory and disable automatic installs.
+
+    Applied with SET after connecting rather than as connect config: DuckDB
+    rejects a second connection to an already open file with a different
+    config, and dbt opens the same files in-process.
+    """
+    conn.execute("SET extension_directory = ?", [EXTENSION_DIRECTORY])
+    conn.execute("SET autoinstall_known_extensions = false")
+
+
+def missing_extensions() -> list:
+    """Return the required extensions that do not load from the extension directory, without installing."""
+    conn = duckdb.connect()
+    try:
+        apply_extension_settings(conn)
+        missing = []
+        for name in REQUIRED_EXTENSIONS:
+            try:
+                conn.execute(f"LOAD {name}")
+            except duckdb.Error:
+                missing.append(name)
+    finally:
+        conn.close()
+    return missing
+
+
+def verify_extensions() -> None:
+    """
+    Check that every required extension loads from the extension directory, without installing.
+
+    Raises:
+        RuntimeError: Naming the missing extensions and how to vendor them
+    """
+    missing = missing_extensions()
+    if missing:
+        raise RuntimeError(
+            f"DuckDB extensions {', '.join(missing)} are not vendored in "
+            f"'{EXTENSION_DIRECTORY or '~/.duckdb/extensions'}'; run "
+            f"z_other/scripts/scripts/init_duckdb.py --extension-dir <dir> on a connected host "
+            f"(or with --repository <mirror>)"
+        )
+
+
+class DuckDBConnectionManager(ConfigurableResource):
+    """
+    Leased, pooled access to the platform's DuckDB files.
+
+    Databases are addressed by name ("raw", "dev", "prod") or by path.
+    """
+
+    raw_path: str = "/app/02_duck_db/01_raw/raw.duckdb"
+    dev_path: str = "/app/02_duck_db/02_dev/dev.duckdb"
+    prod_path: str = "/app/02_duck_db/03_prod/prod.duckdb"
+    # Maximum seconds to queue for a lease before failing the step
+    lease_timeout: float = 1800.0
+    lease_poll_interval: float = 0.1
+    # Connect retries for lock errors caused by processes that take no lease
+    connect_retries: int = 5
+    connect_retry_delay: float = 1.0
+
+    def setup_for_execution(self, context: InitResourceContext) -> None:
+        # Checked per step rather than at import, so a missing extension fails
+        # the steps that use DuckDB instead of the whole code location
+        verify_extensions()
+
+    def path(self, database: str) -> str:
+        """Resolve a database name ("raw", "dev", "prod") or path to a file path."""
+        return {"raw": self.raw_path, "dev": self.dev_path, "prod": self.prod_path}.get(database, database)
+
+    @contextmanager
+    def lease(self, database: str, exclusive: bool, timeout: float = None):
+        """
+        Hold the cross-process reader/writer lease on a database file.
+
+        Writers take an exclusive flock, readers a shared one, on the
+        `<db>.lease` sidecar file.
+
+        Args:
+            timeout: Maximum seconds to queue (defaults to lease_timeout)
+
+        Yields:
+            Seconds spent waiting for the lease
+
+        Raises:
+            TimeoutError: If the lease could not be acquired in time
+        """
+        timeout = self.lease_timeout if timeout is None else timeout
+        db_path = self.path(database)
+        mode_name = "writer" if exclusive else "reader"
+        lease_path = Path(f"{db_path}.lease")
+        lease_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+
+        with open(lease_path, "a") as lease_file:
+            start = time.monotonic()
+            contended = False
+            while True:
+                try:
+                    fcntl.flock(lease_file.fileno(), mode | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    contended = True
+                    if time.monotonic() - start > timeout:
+                        raise TimeoutError(f"Timed out after {timeout}s waiting for lease on {db_path}")
+                    time.sleep(self.lease_poll_interval)
+            acquired = time.monotonic()
+            wait_seconds = acquired - start
+            if wait_seconds > SLOW_LEASE_WAIT_SECONDS:
+                get_dagster_logger().info(f"⏳ Waited {wait_seconds:.1f}s for {mode_name} lease on {db_path}")
+            try:
+                yield wait_seconds
+            finally:
+                fcntl.flock(lease_file.fileno(), fcntl.LOCK_UN)
+                record_lease(db_path, mode_name, wait_seconds, time.monotonic() - acquired, contended)
+
+    def connect(self, database: str, read_only: bool = False):
+        """
+        Open a DuckDB connection without taking a lease.
+
+        Only for callers that already hold the matching lease (e.g. inside a
+        dbt step); otherwise use writer() or reader().
+        """
+        db_path = self.path(database)
+        retry_delay = self.connect_retry_delay
+        for attempt in range(self.connect_retries):
+            try:
+                conn = duckdb.connect(db_path, read_only=read_only)
+                apply_extension_settings(conn)
+                return conn
+            except duckdb.IOException as e:
+                if "lock" not in str(e).lower() or attempt == self.connect_retries - 1:
+                    raise
+                get_dagster_logger().info(
+                    f"🔄 Database lock held outside Dagster (attempt {attempt + 1}/{self.connect_retries}), "
+                    f"retrying in {retry_delay:.1f}s..."
+                )
+                time.sleep(retry_delay)
+                retry_delay *= 1.5
+
+    @contextmanager
+    def writer(self, database: str):
+        """Open a read-write connection under the database's exclusive lease."""
+        with self.lease(database, exclusive=True):
+            conn = self.connect(database, read_only=False)
+            try:
+                yield conn
+            finally:
+                conn.close()
+
+    @contextmanager
+    def reader(self, database: str, timeout: float = None):
+        """
+        Borrow a cursor on the pooled read-only connection under a shared lease.
+
+        Concurrent readers in one process (threads, or nested steps) share a
+        single read-only connection; it is closed when the last one returns.
+        timeout is passed on to lease().
+        """
+        db_path = self.path(database)
+        with self.lease(database, exclusive=False, timeout=timeout):
+            with _pool_lock:
+                entry = _read_pools.get(db_path)
+                if entry is None:
+                    entry = _read_pools[db_path] = [self.connect(database, read_only=True), 0]
+                entry[1] += 1
+                cursor = entry[0].cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+                with _pool_lock:
+                    entry[1] -= 1
+                    if entry[1] == 0:
+                        entry[0].close()
+                        del _read_pools[db_path]
+
+    def metrics(self) -> dict:
+        """Return lease metrics recorded in this process, keyed by "<db file>/<mode>"."""
+        with _metrics_lock:
+            return {
+                f"{Path(db_path).name}/{mode}": dict(stats)
+                for (db_path, mode), stats in _lease_metrics.items()
+            }
+
+    def metadata(self) -> dict:
+        """Flatten metrics() into materialization metadata entries."""
+        return {
+            f"lease_{name.replace('.duckdb', '').replace('/', '_')}_{key}": round(value, 3)
+            for name, stats in self.metrics().items()
+            for key, value in stats.items()
+        }
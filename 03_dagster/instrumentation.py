@@ -0,0 +1,290 @@
+"""
+Per-step performance instrumentation for the proto_loc platform.
+
+Asset steps record the heavy SQL statements they run (loads, copies,
+exports) and other timed phases through a StepInstrumentation and attach
+the summary to their materialization as flat, numeric metadata, so Dagster
+can chart each measure across runs:
+
+- wall time, rows written and rows/sec per named statement (sql_<name>_*)
+  and per timed phase (<name>_*)
+- DuckDB's peak buffer memory and peak temp directory size (spill) per
+  statement, from DuckDB's JSON query profiler
+- total step time and the step process's peak RSS
+
+Setting DUCKDB_EXPLAIN_ANALYZE=true also profiles every operator (the
+EXPLAIN ANALYZE tree) and attaches the slowest operators of each
+statement's slowest execution as JSON metadata.
+
+zonemap_pruning() reports how many of a table's row groups a range filter
+can skip, from the min/max statistics DuckDB keeps per row group, and
+clustering_disorder() how many row groups break a table's sort order.
+
+Key Design Principles:
+- Statements keep their normal results; the profiler writes to a temp file
+- Repeated statements with the same name are aggregated, not listed
+- Block timings (timed) for work that is not a single statement
+"""
+
+import os
+import re
+import json
+import time
+import resource
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+
+from dagster import MetadataValue
+
+# Profile every operator of instrumented statements (EXPLAIN ANALYZE)
+EXPLAIN_ANALYZE = os.getenv("DUCKDB_EXPLAIN_ANALYZE", "false").lower() in ("1", "true", "yes")
+
+# Slowest operators kept per statement plan
+PLAN_TOP_OPERATORS = 8
+
+# Query-level metrics are cheap and always collected
+SYSTEM_METRICS = ["LATENCY", "SYSTEM_PEAK_BUFFER_MEMORY", "SYSTEM_PEAK_TEMP_DIR_SIZE"]
+OPERATOR_METRICS = ["OPERATOR_NAME", "OPERATOR_TYPE", "OPERATOR_TIMING", "OPERATOR_CARDINALITY", "EXTRA_INFO"]
+
+# Min/max of one column segment in pragma_storage_info, e.g. "[Min: 2024-01-01, Max: 2024-01-03][Has Null: false]"
+SEGMENT_STATS_PATTERN = re.compile(r"\[Min: ([^,\]]*), Max: ([^,\]]*)\]")
+
+
+def plan_operators(profile: dict) -> list:
+    """Flatten a DuckDB JSON profile into its operators, slowest first."""
+    operators = []
+    pending = list(profile.get("children", []))
+    while pending:
+        node = pending.pop()
+        operators.append({
+            "operator": node.get("operator_name", "").strip(),
+            "seconds": round(node.get("operator_timing", 0.0), 4),
+            "rows": node.get("operator_cardinality", 0),
+        })
+        pending.extend(node.get("children", []))
+    return sorted(operators, key=lambda op: op["seconds"], reverse=True)
+
+
+def zonemap_pruning(conn, relation: str, ranges: dict) -> dict:
+    """
+    Share of a table's row groups that DuckDB's zonemaps skip for a range filter.
+
+    A row group is skipped when the min/max statistics of any filtered column
+    exclude that column's range; the report comes from the stored statistics
+    (the query profiler's scan counts do not reflect skipped row groups).
+
+    Args:
+        relation: Table name, optionally schema-qualified
+        ranges: {column: (low, high)} inclusive bounds, dates or numbers, ANDed together
+
+    Returns:
+        {"row_groups": total, "row_groups_scanned": not skipped, "pruned_ratio": skipped share}
+    """
+    segments = conn.execute(f"""
+        SELECT row_group_id, column_name, stats
+        FROM pragma_storage_info(?)
+        -- Validity segments ("col, 0" paths) carry no min/max
+        WHERE column_path NOT LIKE '%,%'
+    """, [relation]).fetchall()
+
+    # row group -> column -> (min, max) over the column's segments in that group
+    bounds = {}
+    for row_group, column, stats in segments:
+        columns = bounds.setdefault(row_group, {})
+        match = SEGMENT_STATS_PATTERN.search(stats or "")
+        if column not in ranges or not match or "NULL" in match.groups():
+            continue
+        parse = date.fromisoformat if isinstance(ranges[column][0], date) else float
+        low, high = parse(match.group(1)), parse(match.group(2))
+        if column in columns:
+            low, high = min(low, columns[column][0]), max(high, columns[column][1])
+        columns[column] = (low, high)
+
+    scanned = sum(
+        1 for columns in bounds.values()
+        if not any(
+            column in columns and (columns[column][1] < low or columns[column][0] > high)
+            for column, (low, high) in ranges.items()
+        )
+    )
+    return {
+        "row_groups": len(bounds),
+        "row_groups_scanned": scanned,
+        "pruned_ratio": round(1 - scanned / len(bounds), 3) if bounds else 0.0,
+    }
+
+
+def clustering_disorder(conn, relation: str, column: str) -> dict:
+    """
+    Number of a table's row groups that break its sort order on a date column.
+
+    A table written sorted has row groups whose min/max ranges follow one
+    another (neighbours share at most a boundary value). Incremental
+    delete+insert runs append re-inserted rows behind the existing ones,
+    into the partly filled last row group and then new ones, and deleted
+    rows keep counting in their row group's statistics, so each re-run
+    leaves row groups whose range starts before an earlier group's ends.
+
+    Returns:
+        {"row_groups": total, "out_of_order_row_groups": count, "out_of_order_ratio": share}
+    """
+    ranges = {}
+    for row_group, stats in conn.execute(f"""
+        SELECT row_group_id, stats
+        FROM pragma_storage_info(?)
+        WHERE column_name = ? AND column_path NOT LIKE '%,%'
+    """, [relation, column]).fetchall():
+        match = SEGMENT_STATS_PATTERN.search(stats or "")
+        if not match or "NULL" in match.groups():
+            continue
+        low, high = date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))
+        if row_group in ranges:
+            low, high = min(low, ranges[row_group][0]), max(high, ranges[row_group][1])
+        ranges[row_group] = (low, high)
+
+    out_of_order = 0
+    running_max = None
+    for row_group in sorted(ranges):
+        low, high = ranges[row_group]
+        if running_max is not None and low < running_max:
+            out_of_order += 1
+        running_max = high if running_max is None else max(running_max, high)
+    return {
+        "row_groups": len(ranges),
+        "out_of_order_row_groups": out_of_order,
+        "out_of_order_ratio": round(out_of_order / len(ranges), 3) if ranges else 0.0,
+    }
+
+
+class StepInstrumentation:
+    """
+    Collect statement timings and DuckDB query profiles for one asset step.
+
+    Usage:
+        instrumentation = StepInstrumentation()
+        rows = instrumentation.execute(conn, "insert_trips", "INSERT INTO ...")
+        with instrumentation.timed("profile_trips"):
+            ...
+        context.add_output_metadata(instrumentation.metadata())
+    """
+
+    def __init__(self, explain_analyze: bool = EXPLAIN_ANALYZE):
+        self.explain_analyze = explain_analyze
+        self.started = time.perf_counter()
+        # statement name -> aggregated measures
+        self.statements = {}
+        # Measures of the most recent execute(), for progress reporting
+        self.last_statement = {}
+
+    def record(
+        self,
+        name: str,
+        seconds: float,
+        rows: int = None,
+        peak_memory_bytes: int = None,
+        spill_bytes: int = None,
+        plan: dict = None,
+        prefix: str = "sql_",
+    ) -> None:
+        """Add one execution of a named statement, or of a timed block (prefix "")."""
+        stats = self.statements.setdefault(
+            name, {"prefix": prefix, "executions": 0, "seconds": 0.0, "slowest_seconds": 0.0}
+        )
+        stats["executions"] += 1
+        stats["seconds"] += seconds
+        if rows is not None:
+            stats["rows"] = stats.get("rows", 0) + rows
+        if peak_memory_bytes is not None:
+            stats["peak_memory_bytes"] = max(stats.get("peak_memory_bytes", 0), peak_memory_bytes)
+        if spill_bytes is not None:
+            stats["spill_bytes"] = max(stats.get("spill_bytes", 0), spill_bytes)
+        if seconds >= stats["slowest_seconds"]:
+            stats["slowest_seconds"] = seconds
+            if plan is not None:
+                stats["plan"] = plan
+
+    def execute(self, conn, name: str, sql: str, params: list = None) -> int:
+        """
+        Run one write statement (INSERT, CREATE TABLE AS, COPY) under DuckDB's profiler.
+
+        Returns:
+            Number of rows the statement wrote
+        """
+        metrics = SYSTEM_METRICS + (OPERATOR_METRICS if self.explain_analyze else [])
+        fd, profile_path = tempfile.mkstemp(prefix="duckdb_profile_", suffix=".json")
+        os.close(fd)
+        start = time.perf_counter()
+        try:
+            conn.execute("SET enable_profiling = 'json'")
+            conn.execute("SET profiling_output = ?", [profile_path])
+            conn.execute("SET custom_profiling_settings = ?", [json.dumps({m: "true" for m in metrics})])
+            try:
+                rows = conn.execute(sql, params).fetchone()[0]
+            finally:
+                conn.execute("PRAGMA disable_profiling")
+                conn.execute("RESET custom_profiling_settings")
+            seconds = time.perf_counter() - start
+            with open(profile_path) as f:
+                profile = json.load(f)
+        finally:
+            os.unlink(profile_path)
+
+        plan = None
+        if self.explain_analyze:
+            plan = {
+                "latency_seconds": round(profile.get("latency", seconds), 4),
+                "operators": plan_operators(profile)[:PLAN_TOP_OPERATORS],
+            }
+        self.last_statement = {
+            "name": name,
+            "seconds": seconds,
+            "rows": rows,
+            "peak_memory_bytes": profile.get("system_peak_buffer_memory", 0),
+            "spill_bytes": profile.get("system_peak_temp_dir_size", 0),
+        }
+        self.record(
+            name,
+            seconds,
+            rows=rows,
+            peak_memory_bytes=self.last_statement["peak_memory_bytes"],
+            spill_bytes=self.last_statement["spill_bytes"],
+            plan=plan,
+        )
+        return rows
+
+    @contextmanager
+    def timed(self, name: str):
+        """
+        Time a block that is not a single statement (several queries, dbt, file work).
+
+        Yields a dict; set its "rows" key to report rows processed.
+        """
+        measures = {}
+        start = time.perf_counter()
+        yield measures
+        self.record(name, time.perf_counter() - start, rows=measures.get("rows"), prefix="")
+
+    def metadata(self) -> dict:
+        """Flatten the collected measures into materialization metadata entries."""
+        metadata = {
+            "step_seconds": round(time.perf_counter() - self.started, 3),
+            # ru_maxrss is reported in kilobytes on Linux
+            "process_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+        for name, stats in self.statements.items():
+            prefix = f"{stats['prefix']}{name}"
+            metadata[f"{prefix}_seconds"] = round(stats["seconds"], 3)
+            if stats["executions"] > 1:
+                metadata[f"{prefix}_executions"] = stats["executions"]
+            if "rows" in stats:
+                metadata[f"{prefix}_rows"] = stats["rows"]
+                if stats["seconds"] > 0:
+                    metadata[f"{prefix}_rows_per_second"] = round(stats["rows"] / stats["seconds"])
+            if "peak_memory_bytes" in stats:
+                metadata[f"{prefix}_peak_memory_mb"] = round(stats["peak_memory_bytes"] / 1024 ** 2, 1)
+            if "spill_bytes" in stats:
+                metadata[f"{prefix}_spill_bytes"] = stats["spill_bytes"]
+            if "plan" in stats:
+                metadata[f"{prefix}_plan"] = MetadataValue.json(stats["plan"])
+        return metadata
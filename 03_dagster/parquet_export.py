@@ -0,0 +1,195 @@
+"""
+Parquet snapshots of the analytics marts for the proto_loc platform.
+
+Cube and Superset read the marts from DuckDB files that Dagster and dbt
+lock for writing during every pipeline run. Exporting each pickup month of
+a mart to its own zstd-compressed Parquet file in a hive layout
+(`<table>/year=YYYY/month=M/data.parquet`) gives BI readers a copy they can
+scan with partition pruning and without ever touching a DuckDB lock.
+
+Key Design Principles:
+- Only months whose rows changed (see partition_fingerprint) are rewritten
+- Each file is written to a temporary name and renamed into place, so
+  readers see either the previous or the new month, never a partial file
+- An export manifest records the content fingerprint, row count and export
+  time of every exported month
+"""
+
+import os
+import json
+import hashlib
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from duckdb_resource import sql_literal
+from instrumentation import StepInstrumentation
+
+# Rows per Parquet row group: large enough for good zstd ratios and cheap
+# metadata, small enough for row-group min/max statistics to prune scans
+DEFAULT_ROW_GROUP_SIZE = 262_144
+
+# Per-table record of exported months, at the root of the export directory
+EXPORT_MANIFEST_FILE = "_export_manifest.json"
+
+
+def partition_path(export_dir: str, table_name: str, month_start: date) -> Path:
+    """
+    Return the hive-partitioned Parquet file of one month of a table.
+
+    Months are not zero-padded so DuckDB infers both partition columns as integers.
+    """
+    return (
+        Path(export_dir)
+        / table_name
+        / f"year={month_start.year}"
+        / f"month={month_start.month}"
+        / "data.parquet"
+    )
+
+
+def partition_fingerprint(conn, relation: str, month_column: str, month_start: date):
+    """
+    Fingerprint the rows of one month of a relation.
+
+    Every row is hashed over all its columns and the hashes are combined
+    with order-independent aggregates (XOR and sum, plus the row count), so
+    any changed, added or removed row changes the fingerprint regardless of
+    how the rows are stored. The month is read once, with no sort.
+
+    Returns:
+        Hex digest, or None if the month has no rows
+    """
+    row_count, hash_xor, hash_sum = conn.execute(f"""
+        SELECT COUNT(*), BIT_XOR(row_hash), SUM(row_hash::HUGEINT)
+        FROM (
+            SELECT hash(*COLUMNS(*)) AS row_hash
+            FROM {relation}
+            WHERE {month_column} = ?
+        )
+    """, [month_start]).fetchone()
+    if not row_count:
+        return None
+    return hashlib.sha256(f"{row_count}:{hash_xor}:{hash_sum}".encode()).hexdigest()
+
+
+def read_export_manifest(export_dir: str) -> dict:
+    """Return {table name: {partition key: export entry}} from the export manifest."""
+    path = Path(export_dir) / EXPORT_MANIFEST_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def write_export_manifest(export_dir: str, manifest: dict) -> None:
+    """Atomically replace the export manifest."""
+    path = Path(export_dir) / EXPORT_MANIFEST_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def export_partition(
+    conn,
+    relation: str,
+    month_column: str,
+    month_start: date,
+    path: Path,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    instrumentation: StepInstrumentation = None,
+) -> int:
+    """
+    Write one month of a relation to a zstd-compressed Parquet file.
+
+    The partition columns are encoded in the hive path rather than stored
+    in the file, and the file is renamed into place once complete. The COPY
+    is recorded in instrumentation as export_<relation table>.
+
+    Returns:
+        Number of rows written
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    instrumentation = instrumentation or StepInstrumentation()
+    row_count = instrumentation.execute(conn, f"export_{relation.split('.')[-1]}", f"""
+        COPY (
+            SELECT * FROM {relation}
+            WHERE {month_column} = ?
+        ) TO {sql_literal(tmp_path)} (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {int(row_group_size)})
+    """, [month_start])
+    os.replace(tmp_path, path)
+    return row_count
+
+
+def remove_partition(path: Path) -> bool:
+    """Delete an exported month (e.g. one with no rows left); return True if it existed."""
+    if not path.exists():
+        return False
+    path.unlink()
+    for directory in (path.parent, path.parent.parent):
+        if not any(directory.iterdir()):
+            directory.rmdir()
+    return True
+
+
+def export_changed_partitions(
+    conn,
+    export_dir: str,
+    table_name: str,
+    relation: str,
+    partition_keys: list,
+    month_column: str = "pickup_month_start",
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    force: bool = False,
+    manifest: dict = None,
+    instrumentation: StepInstrumentation = None,
+) -> dict:
+    """
+    Export the given months of a relation whose rows changed since the last export.
+
+    Args:
+        conn: DuckDB connection holding the relation
+        export_dir: Root directory of the Parquet export
+        table_name: Table name, used as the export subdirectory
+        relation: Relation to export
+        partition_keys: Month start dates ("YYYY-MM-01") to consider
+        month_column: Column holding each row's month start date
+        row_group_size: Rows per Parquet row group
+        force: Rewrite every month even if unchanged
+        manifest: Export manifest updated in place (read from disk if None)
+        instrumentation: Records the timing, memory and spill of each COPY
+
+    Returns:
+        {"exported": {key: rows}, "removed": [keys], "unchanged": [keys]}
+    """
+    manifest = read_export_manifest(export_dir) if manifest is None else manifest
+    table_manifest = manifest.setdefault(table_name, {})
+    outcome = {"exported": {}, "removed": [], "unchanged": []}
+
+    for partition_key in partition_keys:
+        month_start = date.fromisoformat(partition_key)
+        path = partition_path(export_dir, table_name, month_start)
+        fingerprint = partition_fingerprint(conn, relation, month_column, month_start)
+        previous = table_manifest.get(partition_key)
+
+        if fingerprint is None:
+            remove_partition(path)
+            if previous is not None:
+                del table_manifest[partition_key]
+                outcome["removed"].append(partition_key)
+            continue
+
+        if not force and previous is not None and previous["fingerprint"] == fingerprint and path.exists():
+            outcome["unchanged"].append(partition_key)
+            continue
+
+        row_count = export_partition(
+            conn, relation, month_column, month_start, path, row_group_size, instrumentation
+        )
+        table_manifest[partition_key] = {
+            "fingerprint": fingerprint,
+            "path": str(path.relative_to(export_dir)),
+            "row_count": row_count,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+        }
+        outcome["exported"][partition_key] = row_count
+
+    return outcome
@@ -0,0 +1,241 @@
+"""
+Blue/green publishing of the dev database to prod.duckdb for the proto_loc platform.
+
+BI readers should never query dev.duckdb while dbt rewrites it. Instead, a
+validated dev database is copied into a fresh side file next to
+prod.duckdb, which is then renamed over prod.duckdb in one atomic step.
+Readers that already have prod open keep reading the old generation until
+they reconnect; new connections see the new one. No reader ever sees a
+half-written database, and nothing writes to the live prod file.
+
+The generation being replaced is kept as a hardlink (`prod.duckdb.previous`)
+so a bad publish can be rolled back with the same atomic rename.
+
+Tables are copied with their rows; views and indexes are recreated from
+their SQL, so prod serves the same objects as the validated dev database.
+A publish fails rather than dropping an object it cannot recreate. The raw
+schema (nyc_taxi_data) is published from raw.duckdb itself rather than from
+dev's partial copies, so Cube's raw_* cubes and Superset read only prod.
+
+Key Design Principles:
+- The live prod file is only ever replaced by os.replace, never modified
+- Snapshots are checkpointed and closed before they are swapped in
+- Exactly one previous generation is kept for rollback
+"""
+
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+
+from duckdb_resource import REQUIRED_EXTENSIONS, apply_extension_settings, sql_literal
+from instrumentation import StepInstrumentation
+
+# Schemas of the source database that are not published (raw copies made for dbt)
+EXCLUDED_SCHEMAS = ("nyc_taxi_data",)
+
+# Schemas published from the raw database instead (read by the raw_* cubes)
+RAW_SCHEMAS = ("nyc_taxi_data",)
+
+# Publication log written into every snapshot, so readers can check freshness
+PUBLICATION_TABLE = "main._publication"
+
+
+def snapshot_path(prod_path: str) -> Path:
+    """Return the side file a new prod generation is built in."""
+    return Path(f"{prod_path}.next")
+
+
+def previous_path(prod_path: str) -> Path:
+    """Return the file holding the previous prod generation."""
+    return Path(f"{prod_path}.previous")
+
+
+def create_views(conn, views: list, source_catalogs: tuple) -> list:
+    """
+    Recreate the source databases' views in the target database.
+
+    References qualified with a source catalog (e.g. dbt's "dev"."main"."x",
+    or "raw"."nyc_taxi_data"."x" for the attached raw database) are made
+    catalog-relative, so they bind to the copied tables and keep working
+    whatever name the published file is opened under. Views are created in
+    passes until every one binds, since a view can select from another view.
+
+    Raises:
+        RuntimeError: Naming the views that could not be recreated (e.g. they
+            read an excluded schema), with their errors
+    """
+    catalogs = "|".join(
+        alternative for catalog in source_catalogs for alternative in (f'"{re.escape(catalog)}"', re.escape(catalog))
+    )
+    catalog_prefix = re.compile(rf'(?<![\w"])({catalogs})\.')
+    pending = {f"{schema_name}.{view_name}": catalog_prefix.sub("", sql) for schema_name, view_name, sql in views}
+    created = []
+    while pending:
+        created_before = len(created)
+        errors = {}
+        for name, sql in list(pending.items()):
+            try:
+                conn.execute(sql)
+            except duckdb.Error as e:
+                errors[name] = str(e).splitlines()[0]
+                continue
+            created.append(name)
+            del pending[name]
+        # Stop once a pass creates nothing; the remaining views cannot bind
+        if len(created) == created_before:
+            raise RuntimeError(
+                "Views could not be recreated in the snapshot: "
+                + "; ".join(f"{name}: {error}" for name, error in errors.items())
+            )
+    return created
+
+
+def build_snapshot(
+    source_path: str,
+    target_path: Path,
+    excluded_schemas: tuple = EXCLUDED_SCHEMAS,
+    instrumentation: StepInstrumentation = None,
+    raw_path: str = None,
+    raw_schemas: tuple = RAW_SCHEMAS,
+) -> dict:
+    """
+    Copy every table, view and index of the source database into a new database file.
+
+    With raw_path, the raw_schemas of the raw database are published too
+    (excluded_schemas normally holds the same schemas, so dev's copies are
+    replaced by the originals). Sources are attached read-only; the target
+    is created from scratch (any leftover from an interrupted publish is
+    discarded) and closed, and so checkpointed, before returning. Views are
+    recreated after the tables (see create_views) and indexes, e.g. the
+    R-tree on zone geometries, after both. Table copies are recorded in
+    instrumentation as copy_tables, index builds as create_indexes, the
+    final checkpoint as checkpoint.
+
+    Returns:
+        {"tables": {"schema.table": row count}, "views": ["schema.view"], "indexes": ["schema.index"]}
+    """
+    for leftover in (target_path, Path(f"{target_path}.wal")):
+        leftover.unlink(missing_ok=True)
+
+    instrumentation = instrumentation or StepInstrumentation()
+    tables = {}
+    conn = duckdb.connect(str(target_path))
+    try:
+        # Loaded up front: recreating an RTREE index does not autoload spatial
+        apply_extension_settings(conn)
+        for name in REQUIRED_EXTENSIONS:
+            conn.execute(f"LOAD {name}")
+        # (alias, path, schema filter, schemas bound to the filter)
+        sources = [("source_db", source_path, "NOT list_contains(?, schema_name)", list(excluded_schemas))]
+        if raw_path:
+            sources.append(("raw_db", raw_path, "list_contains(?, schema_name)", list(raw_schemas)))
+
+        source_tables, source_views, source_indexes = [], [], []
+        for alias, path, schema_filter, schemas in sources:
+            conn.execute(f"ATTACH {sql_literal(path)} AS {alias} (READ_ONLY)")
+            source_tables += [(alias, *row) for row in conn.execute(f"""
+                SELECT schema_name, table_name
+                FROM duckdb_tables()
+                WHERE database_name = ? AND {schema_filter}
+                ORDER BY schema_name, table_name
+            """, [alias, schemas]).fetchall()]
+            source_views += conn.execute(f"""
+                SELECT schema_name, view_name, sql
+                FROM duckdb_views()
+                WHERE database_name = ? AND NOT internal AND {schema_filter}
+                ORDER BY schema_name, view_name
+            """, [alias, schemas]).fetchall()
+            source_indexes += conn.execute(f"""
+                SELECT schema_name, index_name, sql
+                FROM duckdb_indexes()
+                WHERE database_name = ? AND {schema_filter}
+                ORDER BY schema_name, index_name
+            """, [alias, schemas]).fetchall()
+        # Catalog names the sources' objects were created under (dev.duckdb -> dev,
+        # raw.duckdb -> raw, which is also the alias dbt attaches raw under)
+        source_catalogs = tuple(Path(path).stem for _, path, _, _ in sources)
+
+        conn.begin()
+        for alias, schema_name, table_name in source_tables:
+            conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema_name}"')
+            tables[f"{schema_name}.{table_name}"] = instrumentation.execute(conn, "copy_tables", f"""
+                CREATE TABLE "{schema_name}"."{table_name}" AS
+                SELECT * FROM {alias}."{schema_name}"."{table_name}"
+            """)
+        conn.commit()
+        for alias, *_ in sources:
+            conn.execute(f"DETACH {alias}")
+
+        for schema_name in {schema_name for schema_name, _, _ in source_views}:
+            conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema_name}"')
+        views = create_views(conn, source_views, source_catalogs)
+
+        indexes = []
+        with instrumentation.timed("create_indexes"):
+            for schema_name, index_name, sql in source_indexes:
+                # Index SQL names its table without a schema
+                conn.execute(f'USE "{schema_name}"')
+                try:
+                    conn.execute(sql)
+                finally:
+                    conn.execute("USE main")
+                indexes.append(f"{schema_name}.{index_name}")
+
+        conn.execute(f"""
+            CREATE TABLE {PUBLICATION_TABLE} AS
+            SELECT ? AS source_path, ?::TIMESTAMPTZ AS published_at, ? AS table_count, ? AS row_count
+        """, [source_path, datetime.now(timezone.utc), len(tables), sum(tables.values())])
+
+        with instrumentation.timed("checkpoint"):
+            conn.execute("CHECKPOINT")
+    finally:
+        conn.close()
+    return {"tables": tables, "views": views, "indexes": indexes}
+
+
+def swap_in(snapshot: Path, prod_path: str) -> bool:
+    """
+    Atomically make a finished snapshot the live prod database.
+
+    The current generation is first hardlinked to prod.duckdb.previous (via
+    a temporary name, so the previous generation is replaced atomically
+    too); the live path itself is never missing.
+
+    Returns:
+        True if a previous generation was kept
+    """
+    live = Path(prod_path)
+    previous = previous_path(prod_path)
+    kept_previous = live.exists()
+    if kept_previous:
+        previous_tmp = Path(f"{previous}.tmp")
+        previous_tmp.unlink(missing_ok=True)
+        os.link(live, previous_tmp)
+        os.replace(previous_tmp, previous)
+    os.replace(snapshot, live)
+    return kept_previous
+
+
+def rollback(prod_path: str) -> None:
+    """
+    Swap the previous prod generation back in, keeping the current one as previous.
+
+    Raises:
+        FileNotFoundError: If there is no previous generation to roll back to
+    """
+    live = Path(prod_path)
+    previous = previous_path(prod_path)
+    if not previous.exists():
+        raise FileNotFoundError(f"No previous generation of {prod_path} to roll back to")
+
+    # Renames through a temporary hardlink; the live path is always present
+    current_tmp = Path(f"{prod_path}.rollback")
+    current_tmp.unlink(missing_ok=True)
+    if live.exists():
+        os.link(live, current_tmp)
+    os.replace(previous, live)
+    if current_tmp.exists():
+        os.replace(current_tmp, previous)
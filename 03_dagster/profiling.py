@@ -0,0 +1,225 @@
+"""
+Single-pass column profiling for DuckDB tables in the proto_loc platform.
+
+Profiles are computed for every column of a relation in one scan (null
+counts, min/max, means, approximate distinct counts and decile histograms),
+grouped by a partition expression such as the source file or pickup month,
+and persisted in a `_table_profiles` table next to the data. Validation
+assets then read these precomputed statistics instead of rescanning the
+underlying tables, so their cost stays constant as history grows.
+
+Key Design Principles:
+- One aggregate query per profiled relation, regardless of column count
+- Profiles are replaced per partition, inside the caller's transaction
+- Partition summaries are merged from stored profiles without touching data
+"""
+
+import re
+
+# Equi-depth histogram boundaries stored for numeric columns (deciles)
+HISTOGRAM_QUANTILES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+NUMERIC_TYPE_PATTERN = re.compile(
+    r"^(TINYINT|SMALLINT|INTEGER|BIGINT|HUGEINT|UTINYINT|USMALLINT|UINTEGER|UBIGINT|UHUGEINT|FLOAT|DOUBLE|DECIMAL)"
+)
+# Types that support MIN/MAX and approximate distinct counts
+ORDERED_TYPE_PATTERN = re.compile(r"^(VARCHAR|DATE|TIME|TIMESTAMP|BOOLEAN|UUID|INTERVAL)")
+
+
+def is_numeric_type(column_type: str) -> bool:
+    """Return True if a DuckDB column type is numeric."""
+    return bool(NUMERIC_TYPE_PATTERN.match(column_type.upper()))
+
+
+def ensure_profile_table(conn, profile_table: str) -> None:
+    """Create a profile table if it does not exist yet."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {profile_table} (
+            table_name VARCHAR,
+            partition_key VARCHAR,
+            column_name VARCHAR,
+            column_type VARCHAR,
+            row_count BIGINT,
+            null_count BIGINT,
+            min_value VARCHAR,
+            max_value VARCHAR,
+            mean_value DOUBLE,
+            approx_distinct BIGINT,
+            histogram DOUBLE[],
+            profiled_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+
+
+def profile_relation(conn, relation: str, partition_expr: str, where: str = "TRUE", params: list = None) -> list:
+    """
+    Profile every column of a relation in a single scan.
+
+    Args:
+        conn: DuckDB connection
+        relation: Table or view to profile
+        partition_expr: SQL expression the profiles are grouped by
+        where: Optional SQL predicate restricting the rows profiled
+        params: Values bound to the ? placeholders in where
+
+    Returns:
+        List of profile dicts, one per (partition_key, column)
+    """
+    columns = [
+        (row[0], row[1])
+        for row in conn.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()
+    ]
+
+    select_list = [f"CAST({partition_expr} AS VARCHAR) AS partition_key", "COUNT(*) AS row_count"]
+    for i, (name, column_type) in enumerate(columns):
+        quoted = f'"{name}"'
+        numeric = is_numeric_type(column_type)
+        ordered = numeric or bool(ORDERED_TYPE_PATTERN.match(column_type.upper()))
+        select_list.append(f"COUNT({quoted}) AS c{i}_non_null")
+        if ordered:
+            select_list.append(f"CAST(MIN({quoted}) AS VARCHAR) AS c{i}_min")
+            select_list.append(f"CAST(MAX({quoted}) AS VARCHAR) AS c{i}_max")
+            select_list.append(f"approx_count_distinct({quoted}) AS c{i}_distinct")
+        else:
+            select_list.append(f"NULL AS c{i}_min, NULL AS c{i}_max, NULL AS c{i}_distinct")
+        if numeric:
+            select_list.append(f"AVG(CAST({quoted} AS DOUBLE)) AS c{i}_mean")
+            select_list.append(
+                f"approx_quantile(CAST({quoted} AS DOUBLE), {HISTOGRAM_QUANTILES}) AS c{i}_histogram"
+            )
+        else:
+            select_list.append(f"NULL AS c{i}_mean, NULL AS c{i}_histogram")
+
+    rows = conn.execute(f"""
+        SELECT {', '.join(select_list)}
+        FROM {relation}
+        WHERE {where}
+        GROUP BY 1
+    """, params or []).fetchall()
+
+    profiles = []
+    for row in rows:
+        partition_key, row_count = row[0], row[1]
+        for i, (name, column_type) in enumerate(columns):
+            non_null, min_value, max_value, distinct, mean, histogram = row[2 + i * 6: 8 + i * 6]
+            profiles.append({
+                "partition_key": partition_key,
+                "column_name": name,
+                "column_type": column_type,
+                "row_count": row_count,
+                "null_count": row_count - non_null,
+                "min_value": min_value,
+                "max_value": max_value,
+                "mean_value": mean,
+                "approx_distinct": distinct,
+                "histogram": histogram,
+            })
+    return profiles
+
+
+def replace_profiles(conn, profile_table: str, table_name: str, partition_keys: list, profiles: list) -> None:
+    """
+    Replace the stored profiles of the given partitions of a table.
+
+    Partitions listed in partition_keys but absent from profiles (e.g. a
+    month that no longer has rows) are cleared. Runs in the caller's
+    transaction, if any.
+    """
+    delete_profiles(conn, profile_table, table_name, partition_keys)
+    if profiles:
+        conn.executemany(
+            f"""
+            INSERT INTO {profile_table} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            [
+                [
+                    table_name,
+                    p["partition_key"],
+                    p["column_name"],
+                    p["column_type"],
+                    p["row_count"],
+                    p["null_count"],
+                    p["min_value"],
+                    p["max_value"],
+                    p["mean_value"],
+                    p["approx_distinct"],
+                    p["histogram"],
+                ]
+                for p in profiles
+            ],
+        )
+
+
+def delete_profiles(conn, profile_table: str, table_name: str, partition_keys: list) -> None:
+    """Delete the stored profiles of the given partitions of a table."""
+    conn.execute(
+        f"DELETE FROM {profile_table} WHERE table_name = ? AND list_contains(?, partition_key)",
+        [table_name, partition_keys],
+    )
+
+
+def summarize_profiles(conn, profile_table: str, table_name: str, partition_keys: list = None) -> dict:
+    """
+    Merge stored partition profiles into one summary per column.
+
+    Row and null counts are summed, min/max are combined, and means are
+    weighted by each partition's non-null count. Approximate distinct
+    counts cannot be merged exactly, so the largest per-partition value is
+    reported as a lower bound.
+
+    Args:
+        conn: DuckDB connection
+        profile_table: Profile table to read
+        table_name: Profiled table name
+        partition_keys: Partitions to include (all partitions if None)
+
+    Returns:
+        Dict of column name to summary dict; empty if nothing was profiled
+    """
+    query = f"""
+        SELECT column_name, column_type, row_count, null_count,
+               min_value, max_value, mean_value, approx_distinct
+        FROM {profile_table}
+        WHERE table_name = ?
+    """
+    params = [table_name]
+    if partition_keys is not None:
+        query += " AND list_contains(?, partition_key)"
+        params.append(partition_keys)
+
+    summary = {}
+    for name, column_type, row_count, null_count, min_value, max_value, mean, distinct in conn.execute(
+        query, params
+    ).fetchall():
+        numeric = is_numeric_type(column_type)
+        as_key = (lambda v: float(v)) if numeric else (lambda v: v)
+        s = summary.setdefault(name, {
+            "column_type": column_type,
+            "row_count": 0,
+            "null_count": 0,
+            "min_value": None,
+            "max_value": None,
+            "mean_value": None,
+            "approx_distinct": None,
+            "_weighted_sum": 0.0,
+            "_non_null": 0,
+        })
+        s["row_count"] += row_count
+        s["null_count"] += null_count
+        if min_value is not None and (s["min_value"] is None or as_key(min_value) < as_key(s["min_value"])):
+            s["min_value"] = min_value
+        if max_value is not None and (s["max_value"] is None or as_key(max_value) > as_key(s["max_value"])):
+            s["max_value"] = max_value
+        if distinct is not None:
+            s["approx_distinct"] = max(s["approx_distinct"] or 0, distinct)
+        if mean is not None:
+            non_null = row_count - null_count
+            s["_weighted_sum"] += mean * non_null
+            s["_non_null"] += non_null
+
+    for s in summary.values():
+        if s["_non_null"]:
+            s["mean_value"] = s["_weighted_sum"] / s["_non_null"]
+        s["sum_value"] = s.pop("_weighted_sum") if s["mean_value"] is not None else None
+        s.pop("_non_null")
+    return summary
@@ -0,0 +1,239 @@
+"""
+Hot/cold storage tiering of the raw trip table for the proto_loc platform.
+
+raw_taxi_trips holds every month ever ingested, in raw.duckdb and (copy
+mode) again in dev.duckdb, so every load, copy and checkpoint pays for the
+whole history. With tiering, only the most recent pickup months stay in the
+DuckDB table (the hot tier). Older months are sealed into one
+zstd-compressed Parquet file per month under the archive directory
+(`raw_taxi_trips/<YYYY-MM-01>_<sealed at>.parquet`, the cold tier) and
+deleted from the table.
+
+Readers query the nyc_taxi_data.raw_taxi_trips_all view: the hot table
+UNION ALL BY NAME the sealed files. dbt's raw_taxi_trips source and the
+Cube raw_taxi_trips cube read the view, so they see the full history
+whichever tier a month is in.
+
+Key Design Principles:
+- Sealed files are immutable: written under a temporary name, renamed into
+  place and never rewritten. Re-ingesting a sealed month unseals it first
+  (its rows move back to the hot table) and a later run seals it anew
+- A tier manifest lists the sealed months and the views read exactly the
+  files it lists; the manifest change, the hot-table delete or insert and
+  the view change commit in one transaction, so a month is never missing
+  or read twice
+- Every database holding a copy of the hot table gets the same view
+"""
+
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from duckdb_resource import sql_literal
+from instrumentation import StepInstrumentation
+from parquet_export import DEFAULT_ROW_GROUP_SIZE
+
+HOT_TABLE = "nyc_taxi_data.raw_taxi_trips"
+UNIFIED_VIEW = "nyc_taxi_data.raw_taxi_trips_all"
+
+# Sealed months of raw_taxi_trips (one row per month), kept in raw.duckdb
+TIER_MANIFEST_TABLE = "nyc_taxi_data._storage_tiers"
+
+
+def ensure_tier_manifest(conn) -> None:
+    """Create the tier manifest table if it does not exist yet."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TIER_MANIFEST_TABLE} (
+            partition_month DATE,
+            file_path VARCHAR,
+            source_files VARCHAR[],
+            row_count BIGINT,
+            file_size BIGINT,
+            sealed_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+
+
+def read_tier_manifest(conn, catalog: str = None) -> dict:
+    """
+    Return {partition month "YYYY-MM-01": entry} of the sealed months.
+
+    Args:
+        conn: Connection holding the manifest, or attaching it as catalog
+        catalog: Name raw.duckdb is attached under, if not the connection's own database
+    """
+    table = f"{catalog}.{TIER_MANIFEST_TABLE}" if catalog else TIER_MANIFEST_TABLE
+    schema, name = TIER_MANIFEST_TABLE.split(".")
+    exists = conn.execute("""
+        SELECT COUNT(*) FROM duckdb_tables()
+        WHERE database_name = COALESCE(?, current_database()) AND schema_name = ? AND table_name = ?
+    """, [catalog, schema, name]).fetchone()[0]
+    if not exists:
+        return {}
+    return {
+        row[0].isoformat(): {
+            "file_path": row[1],
+            "source_files": row[2],
+            "row_count": row[3],
+            "file_size": row[4],
+        }
+        for row in conn.execute(f"""
+            SELECT partition_month, file_path, source_files, row_count, file_size
+            FROM {table}
+            ORDER BY partition_month
+        """).fetchall()
+    }
+
+
+def refresh_unified_view(conn, sealed: dict) -> None:
+    """
+    (Re)create raw_taxi_trips_all over the hot table and the given sealed months.
+
+    DuckDB binds a view's columns when it is created, so this also runs
+    after columns are added to the hot table. Views cannot take bound
+    parameters, so the file list is spliced in as quoted literals.
+    """
+    files = ", ".join(sql_literal(entry["file_path"]) for entry in sealed.values())
+    cold = f"UNION ALL BY NAME SELECT * FROM read_parquet([{files}], union_by_name = true)" if files else ""
+    conn.execute(f"CREATE OR REPLACE VIEW {UNIFIED_VIEW} AS SELECT * FROM {HOT_TABLE} {cold}")
+
+
+def cold_months(months: list, hot_months: int) -> list:
+    """
+    Return the months that fall out of the hot window.
+
+    The window is the hot_months most recent months up to the newest
+    ingested month (not the calendar), so replayed history tiers the same
+    way as live data. hot_months <= 0 disables tiering.
+    """
+    if hot_months <= 0 or not months:
+        return []
+    newest = date.fromisoformat(max(months))
+    # Newest month that is no longer hot, counted in months since year 0
+    index = newest.year * 12 + newest.month - 1 - hot_months
+    cutoff = date(index // 12, index % 12 + 1, 1)
+    return sorted(month for month in months if date.fromisoformat(month) <= cutoff)
+
+
+def seal_month(
+    conn,
+    archive_dir: str,
+    partition_month: str,
+    source_files: list,
+    instrumentation: StepInstrumentation = None,
+) -> dict:
+    """
+    Move one month of raw_taxi_trips from the hot table into a sealed Parquet file.
+
+    The month's rows (those of its source files) are written sorted by
+    pickup time, so the file's row-group statistics prune date filters.
+    The COPY is recorded in instrumentation as seal_raw_taxi_trips.
+
+    Returns:
+        The month's tier manifest entry
+    """
+    sealed_at = datetime.now(timezone.utc)
+    path = Path(archive_dir) / "raw_taxi_trips" / f"{partition_month}_{sealed_at:%Y%m%dT%H%M%S}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    instrumentation = instrumentation or StepInstrumentation()
+    row_count = instrumentation.execute(conn, "seal_raw_taxi_trips", f"""
+        COPY (
+            SELECT * FROM {HOT_TABLE}
+            WHERE list_contains(?, _source_file)
+            ORDER BY tpep_pickup_datetime
+        ) TO {sql_literal(tmp_path)} (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {DEFAULT_ROW_GROUP_SIZE})
+    """, [source_files])
+    os.replace(tmp_path, path)
+    entry = {
+        "file_path": str(path),
+        "source_files": source_files,
+        "row_count": row_count,
+        "file_size": path.stat().st_size,
+    }
+
+    conn.begin()
+    try:
+        conn.execute(f"DELETE FROM {HOT_TABLE} WHERE list_contains(?, _source_file)", [source_files])
+        conn.execute(f"""
+            INSERT INTO {TIER_MANIFEST_TABLE}
+                (partition_month, file_path, source_files, row_count, file_size, sealed_at)
+            VALUES (CAST(? AS DATE), ?, ?, ?, ?, ?)
+        """, [partition_month, entry["file_path"], source_files, row_count, entry["file_size"], sealed_at])
+        refresh_unified_view(conn, read_tier_manifest(conn))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        path.unlink(missing_ok=True)
+        raise
+    return entry
+
+
+def unseal_month(conn, partition_month: str) -> int:
+    """
+    Move a sealed month back into the hot table, e.g. before its files are re-ingested.
+
+    The Parquet file is left in place for databases whose view still reads
+    it; remove_unsealed_files deletes it once they are refreshed.
+
+    Returns:
+        Number of rows moved back, or 0 if the month was not sealed
+    """
+    entry = read_tier_manifest(conn).get(partition_month)
+    if entry is None:
+        return 0
+    conn.begin()
+    try:
+        conn.execute(f"INSERT INTO {HOT_TABLE} BY NAME SELECT * FROM read_parquet(?)", [entry["file_path"]])
+        conn.execute(f"DELETE FROM {TIER_MANIFEST_TABLE} WHERE partition_month = CAST(? AS DATE)", [partition_month])
+        refresh_unified_view(conn, read_tier_manifest(conn))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return entry["row_count"]
+
+
+def sync_hot_copy(conn, sealed: dict) -> int:
+    """
+    Align a copy of the hot table (dev.duckdb in copy mode) with the sealed months.
+
+    Rows of sealed months are deleted and the view is pointed at the sealed
+    files in one transaction.
+
+    Returns:
+        Number of rows deleted from the copy
+    """
+    source_files = [path for entry in sealed.values() for path in entry["source_files"]]
+    conn.begin()
+    try:
+        deleted = conn.execute(
+            f"DELETE FROM {HOT_TABLE} WHERE list_contains(?, _source_file)", [source_files]
+        ).fetchone()[0]
+        refresh_unified_view(conn, sealed)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return deleted
+
+
+def remove_unsealed_files(archive_dir: str, sealed: dict) -> list:
+    """
+    Delete archive files that are no longer in the tier manifest.
+
+    Only safe once every view reading the archive has been refreshed.
+
+    Returns:
+        Paths of the deleted files
+    """
+    directory = Path(archive_dir) / "raw_taxi_trips"
+    if not directory.exists():
+        return []
+    listed = {entry["file_path"] for entry in sealed.values()}
+    removed = []
+    for path in directory.glob("*.parquet"):
+        if str(path) not in listed:
+            path.unlink()
+            removed.append(str(path))
+    return removed
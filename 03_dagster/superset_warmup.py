@@ -0,0 +1,163 @@
+"""
+Superset data cache warm-up for the proto_loc platform.
+
+Superset caches chart results in Redis (DATA_CACHE_CONFIG, 24h), but every
+pipeline run changes the underlying data and the first viewer of each
+dashboard pays for the cold queries. After a run, every chart on every
+dashboard is replayed through the Superset API so its results are cached
+before anyone opens the dashboards.
+
+Charts are replayed through their saved query context
+(GET /api/v1/chart/<id>/data/) with force=true, so each result is recomputed
+from the freshly loaded data and re-cached; without it, a result cached
+before the run would be served back unchanged. Charts saved before query
+contexts existed fall back to Superset's warm_up_cache endpoint, which also
+recomputes.
+
+Key Design Principles:
+- Bounded concurrency, so warming never floods Superset or DuckDB
+- Per-chart failures are reported, never fatal to the warm-up
+- Each chart is replayed once, however many dashboards show it
+"""
+
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dagster import ConfigurableResource
+
+# Dashboards requested per page when listing them
+PAGE_SIZE = 100
+
+
+class SupersetClient(ConfigurableResource):
+    """Minimal Superset REST API client authenticated as a database user."""
+
+    base_url: str = "http://superset:8088"
+    username: str = "admin"
+    password: str = "admin"
+    # Seconds allowed per request; chart queries run against DuckDB
+    request_timeout: float = 300.0
+
+    def login(self) -> requests.Session:
+        """
+        Return a session authenticated with an access token and CSRF token.
+
+        The session cookie from the CSRF request must accompany PUT/POST
+        requests, so one session is shared by all requests of a warm-up.
+        """
+        session = requests.Session()
+        response = session.post(
+            f"{self.base_url}/api/v1/security/login",
+            json={"username": self.username, "password": self.password, "provider": "db", "refresh": False},
+            timeout=self.request_timeout,
+        )
+        response.raise_for_status()
+        session.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        response = session.get(f"{self.base_url}/api/v1/security/csrf_token/", timeout=self.request_timeout)
+        response.raise_for_status()
+        session.headers["X-CSRFToken"] = response.json()["result"]
+        session.headers["Referer"] = self.base_url
+        return session
+
+    def list_dashboards(self, session: requests.Session) -> list:
+        """Return [(id, title)] of every dashboard."""
+        dashboards = []
+        page = 0
+        while True:
+            response = session.get(
+                f"{self.base_url}/api/v1/dashboard/",
+                params={"q": f"(columns:!(id,dashboard_title),page:{page},page_size:{PAGE_SIZE})"},
+                timeout=self.request_timeout,
+            )
+            response.raise_for_status()
+            body = response.json()
+            dashboards.extend((d["id"], d["dashboard_title"]) for d in body["result"])
+            page += 1
+            if page * PAGE_SIZE >= body["count"]:
+                return dashboards
+
+    def dashboard_charts(self, session: requests.Session, dashboard_id: int) -> list:
+        """Return [(id, name)] of the charts on a dashboard."""
+        response = session.get(
+            f"{self.base_url}/api/v1/dashboard/{dashboard_id}/charts",
+            timeout=self.request_timeout,
+        )
+        response.raise_for_status()
+        return [(chart["id"], chart["slice_name"]) for chart in response.json()["result"]]
+
+    def warm_chart(self, session: requests.Session, chart_id: int, dashboard_id: int) -> None:
+        """Recompute one chart's queries, bypassing results cached before the run, and cache them."""
+        response = session.get(
+            f"{self.base_url}/api/v1/chart/{chart_id}/data/",
+            params={"format": "json", "type": "full", "force": "true"},
+            timeout=self.request_timeout,
+        )
+        if response.status_code == 400:
+            # No saved query context (legacy chart); let Superset build the query
+            response = session.put(
+                f"{self.base_url}/api/v1/chart/warm_up_cache",
+                json={"chart_id": chart_id, "dashboard_id": dashboard_id},
+                timeout=self.request_timeout,
+            )
+            response.raise_for_status()
+            errors = [r["viz_error"] for r in response.json()["result"] if r.get("viz_error")]
+            if errors:
+                raise RuntimeError("; ".join(errors))
+            return
+        response.raise_for_status()
+
+
+def warm_up_dashboards(client: SupersetClient, concurrency: int, log=None) -> dict:
+    """
+    Replay every dashboard chart through the Superset API with bounded concurrency.
+
+    Args:
+        client: Superset API client
+        concurrency: Maximum charts replayed at once
+        log: Optional logger for per-chart failures
+
+    Returns:
+        Warm-up statistics: dashboard/chart counts, errors and chart timings
+    """
+    start = time.perf_counter()
+    session = client.login()
+
+    # chart id -> (name, first dashboard showing it)
+    charts = {}
+    dashboards = client.list_dashboards(session)
+    for dashboard_id, _ in dashboards:
+        for chart_id, chart_name in client.dashboard_charts(session, dashboard_id):
+            charts.setdefault(chart_id, (chart_name, dashboard_id))
+
+    def warm(item):
+        chart_id, (chart_name, dashboard_id) = item
+        chart_start = time.perf_counter()
+        try:
+            client.warm_chart(session, chart_id, dashboard_id)
+            return chart_name, time.perf_counter() - chart_start, None
+        except Exception as e:
+            return chart_name, time.perf_counter() - chart_start, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        results = list(executor.map(warm, charts.items()))
+
+    timings = [seconds for _, seconds, error in results if error is None]
+    errors = [(name, error) for name, _, error in results if error is not None]
+    if log is not None:
+        for name, error in errors:
+            log.warning(f"Chart '{name}' failed to warm: {error}")
+
+    slowest = max(results, key=lambda r: r[1], default=None)
+    return {
+        "dashboards": len(dashboards),
+        "charts": len(charts),
+        "charts_warmed": len(timings),
+        "errors": len(errors),
+        "chart_seconds_p50": round(statistics.median(timings), 3) if timings else None,
+        "chart_seconds_max": round(max(timings), 3) if timings else None,
+        "slowest_chart": slowest[0] if slowest else None,
+        "total_seconds": round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,13 @@
+"""
+Shared pytest setup for the Dagster code.
+
+Modules are imported the way the code location imports them (flat, from
+03_dagster), so the tests run from a checkout with `python -m pytest
+03_dagster/tests`. Importing definitions parses the dbt project
+(DBT_PROJECT_DIR, default ../04_dbt) unless its manifest is current.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
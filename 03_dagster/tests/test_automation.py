@@ -0,0 +1,53 @@
+"""Automation conditions of the monthly trip assets."""
+
+from dagster import (
+    AssetKey,
+    AutomationCondition,
+    DagsterInstance,
+    Definitions,
+    asset,
+    evaluate_automation_conditions,
+    materialize,
+)
+
+import definitions
+from definitions import UPSTREAM_UPDATED, monthly_partitions
+
+# A month that is not the latest partition, so in_latest_time_window() excludes it
+PAST_MONTH = monthly_partitions.get_partition_keys()[0]
+
+
+def requested_after_upstream_update(condition) -> set:
+    """Materialize PAST_MONTH upstream and return the downstream partitions the condition requests."""
+
+    @asset(partitions_def=monthly_partitions)
+    def upstream() -> None:
+        pass
+
+    @asset(partitions_def=monthly_partitions, deps=[upstream], automation_condition=condition)
+    def downstream() -> None:
+        pass
+
+    defs = Definitions(assets=[upstream, downstream])
+    instance = DagsterInstance.ephemeral()
+    result = evaluate_automation_conditions(defs=defs, instance=instance)
+    assert result.total_requested == 0
+
+    assert materialize([upstream], partition_key=PAST_MONTH, instance=instance).success
+    result = evaluate_automation_conditions(defs=defs, instance=instance, cursor=result.cursor)
+    return set(result.get_requested_partitions(AssetKey("downstream")))
+
+
+def test_upstream_updated_requests_past_month():
+    assert requested_after_upstream_update(UPSTREAM_UPDATED) == {PAST_MONTH}
+
+
+def test_eager_ignores_past_month():
+    # The reason UPSTREAM_UPDATED exists: eager() only considers the latest month
+    assert requested_after_upstream_update(AutomationCondition.eager()) == set()
+
+
+def test_trip_assets_rebuild_any_month():
+    graph = definitions.defs.resolve_asset_graph()
+    assert graph.get(AssetKey("export_analytics_parquet")).automation_condition == UPSTREAM_UPDATED
+    assert UPSTREAM_UPDATED in graph.get(AssetKey("fct_taxi_trips")).automation_condition.children
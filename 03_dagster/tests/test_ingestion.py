@@ -0,0 +1,85 @@
+"""File manifest planning of the raw trip ingestion."""
+
+import os
+
+import duckdb
+
+from definitions import (
+    INGEST_MANIFEST_TABLE,
+    ensure_ingest_manifest,
+    file_content_hash,
+    plan_file_ingestion,
+    read_ingest_manifest,
+)
+
+
+def write_file(path, content: bytes, mtime: float = None):
+    path.write_bytes(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def manifest_entry(path) -> tuple:
+    """(size, mtime, content_hash) of a file as ingestion records it."""
+    stat = path.stat()
+    return (stat.st_size, stat.st_mtime, file_content_hash(path))
+
+
+def paths(entries: list) -> list:
+    return [entry[0] for entry in entries]
+
+
+def test_plan_classifies_files_against_manifest(tmp_path):
+    unchanged = write_file(tmp_path / "unchanged.parquet", b"same")
+    touched = write_file(tmp_path / "touched.parquet", b"same bytes")
+    changed = write_file(tmp_path / "changed.parquet", b"old bytes")
+    manifest = {
+        str(unchanged): manifest_entry(unchanged),
+        str(touched): manifest_entry(touched),
+        str(changed): manifest_entry(changed),
+        str(tmp_path / "removed.parquet"): (4, 1.0, "0" * 64),
+    }
+
+    # Rewritten with identical contents: only the mtime moves
+    write_file(touched, b"same bytes", mtime=touched.stat().st_mtime + 10)
+    # Same size, new contents and mtime: only the hash tells them apart
+    write_file(changed, b"new bytes", mtime=changed.stat().st_mtime + 10)
+    new = write_file(tmp_path / "new.parquet", b"new")
+
+    plan = plan_file_ingestion(manifest, [unchanged, touched, changed, new])
+
+    assert paths(plan["unchanged"]) == [str(unchanged)]
+    assert paths(plan["touched"]) == [str(touched)]
+    assert paths(plan["changed"]) == [str(changed)]
+    assert paths(plan["new"]) == [str(new)]
+    assert plan["removed"] == [str(tmp_path / "removed.parquet")]
+    assert plan["changed"][0][3] == file_content_hash(changed)
+
+
+def test_unchanged_files_are_not_hashed(tmp_path, monkeypatch):
+    path = write_file(tmp_path / "trips.parquet", b"contents")
+    manifest = {str(path): manifest_entry(path)}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged file was hashed")
+
+    monkeypatch.setattr("definitions.file_content_hash", fail)
+    plan = plan_file_ingestion(manifest, [path])
+    assert plan["unchanged"] == [(str(path), *manifest[str(path)])]
+
+
+def test_read_ingest_manifest_returns_one_partition(tmp_path):
+    conn = duckdb.connect(str(tmp_path / "raw.duckdb"))
+    conn.execute("CREATE SCHEMA nyc_taxi_data")
+    ensure_ingest_manifest(conn)
+    conn.execute(f"""
+        INSERT INTO {INGEST_MANIFEST_TABLE}
+            (file_path, file_size, file_mtime, content_hash, row_count, ingested_at, partition_month)
+        VALUES
+            ('/data/a.parquet', 10, 1.5, 'aa', 3, CURRENT_TIMESTAMP, DATE '2024-01-01'),
+            ('/data/b.parquet', 20, 2.5, 'bb', 4, CURRENT_TIMESTAMP, DATE '2024-02-01')
+    """)
+
+    assert read_ingest_manifest(conn, "2024-01-01") == {"/data/a.parquet": (10, 1.5, "aa")}
+    conn.close()
@@ -0,0 +1,93 @@
+"""Blue/green publishing of dev to prod.duckdb."""
+
+import duckdb
+import pytest
+
+import prod_publish
+from prod_publish import PUBLICATION_TABLE, build_snapshot, previous_path, rollback, snapshot_path, swap_in
+
+
+@pytest.fixture(autouse=True)
+def no_required_extensions(monkeypatch):
+    """The fixture databases need no extensions, so none are LOADed."""
+    monkeypatch.setattr(prod_publish, "REQUIRED_EXTENSIONS", [])
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """dev.duckdb with a mart, a view over it and a partial raw copy, and raw.duckdb with the raw schema."""
+    raw_path, dev_path = tmp_path / "raw.duckdb", tmp_path / "dev.duckdb"
+    with duckdb.connect(str(raw_path)) as conn:
+        conn.execute("CREATE SCHEMA nyc_taxi_data")
+        conn.execute("CREATE TABLE nyc_taxi_data.raw_taxi_trips AS SELECT range AS trip_id FROM range(10)")
+        conn.execute("CREATE VIEW nyc_taxi_data.raw_taxi_trips_all AS SELECT * FROM nyc_taxi_data.raw_taxi_trips")
+    with duckdb.connect(str(dev_path)) as conn:
+        conn.execute("CREATE SCHEMA nyc_taxi_data")
+        conn.execute("CREATE TABLE nyc_taxi_data.raw_taxi_trips AS SELECT range AS trip_id FROM range(3)")
+        conn.execute("CREATE TABLE main.fct_trips AS SELECT range AS trip_id, range % 2 AS vendor FROM range(6)")
+        conn.execute("CREATE INDEX fct_trips_vendor_idx ON main.fct_trips (vendor)")
+        conn.execute('CREATE VIEW main.vendor_trips AS SELECT vendor, COUNT(*) AS n FROM dev.main."fct_trips" GROUP BY 1')
+    return dev_path, raw_path
+
+
+def publish(dev_path, raw_path, prod_path) -> dict:
+    snapshot = snapshot_path(prod_path)
+    published = build_snapshot(str(dev_path), snapshot, raw_path=str(raw_path))
+    swap_in(snapshot, str(prod_path))
+    return published
+
+
+def test_build_snapshot_publishes_dev_and_raw_schema(sources, tmp_path):
+    dev_path, raw_path = sources
+    prod_path = tmp_path / "prod.duckdb"
+    published = publish(dev_path, raw_path, prod_path)
+
+    assert published["tables"] == {"main.fct_trips": 6, "nyc_taxi_data.raw_taxi_trips": 10}
+    assert sorted(published["views"]) == ["main.vendor_trips", "nyc_taxi_data.raw_taxi_trips_all"]
+    assert published["indexes"] == ["main.fct_trips_vendor_idx"]
+    with duckdb.connect(str(prod_path), read_only=True) as conn:
+        # Views resolve inside prod, not against the dev catalog they were defined in
+        assert conn.execute("SELECT SUM(n) FROM main.vendor_trips").fetchone() == (6,)
+        # The raw schema comes from raw.duckdb, not dev's partial copy
+        assert conn.execute("SELECT COUNT(*) FROM nyc_taxi_data.raw_taxi_trips_all").fetchone() == (10,)
+        assert conn.execute(f"SELECT COUNT(*) FROM {PUBLICATION_TABLE}").fetchone() == (1,)
+    assert not snapshot_path(prod_path).exists()
+
+
+def test_swap_in_keeps_previous_generation_and_rollback_restores_it(sources, tmp_path):
+    dev_path, raw_path = sources
+    prod_path = tmp_path / "prod.duckdb"
+    publish(dev_path, raw_path, prod_path)
+    assert not previous_path(prod_path).exists()
+
+    with duckdb.connect(str(dev_path)) as conn:
+        conn.execute("INSERT INTO main.fct_trips VALUES (6, 0)")
+    publish(dev_path, raw_path, prod_path)
+
+    def fct_rows(path):
+        with duckdb.connect(str(path), read_only=True) as conn:
+            return conn.execute("SELECT COUNT(*) FROM main.fct_trips").fetchone()[0]
+
+    assert (fct_rows(prod_path), fct_rows(previous_path(prod_path))) == (7, 6)
+
+    rollback(str(prod_path))
+    assert (fct_rows(prod_path), fct_rows(previous_path(prod_path))) == (6, 7)
+
+    # Rolling back again swaps the generations back
+    rollback(str(prod_path))
+    assert fct_rows(prod_path) == 7
+
+
+def test_rollback_without_previous_generation_fails(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        rollback(str(tmp_path / "prod.duckdb"))
+
+
+def test_interrupted_snapshot_is_discarded(sources, tmp_path):
+    dev_path, raw_path = sources
+    prod_path = tmp_path / "prod.duckdb"
+    snapshot_path(prod_path).write_bytes(b"partial publish")
+
+    publish(dev_path, raw_path, prod_path)
+    with duckdb.connect(str(prod_path), read_only=True) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM main.fct_trips").fetchone() == (6,)
@@ -0,0 +1,101 @@
+"""Settle check and month detection of the source file sensor."""
+
+import duckdb
+import pytest
+
+import definitions
+from definitions import (
+    INGEST_MANIFEST_TABLE,
+    PARQUET_MAGIC,
+    SOURCE_SETTLE_SECONDS,
+    DuckDBConnectionManager,
+    ensure_ingest_manifest,
+    read_file_months,
+    sensor_file_months,
+    source_file_is_settled,
+    trip_file_partition_month,
+)
+
+NOW = 1_800_000_000.0
+SETTLED = NOW - SOURCE_SETTLE_SECONDS - 1
+
+
+def write_trips(path, month: str):
+    """Write a small trip file whose pickups all fall in month ("YYYY-MM")."""
+    with duckdb.connect() as conn:
+        conn.execute(f"""
+            COPY (
+                SELECT TIMESTAMP '{month}-03 10:00' + INTERVAL (i) MINUTE AS tpep_pickup_datetime
+                FROM range(5) t(i)
+            ) TO '{path}' (FORMAT PARQUET)
+        """)
+    return path
+
+
+def test_recently_modified_file_is_not_settled(tmp_path):
+    path = write_trips(tmp_path / "yellow_tripdata_2024-01.parquet", "2024-01")
+    assert not source_file_is_settled(path, NOW - 1, NOW)
+    assert source_file_is_settled(path, SETTLED, NOW)
+
+
+@pytest.mark.parametrize("content", [b"", b"PA", b"PAR1 partial copy"])
+def test_parquet_without_footer_is_not_settled(tmp_path, content):
+    path = tmp_path / "yellow_tripdata_2024-01.parquet"
+    path.write_bytes(content)
+    assert not source_file_is_settled(path, SETTLED, NOW)
+
+
+def test_other_files_only_need_to_settle(tmp_path):
+    path = tmp_path / "taxi_zone_lookup.csv"
+    path.write_text("LocationID,Borough\n")
+    assert source_file_is_settled(path, SETTLED, NOW)
+
+
+def test_parquet_with_footer_is_settled(tmp_path):
+    path = tmp_path / "yellow_tripdata_2024-01.parquet"
+    path.write_bytes(b"row groups" + PARQUET_MAGIC)
+    assert source_file_is_settled(path, SETTLED, NOW)
+
+
+def test_month_comes_from_file_name(tmp_path):
+    path = write_trips(tmp_path / "yellow_tripdata_2024-03.parquet", "2024-01")
+    assert trip_file_partition_month(path) == "2024-03-01"
+
+
+def test_unnamed_file_month_is_reused_until_the_file_changes(tmp_path, monkeypatch):
+    path = write_trips(tmp_path / "trips.parquet", "2024-02")
+    assert trip_file_partition_month(path) == "2024-02-01"
+
+    conn = duckdb.connect(str(tmp_path / "raw.duckdb"))
+    conn.execute("CREATE SCHEMA nyc_taxi_data")
+    ensure_ingest_manifest(conn)
+    stat = path.stat()
+    conn.execute(f"""
+        INSERT INTO {INGEST_MANIFEST_TABLE} (file_path, file_size, file_mtime, partition_month)
+        VALUES (?, ?, ?, DATE '2024-02-01')
+    """, [str(path), stat.st_size, stat.st_mtime])
+    known_months = read_file_months(conn)
+    conn.close()
+    assert known_months == {str(path): (stat.st_size, stat.st_mtime, "2024-02-01")}
+    assert sensor_file_months(DuckDBConnectionManager(raw_path=str(tmp_path / "raw.duckdb"))) == known_months
+
+    scans = []
+    execute = definitions.duckdb.execute
+    monkeypatch.setattr(definitions.duckdb, "execute", lambda *args: scans.append(args) or execute(*args))
+    assert trip_file_partition_month(path, known_months) == "2024-02-01"
+    assert scans == []
+
+    # A rewritten file is scanned again
+    write_trips(path, "2024-04")
+    assert trip_file_partition_month(path, known_months) == "2024-04-01"
+    assert len(scans) == 1
+
+
+def test_sensor_scans_when_raw_is_missing_or_busy(tmp_path, monkeypatch):
+    manager = DuckDBConnectionManager(raw_path=str(tmp_path / "raw.duckdb"))
+    assert sensor_file_months(manager) == {}
+
+    duckdb.connect(manager.raw_path).close()
+    monkeypatch.setattr(definitions, "SENSOR_LEASE_TIMEOUT", 0.2)
+    with manager.lease("raw", exclusive=True):
+        assert sensor_file_months(manager) == {}
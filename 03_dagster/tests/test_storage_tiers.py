@@ -0,0 +1,78 @@
+"""Hot/cold tiering of raw_taxi_trips."""
+
+import duckdb
+import pytest
+
+from storage_tiers import (
+    HOT_TABLE,
+    UNIFIED_VIEW,
+    cold_months,
+    ensure_tier_manifest,
+    read_tier_manifest,
+    refresh_unified_view,
+    remove_unsealed_files,
+    seal_month,
+    unseal_month,
+)
+
+
+@pytest.mark.parametrize("months, hot_months, expected", [
+    (["2024-01-01", "2024-02-01", "2024-03-01"], 2, ["2024-01-01"]),
+    (["2023-11-01", "2023-12-01", "2024-01-01"], 1, ["2023-11-01", "2023-12-01"]),
+    # The window ends at the newest ingested month, gaps included
+    (["2023-01-01", "2024-06-01"], 3, ["2023-01-01"]),
+    (["2024-01-01", "2024-02-01"], 2, []),
+    (["2024-01-01", "2024-02-01"], 0, []),
+    ([], 3, []),
+])
+def test_cold_months(months, hot_months, expected):
+    assert cold_months(months, hot_months) == expected
+
+
+@pytest.fixture
+def raw_conn(tmp_path):
+    """raw.duckdb with two months of trips, one source file each, and an empty tier manifest."""
+    conn = duckdb.connect(str(tmp_path / "raw.duckdb"))
+    conn.execute("CREATE SCHEMA nyc_taxi_data")
+    conn.execute(f"""
+        CREATE TABLE {HOT_TABLE} AS
+        SELECT
+            TIMESTAMP '2024-01-01' + INTERVAL (i) HOUR + INTERVAL (31 * (i % 2)) DAY AS tpep_pickup_datetime,
+            i AS trip_id,
+            CASE WHEN i % 2 = 0 THEN 'jan.parquet' ELSE 'feb.parquet' END AS _source_file
+        FROM range(100, 0, -1) t(i)
+    """)
+    ensure_tier_manifest(conn)
+    refresh_unified_view(conn, {})
+    yield conn
+    conn.close()
+
+
+def test_seal_month_moves_rows_to_sorted_parquet(raw_conn, tmp_path):
+    archive = tmp_path / "archive"
+    entry = seal_month(raw_conn, str(archive), "2024-01-01", ["jan.parquet"])
+
+    assert entry["row_count"] == 50
+    assert raw_conn.execute(f"SELECT COUNT(*) FROM {HOT_TABLE} WHERE _source_file = 'jan.parquet'").fetchone() == (0,)
+    assert read_tier_manifest(raw_conn)["2024-01-01"]["file_path"] == entry["file_path"]
+    assert raw_conn.execute(f"SELECT COUNT(*), SUM(trip_id) FROM {UNIFIED_VIEW}").fetchone() == (100, 5050)
+
+    # Sealed rows are sorted by pickup time so row-group statistics prune date filters
+    pickups = [row[0] for row in raw_conn.execute(
+        "SELECT tpep_pickup_datetime FROM read_parquet(?)", [entry["file_path"]]
+    ).fetchall()]
+    assert pickups == sorted(pickups)
+
+
+def test_unseal_month_restores_hot_rows(raw_conn, tmp_path):
+    archive = tmp_path / "archive"
+    entry = seal_month(raw_conn, str(archive), "2024-01-01", ["jan.parquet"])
+
+    assert unseal_month(raw_conn, "2024-01-01") == 50
+    assert unseal_month(raw_conn, "2024-01-01") == 0
+    assert read_tier_manifest(raw_conn) == {}
+    assert raw_conn.execute(f"SELECT COUNT(*) FROM {HOT_TABLE}").fetchone() == (100,)
+    assert raw_conn.execute(f"SELECT COUNT(*) FROM {UNIFIED_VIEW}").fetchone() == (100,)
+
+    # The file outlives the unseal until views are refreshed, then it is removed
+    assert remove_unsealed_files(str(archive), read_tier_manifest(raw_conn)) == [entry["file_path"]]
@@ -0,0 +1,22 @@
+{#
+  ORDER BY clause that physically clusters a trip model for zonemap pruning.
+
+  DuckDB keeps min/max statistics per row group (~122k rows) and skips row
+  groups a filter cannot match. Writing rows sorted by pickup date, then
+  pickup location, makes each row group cover a narrow date (and zone)
+  range, so date-sliced dashboard queries read only their dates' row groups.
+
+  Incremental runs erode the order: delete+insert appends each re-inserted
+  month (sorted) behind the existing rows, starting in the partly filled
+  last row group, and deleted rows keep counting in their old row groups'
+  min/max. Dagster measures the share of out-of-order row groups after
+  each run and re-sorts the table past a threshold
+  (CLUSTER_MAX_OUT_OF_ORDER_RATIO); full refreshes rebuild it sorted.
+
+  Disabled with the cluster_trip_models var (Dagster: DbtTransformationConfig.cluster).
+#}
+{% macro cluster_order_by(columns) %}
+  {%- if var('cluster_trip_models', true) -%}
+  ORDER BY {{ columns | join(', ') }}
+  {%- endif -%}
+{% endmacro %}
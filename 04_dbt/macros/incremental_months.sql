@@ -0,0 +1,43 @@
+{#
+  Predicate selecting the pickup months an incremental trip model rebuilds.
+
+  Trip models are incremental with delete+insert on pickup_month_start, so
+  every selected month is replaced as a whole. Months are chosen from:
+  - the partition_start / partition_end vars (month start dates, end
+    exclusive) passed by Dagster for the partitions being materialized, or
+  - otherwise, every month containing rows ingested after the newest
+    _ingested_at already in the model (a replaced source file gets a new
+    _ingested_at, so its months are rebuilt).
+
+  Run with --full-refresh to rebuild all history.
+#}
+{% macro incremental_months_filter(source_relation, month_column='pickup_month_start') %}
+  {%- if var('partition_start', none) and var('partition_end', none) -%}
+    {{ month_column }} >= DATE '{{ var("partition_start") }}'
+    AND {{ month_column }} < DATE '{{ var("partition_end") }}'
+  {%- else -%}
+    {{ month_column }} IN (
+      SELECT DISTINCT {{ month_column.split('.')[-1] }}
+      FROM {{ source_relation }}
+      WHERE _ingested_at > (SELECT COALESCE(MAX(_ingested_at), TIMESTAMPTZ '1970-01-01') FROM {{ this }})
+    )
+  {%- endif -%}
+{% endmacro %}
+
+{#
+  Pre-hook deleting the run's partition window (partition_start /
+  partition_end vars) from an incremental trip model.
+
+  delete+insert only deletes the months present in the new batch, so a
+  month whose source files were all removed would keep its old rows
+  forever. Deleting the whole window first (in the same transaction as the
+  insert) empties such months. Runs without the vars rebuild only months
+  with newly ingested rows; use the vars or --full-refresh after removals.
+#}
+{% macro delete_partition_window(month_column='pickup_month_start') %}
+  {%- if is_incremental() and var('partition_start', none) and var('partition_end', none) -%}
+    DELETE FROM {{ this }}
+    WHERE {{ month_column }} >= DATE '{{ var("partition_start") }}'
+      AND {{ month_column }} < DATE '{{ var("partition_end") }}'
+  {%- endif -%}
+{% endmacro %}
@@ -0,0 +1,97 @@
+{#
+  Reproducible stratified sample of the trip fact for interactive exploration.
+
+  Within every stratum (pickup month x pickup borough) trips are ordered by
+  a hash of their own values (sample_hash), and the first
+  CEIL(stratum_rows * fraction) are kept. Each stratum is sampled at the
+  same rate, even small ones (every non-empty stratum keeps at least one
+  trip), and the same data always yields the same sample.
+
+  Only the stratum keys and hashes are ranked, to find each stratum's
+  cutoff hash; the wide trip rows are then filtered against it instead of
+  being sorted. Trips sharing a hash (duplicate trips, or collisions) are
+  ordered by the hashed columns, and only the rows up to the stratum's
+  quota are kept, so a tie at the cutoff never overfills it.
+
+  Samples are nested: a sample taken from a coarser sample (parent_fraction
+  set) keeps the first rows of the parent's hash order, which are exactly
+  the rows a ranking of the full fact would keep.
+
+  Added columns:
+  - sample_hash: the trip's position key within its stratum
+  - stratum_rows: trips in the stratum in fct_taxi_trips (N_h)
+  - stratum_sample_rows: trips of the stratum in this sample (n_h)
+  - sample_fraction: nominal sampling fraction
+  - scaling_factor: N_h / n_h; SUM(scaling_factor) estimates counts and
+    SUM(x * scaling_factor) estimates totals of x
+#}
+{% macro stratified_sample(source_relation, fraction, parent_fraction=none, strata=['pickup_month_start', 'pickup_borough']) %}
+{%- set sample_key = [
+  'VendorID', 'tpep_pickup_datetime', 'tpep_dropoff_datetime', 'PULocationID', 'DOLocationID',
+  'passenger_count', 'trip_distance', 'total_amount'
+] -%}
+WITH source AS (
+  SELECT
+    {% if parent_fraction is none -%}
+    *,
+    hash({{ sample_key | join(', ') }}) AS sample_hash
+    {%- else -%}
+    -- Parent sample of {{ parent_fraction }}: stratum_rows still counts the full stratum
+    * EXCLUDE (stratum_sample_rows, sample_fraction, scaling_factor)
+    {%- endif %}
+  FROM {{ source_relation }}
+  {% if is_incremental() %}
+  -- Only resample the months selected for this run
+  WHERE {{ incremental_months_filter(source_relation) }}
+  {% endif %}
+),
+
+-- Hash of the last trip kept in each stratum, and the stratum's quota
+cutoffs AS (
+  SELECT {{ strata | join(', ') }}, stratum_rows, sample_position AS quota, sample_hash AS cutoff_hash
+  FROM (
+    SELECT
+      {{ strata | join(', ') }},
+      sample_hash,
+      {% if parent_fraction is none -%}
+      COUNT(*) OVER stratum AS stratum_rows,
+      {%- else -%}
+      stratum_rows,
+      {%- endif %}
+      ROW_NUMBER() OVER (stratum ORDER BY sample_hash) AS sample_position
+    FROM source
+    WINDOW stratum AS (PARTITION BY {{ strata | join(', ') }})
+  )
+  WHERE sample_position = CEIL(stratum_rows * {{ fraction }})
+),
+
+-- Trips up to the cutoff hash, trimmed to the quota where trips tie on it
+sampled AS (
+  SELECT * EXCLUDE (quota, sample_position)
+  FROM (
+    SELECT
+      s.*,
+      {% if parent_fraction is none -%}
+      c.stratum_rows,
+      {% endif -%}
+      c.quota,
+      ROW_NUMBER() OVER (
+        PARTITION BY {% for column in strata %}s.{{ column }}{% if not loop.last %}, {% endif %}{% endfor %}
+        ORDER BY s.sample_hash, {% for column in sample_key %}s.{{ column }}{% if not loop.last %}, {% endif %}{% endfor %}
+      ) AS sample_position
+    FROM source s
+    JOIN cutoffs c
+      ON {% for column in strata %}s.{{ column }} IS NOT DISTINCT FROM c.{{ column }}{% if not loop.last %} AND {% endif %}{% endfor %}
+    WHERE s.sample_hash <= c.cutoff_hash
+  )
+  WHERE sample_position <= quota
+)
+
+SELECT
+  *,
+  COUNT(*) OVER (PARTITION BY {{ strata | join(', ') }}) AS stratum_sample_rows,
+  CAST({{ fraction }} AS DOUBLE) AS sample_fraction,
+  stratum_rows / COUNT(*) OVER (PARTITION BY {{ strata | join(', ') }}) AS scaling_factor
+FROM sampled
+{{ cluster_order_by(['pickup_date', 'pickup_borough', 'PULocationID']) }}
+{% endmacro %}
@@ -0,0 +1,42 @@
+-- Hourly trip, revenue and tip totals per pickup zone
+-- Built from fct_taxi_trips and maintained per pickup month like the trip
+-- models, so dashboards read one row per zone-hour instead of every trip.
+-- Only additive measures are stored; derive averages as sum / trip_count.
+
+{{ config(
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_month_start',
+    pre_hook="{{ delete_partition_window() }}",
+    on_schema_change='append_new_columns'
+) }}
+
+SELECT
+    -- Grain: pickup hour x pickup zone
+    pickup_month_start,
+    pickup_date,
+    pickup_hour,
+    pickup_day_of_week,
+    PULocationID AS pickup_location_id,
+    pickup_zone,
+    pickup_borough,
+    
+    -- Additive measures
+    COUNT(*) AS trip_count,
+    SUM(passenger_count) AS passenger_count,
+    SUM(trip_distance) AS trip_distance,
+    SUM(trip_duration_minutes) AS trip_duration_minutes,
+    SUM(fare_amount) AS fare_amount,
+    SUM(tip_amount) AS tip_amount,
+    SUM(total_amount) AS total_amount,
+    COUNT(*) FILTER (WHERE tip_amount > 0) AS tipped_trip_count,
+    
+    -- Metadata (drives the incremental watermark)
+    MAX(_ingested_at) AS _ingested_at
+    
+FROM {{ ref('fct_taxi_trips') }}
+{% if is_incremental() %}
+-- Only rebuild the months selected for this run
+WHERE {{ incremental_months_filter(ref('fct_taxi_trips')) }}
+{% endif %}
+GROUP BY ALL
@@ -0,0 +1,43 @@
+{{
+  config(
+    materialized='table',
+    pre_hook=[
+      "LOAD spatial;"
+    ]
+  )
+}}
+
+-- Every pickup/dropoff zone pair (origin-destination matrix) with the
+-- straight-line distance between zone centroids and whether the zones share
+-- a border. Trip analyses join this on (PULocationID, DOLocationID) instead
+-- of running spatial functions per trip.
+
+WITH zones AS (
+  SELECT
+    LocationID AS location_id,
+    Borough AS borough,
+    geom,
+    ST_Centroid(geom) AS centroid,
+    ST_XMin(geom) AS x_min,
+    ST_XMax(geom) AS x_max,
+    ST_YMin(geom) AS y_min,
+    ST_YMax(geom) AS y_max
+  FROM {{ ref('dim_taxi_zones_geospatial') }}
+  WHERE geom IS NOT NULL
+)
+
+SELECT
+  o.location_id AS pickup_location_id,
+  d.location_id AS dropoff_location_id,
+  o.borough AS pickup_borough,
+  d.borough AS dropoff_borough,
+  o.borough = d.borough AS same_borough,
+  -- Shapefile CRS units (US feet for EPSG:2263)
+  ST_Distance(o.centroid, d.centroid) AS centroid_distance_feet,
+  -- Bounding boxes are compared first so only nearby pairs run the polygon test
+  o.location_id <> d.location_id
+    AND o.x_min <= d.x_max AND d.x_min <= o.x_max
+    AND o.y_min <= d.y_max AND d.y_min <= o.y_max
+    AND ST_Intersects(o.geom, d.geom) AS is_adjacent
+FROM zones o
+CROSS JOIN zones d
@@ -0,0 +1,51 @@
+{{
+  config(
+    materialized='table',
+    pre_hook=[
+      "LOAD spatial;"
+    ]
+  )
+}}
+
+-- Zone outlines pre-simplified once per zoom level (tolerances in the
+-- shapefile's CRS units, see the zone_simplify_levels var) and reprojected
+-- to WGS84 for map charts. A map queries one zoom level and gets small,
+-- ready-to-draw GeoJSON instead of full-resolution polygons.
+
+WITH zones AS (
+  SELECT LocationID, geom
+  FROM {{ ref('dim_taxi_zones_geospatial') }}
+  WHERE geom IS NOT NULL
+),
+
+levels AS (
+  SELECT * FROM (
+    VALUES
+    {%- for level in var('zone_simplify_levels') %}
+      ('{{ level.zoom_level }}', {{ level.tolerance }}){{ "," if not loop.last }}
+    {%- endfor %}
+  ) AS t(zoom_level, tolerance)
+),
+
+simplified AS (
+  SELECT
+    z.LocationID,
+    l.zoom_level,
+    l.tolerance,
+    ST_Transform(
+      ST_SimplifyPreserveTopology(z.geom, l.tolerance),
+      '{{ var("TAXI_ZONES_SOURCE_CRS") }}',
+      'EPSG:4326',
+      always_xy := true
+    ) AS geom
+  FROM zones z
+  CROSS JOIN levels l
+)
+
+SELECT
+  LocationID,
+  zoom_level,
+  tolerance,
+  geom,
+  ST_AsGeoJSON(geom) AS geometry_geojson
+FROM simplified
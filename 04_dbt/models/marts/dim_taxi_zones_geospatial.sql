@@ -2,28 +2,34 @@
   config(
     materialized='table',
     pre_hook=[
-      "INSTALL spatial;",
-      "LOAD spatial;"
+      "LOAD spatial;",
+      "DROP INDEX IF EXISTS dim_taxi_zones_geospatial_geom_idx;"
+    ],
+    post_hook=[
+      "CREATE INDEX dim_taxi_zones_geospatial_geom_idx ON {{ this }} USING RTREE (geom);"
     ]
   )
 }}
 
+-- Zone boundaries are stored as native GEOMETRY in the shapefile's CRS
+-- (EPSG:2263, US feet), with an R-tree index so point-in-zone and other
+-- spatial lookups do not scan or parse every polygon. Each polygon is stored
+-- once; dim_taxi_zones_geospatial_text derives WKT and GeoJSON from it at
+-- query time for text-only consumers (e.g. the TaxiZones cube). Map-ready simplified shapes live in dim_taxi_zone_shapes, zone-to-zone
+-- measures in dim_taxi_zone_pairs.
+
 WITH taxi_zones_base AS (
   SELECT * FROM {{ ref('stg_taxi_zones') }}
 ),
 
--- Read shapefile data and convert to geospatial format
+-- Read shapefile data; some zones are split over several records, so their
+-- polygons are merged to keep one row per LocationID
 taxi_zones_spatial AS (
   SELECT
-    CAST(LocationID AS VARCHAR) AS LocationID,
-    Zone,
-    Borough,
-    service_zone,
-    ST_AsText(geom) AS geometry_wkt,
-    ST_AsGeoJSON(geom) AS geometry_geojson,
-    ST_Area(geom) AS zone_area_sq_meters,
-    ST_Centroid(geom) AS zone_centroid
+    CAST(LocationID AS SMALLINT) AS LocationID,
+    ST_Union_Agg(geom) AS geom
   FROM ST_Read('{{ var("TAXI_ZONES_SHP_PATH") }}')
+  GROUP BY 1
 ),
 
 -- Join base taxi zone data with spatial data
@@ -33,11 +39,10 @@ final AS (
     b.Zone,
     b.Borough,
     b.service_zone,
-    s.geometry_wkt,
-    s.geometry_geojson,
-    s.zone_area_sq_meters,
-    ST_X(s.zone_centroid) AS zone_centroid_longitude,
-    ST_Y(s.zone_centroid) AS zone_centroid_latitude,
+    s.geom,
+    ST_Area(s.geom) AS zone_area_sq_meters,
+    ST_X(ST_Centroid(s.geom)) AS zone_centroid_longitude,
+    ST_Y(ST_Centroid(s.geom)) AS zone_centroid_latitude,
     b._ingested_at
   FROM taxi_zones_base b
   LEFT JOIN taxi_zones_spatial s ON b.LocationID = s.LocationID
@@ -0,0 +1,18 @@
+{{
+  config(
+    materialized='view',
+    pre_hook=[
+      "LOAD spatial;"
+    ]
+  )
+}}
+
+-- Text encodings of the zone boundaries for consumers that cannot read
+-- GEOMETRY (e.g. the TaxiZones cube). Derived from geom when queried, so the
+-- polygons are stored only once, in dim_taxi_zones_geospatial.
+
+SELECT
+  *,
+  ST_AsText(geom) AS geometry_wkt,
+  ST_AsGeoJSON(geom) AS geometry_geojson
+FROM {{ ref('dim_taxi_zones_geospatial') }}
@@ -1,6 +1,10 @@
 {{
   config(
-    materialized='table'
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_month_start',
+    pre_hook="{{ delete_partition_window() }}",
+    on_schema_change='append_new_columns'
   )
 }}
 
@@ -54,6 +58,7 @@ fact_trips AS (
     t.pickup_month,
     t.pickup_day_of_week,
     t.pickup_hour,
+    t.pickup_month_start,
     
     -- Dimension attributes for easier analysis
     v.vendor_name,
@@ -98,7 +103,8 @@ fact_trips AS (
     END AS total_amount_mismatch_flag,
     
     -- Keep metadata
-    t._ingested_at
+    t._ingested_at,
+    t._source_file
     
   FROM stg_trips t
   
@@ -118,6 +124,13 @@ fact_trips AS (
   AND t.fare_amount >= 0
   AND t.passenger_count > 0
   AND t.passenger_count <= 6  -- reasonable upper bound for taxi
+  
+  {% if is_incremental() %}
+  -- Only rebuild the months selected for this run
+  AND {{ incremental_months_filter(ref('stg_taxi_trips'), 't.pickup_month_start') }}
+  {% endif %}
 )
 
 SELECT * FROM fact_trips
+-- Clustered by date and pickup location so date/zone filters prune row groups
+{{ cluster_order_by(['pickup_date', 'pickup_borough', 'PULocationID']) }}
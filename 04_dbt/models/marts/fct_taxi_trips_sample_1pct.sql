@@ -0,0 +1,12 @@
+{{
+  config(
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_month_start',
+    pre_hook="{{ delete_partition_window() }}",
+    on_schema_change='append_new_columns'
+  )
+}}
+
+-- 1% of fct_taxi_trips per pickup month and borough (see macros/stratified_sample.sql)
+{{ stratified_sample(ref('fct_taxi_trips_sample_10pct'), 0.01, parent_fraction=0.1) }}
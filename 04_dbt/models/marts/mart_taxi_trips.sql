@@ -1,8 +1,14 @@
 -- Mart model for NYC taxi trips
 -- Cleaned and transformed taxi data ready for analysis
+-- Built from fct_taxi_trips, which already applies the date range and data
+-- quality filters and computes the shared business metrics
 
 {{ config(
-    materialized='table',
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_month_start',
+    pre_hook="{{ delete_partition_window() }}",
+    on_schema_change='append_new_columns',
     schema='mart'
 ) }}
 
@@ -38,40 +44,33 @@ SELECT
     pickup_month,
     pickup_day_of_week,
     pickup_hour,
+    pickup_month_start,
     
     -- Rate and service info
     RatecodeID,
     store_and_fwd_flag,
     
-    -- Derived business metrics
-    CASE 
-        WHEN trip_distance > 0 THEN fare_amount / trip_distance 
-        ELSE 0 
-    END as fare_per_mile,
-    
-    CASE 
-        WHEN trip_duration_minutes > 0 THEN fare_amount / trip_duration_minutes 
-        ELSE 0 
-    END as fare_per_minute,
+    -- Derived business metrics (computed once in fct_taxi_trips)
+    fare_per_mile,
+    fare_per_minute,
     
     -- Data quality flags
+    -- Unlike the fact table, zero-minute trips are not flagged here
     CASE 
         WHEN trip_duration_minutes < 0 THEN 1 
         ELSE 0 
     END as negative_duration_flag,
     
-    CASE 
-        WHEN ABS(total_amount - calculated_total_amount) > 0.01 THEN 1 
-        ELSE 0 
-    END as total_amount_mismatch_flag,
+    total_amount_mismatch_flag,
     
     -- Metadata
-    _ingested_at
+    _ingested_at,
+    _source_file
     
-FROM {{ ref('stg_taxi_trips') }}
--- Filter to reasonable data ranges
-WHERE pickup_date >= DATE '2023-01-01' 
-  AND pickup_date <= DATE '2025-05-31'
-  AND trip_distance >= 0
-  AND fare_amount >= 0
-  AND passenger_count > 0
+FROM {{ ref('fct_taxi_trips') }}
+{% if is_incremental() %}
+-- Only rebuild the months selected for this run
+WHERE {{ incremental_months_filter(ref('fct_taxi_trips')) }}
+{% endif %}
+-- Clustered by date and pickup location so date/zone filters prune row groups
+{{ cluster_order_by(['pickup_date', 'pickup_location_id']) }}
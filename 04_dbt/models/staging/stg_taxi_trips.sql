@@ -1,25 +1,48 @@
 {{
   config(
-    materialized='view'
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_month_start',
+    pre_hook="{{ delete_partition_window() }}",
+    on_schema_change='append_new_columns'
   )
 }}
 
+-- Typed once into a table shared by fct_taxi_trips and mart_taxi_trips,
+-- so the casts and date parts below are not re-evaluated per downstream model
+
 WITH source AS (
-  SELECT * FROM {{ source('nyc_taxi_data', 'raw_taxi_trips') }}
+  SELECT
+    *,
+    -- Cast timestamps once; all derived date parts reuse these columns
+    CAST(tpep_pickup_datetime AS TIMESTAMP) AS pickup_ts,
+    CAST(tpep_dropoff_datetime AS TIMESTAMP) AS dropoff_ts,
+    CAST(DATE_TRUNC('month', CAST(tpep_pickup_datetime AS TIMESTAMP)) AS DATE) AS pickup_month_start
+  FROM {{ source('nyc_taxi_data', 'raw_taxi_trips') }}
 ),
 
+{% if is_incremental() %}
+-- Only retype the months selected for this run
+incremental_source AS (
+  SELECT * FROM source
+  WHERE {{ incremental_months_filter('source') }}
+),
+{% endif %}
+
 transformed AS (
   SELECT
-    -- Cast ID columns to strings for proper categorical handling
-    CAST(VendorID AS VARCHAR) AS VendorID,
-    CAST(RatecodeID AS VARCHAR) AS RatecodeID,
-    CAST(PULocationID AS VARCHAR) AS PULocationID,
-    CAST(DOLocationID AS VARCHAR) AS DOLocationID,
-    CAST(payment_type AS VARCHAR) AS payment_type,
+    -- Keys stay compact integers (typed like the seeds and stg_taxi_zones),
+    -- so dimension joins and group-bys compare 2-byte values, not strings;
+    -- labels are looked up from the dimensions
+    CAST(VendorID AS SMALLINT) AS VendorID,
+    CAST(RatecodeID AS SMALLINT) AS RatecodeID,
+    CAST(PULocationID AS SMALLINT) AS PULocationID,
+    CAST(DOLocationID AS SMALLINT) AS DOLocationID,
+    CAST(payment_type AS SMALLINT) AS payment_type,
     
     -- Convert timestamps to proper TIMESTAMP type (assuming NYC local time)
-    CAST(tpep_pickup_datetime AS TIMESTAMP) AS tpep_pickup_datetime,
-    CAST(tpep_dropoff_datetime AS TIMESTAMP) AS tpep_dropoff_datetime,
+    pickup_ts AS tpep_pickup_datetime,
+    dropoff_ts AS tpep_dropoff_datetime,
     
     -- Keep numeric fields as-is
     passenger_count,
@@ -51,22 +74,23 @@ transformed AS (
     )::DECIMAL(10,2) AS calculated_total_amount,
     
     -- Calculate trip duration in minutes
-    DATEDIFF('minute', 
-      CAST(tpep_pickup_datetime AS TIMESTAMP), 
-      CAST(tpep_dropoff_datetime AS TIMESTAMP)
-    ) AS trip_duration_minutes,
+    DATEDIFF('minute', pickup_ts, dropoff_ts) AS trip_duration_minutes,
     
     -- Extract date parts for easier analysis
-    DATE(CAST(tpep_pickup_datetime AS TIMESTAMP)) AS pickup_date,
-    EXTRACT(YEAR FROM CAST(tpep_pickup_datetime AS TIMESTAMP)) AS pickup_year,
-    EXTRACT(MONTH FROM CAST(tpep_pickup_datetime AS TIMESTAMP)) AS pickup_month,
-    EXTRACT(DOW FROM CAST(tpep_pickup_datetime AS TIMESTAMP)) AS pickup_day_of_week,
-    EXTRACT(HOUR FROM CAST(tpep_pickup_datetime AS TIMESTAMP)) AS pickup_hour,
+    DATE(pickup_ts) AS pickup_date,
+    EXTRACT(YEAR FROM pickup_ts) AS pickup_year,
+    EXTRACT(MONTH FROM pickup_ts) AS pickup_month,
+    EXTRACT(DOW FROM pickup_ts) AS pickup_day_of_week,
+    EXTRACT(HOUR FROM pickup_ts) AS pickup_hour,
+    
+    -- Month key used by the incremental models to replace whole months
+    pickup_month_start,
     
     -- Keep ingestion metadata
-    _ingested_at
+    _ingested_at,
+    _source_file
     
-  FROM source
+  FROM {% if is_incremental() %}incremental_source{% else %}source{% endif %}
 )
 
 SELECT * FROM transformed
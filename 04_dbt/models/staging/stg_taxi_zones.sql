@@ -1,17 +1,20 @@
 {{
   config(
-    materialized='view'
+    materialized='table'
   )
 }}
 
+-- Small lookup joined twice per trip in fct_taxi_trips, so it is stored
+-- rather than re-trimmed from the raw table on every join
+
 WITH source AS (
   SELECT * FROM {{ source('nyc_taxi_data', 'raw_taxi_zones') }}
 ),
 
 transformed AS (
   SELECT
-    -- Cast LocationID to string for consistency with trip data
-    CAST(LocationID AS VARCHAR) AS LocationID,
+    -- Integer key, typed like PULocationID/DOLocationID in stg_taxi_trips
+    CAST(LocationID AS SMALLINT) AS LocationID,
     
     -- Clean and standardize text fields
     TRIM(Zone) AS Zone,
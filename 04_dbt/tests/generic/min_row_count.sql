@@ -0,0 +1,9 @@
+{#
+  Fails when a model has fewer than min_rows rows (after the test's where
+  config, if any), e.g. a spatial model built from an unreadable shapefile.
+#}
+{% test min_row_count(model, min_rows=1) %}
+SELECT COUNT(*) AS row_count
+FROM {{ model }}
+HAVING COUNT(*) < {{ min_rows }}
+{% endtest %}
@@ -0,0 +1,14 @@
+{#
+  Fails for every month of an incremental trip model that no longer has
+  rows upstream, e.g. a month whose source files were all removed but whose
+  old rows were never deleted (see delete_partition_window).
+#}
+{% test months_present_upstream(model, upstream, month_column='pickup_month_start', upstream_month=none) %}
+SELECT DISTINCT {{ month_column }} AS orphaned_month
+FROM {{ model }}
+WHERE {{ month_column }} NOT IN (
+  SELECT DISTINCT {{ upstream_month or month_column }}
+  FROM {{ upstream }}
+  WHERE {{ upstream_month or month_column }} IS NOT NULL
+)
+{% endtest %}
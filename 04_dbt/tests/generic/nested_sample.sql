@@ -0,0 +1,23 @@
+{#
+  Fails for sampled trips the parent sample does not keep (or keeps fewer
+  times), i.e. when a nested sample is not a subset of its parent.
+#}
+{% test nested_sample(model, parent, key_columns=['pickup_month_start', 'pickup_borough', 'sample_hash']) %}
+WITH sample_keys AS (
+  SELECT {{ key_columns | join(', ') }}, COUNT(*) AS sample_rows
+  FROM {{ model }}
+  GROUP BY ALL
+),
+
+parent_keys AS (
+  SELECT {{ key_columns | join(', ') }}, COUNT(*) AS parent_rows
+  FROM {{ parent }}
+  GROUP BY ALL
+)
+
+SELECT s.*, p.parent_rows
+FROM sample_keys s
+LEFT JOIN parent_keys p
+  ON {% for column in key_columns %}s.{{ column }} IS NOT DISTINCT FROM p.{{ column }}{% if not loop.last %} AND {% endif %}{% endfor %}
+WHERE p.parent_rows IS NULL OR s.sample_rows > p.parent_rows
+{% endtest %}
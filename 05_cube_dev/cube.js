@@ -2,7 +2,10 @@ module.exports = {
   apiSecret: 'dev-secret-change-in-production',
   
   // Try with environment variable approach
-  dbType: 'duckdb'
+  dbType: 'duckdb',
+
+  // Cube definitions (model/cubes) and views (model/views)
+  schemaPath: 'model'
   
   // Let Cube use CUBEJS_DB_PATH environment variable
 };
\ No newline at end of file
@@ -0,0 +1,165 @@
+cube(`fct_taxi_trips`, {
+  // The published prod snapshot (CUBEJS_DB_PATH), never dev.duckdb while dbt
+  // rewrites it; the catalog is named so a dev path fails instead of serving dev
+  sql_table: `prod.main.fct_taxi_trips`,
+
+  data_source: `default`,
+
+  joins: {
+
+  },
+
+  dimensions: {
+    pickup_datetime: {
+      sql: `tpep_pickup_datetime`,
+      type: `time`
+    },
+
+    pickup_date: {
+      sql: `pickup_date`,
+      type: `time`
+    },
+
+    pickup_borough: {
+      sql: `pickup_borough`,
+      type: `string`
+    },
+
+    pickup_zone: {
+      sql: `pickup_zone`,
+      type: `string`
+    },
+
+    dropoff_borough: {
+      sql: `dropoff_borough`,
+      type: `string`
+    },
+
+    dropoff_zone: {
+      sql: `dropoff_zone`,
+      type: `string`
+    },
+
+    vendor_name: {
+      sql: `vendor_name`,
+      type: `string`
+    },
+
+    payment_name: {
+      sql: `payment_name`,
+      type: `string`
+    }
+  },
+
+  measures: {
+    count: {
+      type: `count`
+    },
+
+    passenger_count: {
+      sql: `passenger_count`,
+      type: `sum`
+    },
+
+    trip_distance: {
+      sql: `trip_distance`,
+      type: `sum`
+    },
+
+    fare_amount: {
+      sql: `fare_amount`,
+      type: `sum`
+    },
+
+    tip_amount: {
+      sql: `tip_amount`,
+      type: `sum`
+    },
+
+    total_amount: {
+      sql: `total_amount`,
+      type: `sum`
+    },
+
+    // Derived from additive measures, so it is still served from the rollups
+    average_total_amount: {
+      sql: `${total_amount} / NULLIF(${count}, 0)`,
+      type: `number`
+    }
+  },
+
+  pre_aggregations: {
+    // Hourly trips by pickup zone, vendor and payment type; one partition per
+    // pickup month. Each partition's refresh key is the latest ingestion time
+    // of its own month in prod, so after a publish only the months that were
+    // (re)loaded are rebuilt.
+    trips_by_zone_hourly: {
+      measures: [
+        CUBE.count,
+        CUBE.passenger_count,
+        CUBE.trip_distance,
+        CUBE.fare_amount,
+        CUBE.tip_amount,
+        CUBE.total_amount
+      ],
+      dimensions: [
+        CUBE.pickup_borough,
+        CUBE.pickup_zone,
+        CUBE.vendor_name,
+        CUBE.payment_name
+      ],
+      time_dimension: CUBE.pickup_datetime,
+      granularity: `hour`,
+      partition_granularity: `month`,
+      build_range_start: {
+        sql: `SELECT MIN(pickup_month_start) FROM prod.main.fct_taxi_trips`
+      },
+      build_range_end: {
+        sql: `SELECT MAX(tpep_pickup_datetime) FROM prod.main.fct_taxi_trips`
+      },
+      refresh_key: {
+        every: `10 minute`,
+        sql: `
+          SELECT MAX(_ingested_at)
+          FROM prod.main.fct_taxi_trips
+          WHERE ${FILTER_PARAMS.fct_taxi_trips.pickup_datetime.filter('tpep_pickup_datetime')}
+        `
+      }
+    },
+
+    // Daily trips by pickup borough for overview dashboards; far smaller
+    // than the hourly zone rollup, which Cube uses for finer queries
+    trips_by_borough_daily: {
+      measures: [
+        CUBE.count,
+        CUBE.passenger_count,
+        CUBE.trip_distance,
+        CUBE.fare_amount,
+        CUBE.tip_amount,
+        CUBE.total_amount
+      ],
+      dimensions: [
+        CUBE.pickup_borough,
+        CUBE.vendor_name,
+        CUBE.payment_name
+      ],
+      time_dimension: CUBE.pickup_datetime,
+      granularity: `day`,
+      partition_granularity: `month`,
+      build_range_start: {
+        sql: `SELECT MIN(pickup_month_start) FROM prod.main.fct_taxi_trips`
+      },
+      build_range_end: {
+        sql: `SELECT MAX(tpep_pickup_datetime) FROM prod.main.fct_taxi_trips`
+      },
+      refresh_key: {
+        every: `10 minute`,
+        sql: `
+          SELECT MAX(_ingested_at)
+          FROM prod.main.fct_taxi_trips
+          WHERE ${FILTER_PARAMS.fct_taxi_trips.pickup_datetime.filter('tpep_pickup_datetime')}
+        `
+      }
+    }
+  }
+});
@@ -1,5 +1,6 @@
 cube(`raw_taxi_trips`, {
-  sql_table: `nyc_taxi_data.raw_taxi_trips`,
+  // Hot table plus sealed Parquet months (storage tiering)
+  sql_table: `nyc_taxi_data.raw_taxi_trips_all`,
   
   data_source: `default`,
   
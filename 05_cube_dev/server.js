@@ -5,5 +5,5 @@ const server = new CubeApi();
 
 server.listen().then(({ port }) => {
   console.log(`🚀 Cube.js server is running on http://localhost:${port}`);
-  console.log(`🧊 Schema files loaded from: ./schema/`);
+  console.log(`🧊 Schema files loaded from: ./model/`);
 });
\ No newline at end of file
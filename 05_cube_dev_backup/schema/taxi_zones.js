@@ -5,12 +5,12 @@
  * This cube provides geographic context for taxi trip analysis,
  * including zone names, borough classifications, and spatial boundaries.
  * 
- * Data Source: dim_taxi_zones_geospatial (mart layer)
+ * Data Source: dim_taxi_zones_geospatial_text (mart layer)
  * Grain: One row per TLC Taxi Zone
  * Update Frequency: Infrequent (zones rarely change)
  */
 cube('TaxiZones', {
-  sql: 'SELECT * FROM dim_taxi_zones_geospatial',
+  sql: 'SELECT * FROM dim_taxi_zones_geospatial_text',
   
   title: 'NYC TLC Taxi Zones',
   description: 'Official TLC Taxi Zone boundaries and geographic metadata for trip location analysis',
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Pipeline End to End
+
+Runs the Dagster assets against generated data in an isolated work directory
+(its own raw/dev/prod databases and Parquet export, never the platform's),
+one stage at a time, and records per stage:
+
+- wall-clock seconds
+- peak resident memory of the stage process (MB)
+- bytes the stage wrote to storage, including DuckDB spill files
+- growth of the work directory on disk
+
+Each stage runs in a child process so its peak memory is measured on its own.
+Results are compared with the saved baseline for the same scale; the script
+exits with status 1 when any stage regressed by more than --tolerance, so it
+can gate changes in CI or before merging performance work.
+
+Usage:
+    # Generate 10M rows over 3 months, benchmark, compare with the baseline
+    python benchmark_pipeline.py --rows 10M --months 3 --generate
+
+    # Record the current numbers as the baseline for this scale
+    python benchmark_pipeline.py --rows 10M --months 3 --save-baseline
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Stages in pipeline order. Each step is (asset names, partitioning):
+# "each" runs once per monthly partition, "range" runs a single backfill
+# over all partitions, None runs unpartitioned.
+STAGES = {
+    "ingest": [(["ingest_taxi_zones"], None), (["ingest_raw_data"], "each")],
+    "raw_validation": [(["raw_data_validation"], "each")],
+    "transform": [(["dbt_reference_models"], None), (["dbt_trip_models"], "range")],
+    "dbt_tests": [(["dbt_test_checks"], None)],
+    "analytics_validation": [(["analytics_data_validation"], None)],
+    "export": [(["export_analytics_parquet"], "range")],
+    "publish": [(["publish_prod"], None)],
+}
+
+METRICS = ("seconds", "peak_rss_mb", "bytes_written")
+
+# Differences below these floors are treated as noise, whatever the ratio
+NOISE_FLOORS = {"seconds": 2.0, "peak_rss_mb": 64.0, "bytes_written": 16 * 1024 * 1024}
+
+
+def default_dagster_dir() -> Path:
+    """The repo's 03_dagster directory, or /app inside the dagster container."""
+    repo_dir = SCRIPT_DIR.parents[2] / "03_dagster"
+    return repo_dir if (repo_dir / "definitions.py").exists() else Path("/app")
+
+
+def bench_environment(workdir: Path) -> dict:
+    """Point ingestion, databases and exports at the work directory."""
+    env = dict(os.environ)
+    env.update({
+        "SOURCE_DATA_PATH": str(workdir / "source_data"),
+        "DUCKDB_RAW_PATH": str(workdir / "db" / "raw.duckdb"),
+        "DUCKDB_DEV_PATH": str(workdir / "db" / "dev.duckdb"),
+        "DUCKDB_PROD_PATH": str(workdir / "db" / "prod.duckdb"),
+        "PARQUET_EXPORT_PATH": str(workdir / "export"),
+    })
+    return env
+
+
+def directory_size(path: Path) -> int:
+    """Total size in bytes of the files under path."""
+    if not path.exists():
+        return 0
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def process_write_bytes() -> int:
+    """Bytes this process has caused to be written to storage (Linux only)."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def run_stage(stage: str, dagster_dir: Path) -> None:
+    """Child process: materialize one stage in process and report the result."""
+    import warnings
+
+    warnings.filterwarnings("ignore")
+    sys.path.insert(0, str(dagster_dir))
+    os.chdir(dagster_dir)
+
+    import definitions
+    from dagster import materialize
+
+    months = sorted({
+        definitions.trip_file_partition_month(path)
+        for path in definitions.TRIPS_SOURCE_PATH.glob("*.parquet")
+    })
+    success = True
+    for asset_names, partitioning in STAGES[stage]:
+        selection = [getattr(definitions, name) for name in asset_names]
+        if partitioning == "each":
+            runs = [{"partition_key": month} for month in months]
+        elif partitioning == "range":
+            runs = [{"tags": {
+                "dagster/asset_partition_range_start": months[0],
+                "dagster/asset_partition_range_end": months[-1],
+            }}]
+        else:
+            runs = [{}]
+        for run in runs:
+            result = materialize(
+                selection, resources=definitions.defs.resources, raise_on_error=False, **run
+            )
+            success = success and result.success
+
+    print("BENCH_RESULT " + json.dumps({"success": success, "bytes_written": process_write_bytes()}))
+    sys.exit(0 if success else 1)
+
+
+def measure_stage(stage: str, dagster_dir: Path, workdir: Path, env: dict) -> dict:
+    """Run a stage in a child process and collect its metrics."""
+    log_path = workdir / "logs" / f"{stage}.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    size_before = directory_size(workdir / "db") + directory_size(workdir / "export")
+
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        child = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--child-stage", stage, "--dagster-dir", str(dagster_dir)],
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        _, status, usage = os.wait4(child.pid, 0)
+    seconds = time.perf_counter() - start
+
+    report = {}
+    for line in log_path.read_text(errors="replace").splitlines():
+        if line.startswith("BENCH_RESULT "):
+            report = json.loads(line[len("BENCH_RESULT "):])
+
+    size_after = directory_size(workdir / "db") + directory_size(workdir / "export")
+    return {
+        "success": os.waitstatus_to_exitcode(status) == 0 and report.get("success", False),
+        "seconds": round(seconds, 2),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "bytes_written": report.get("bytes_written", 0),
+        "disk_delta_bytes": size_after - size_before,
+        "log": str(log_path),
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return human-readable regressions of results against baseline."""
+    regressions = []
+    for stage, metrics in results.items():
+        expected = baseline.get(stage)
+        if not expected:
+            continue
+        for metric in METRICS:
+            current, reference = metrics.get(metric, 0), expected.get(metric, 0)
+            if current - reference <= NOISE_FLOORS[metric]:
+                continue
+            if reference and current > reference * (1 + tolerance):
+                regressions.append(
+                    f"{stage}.{metric}: {current:,} vs baseline {reference:,} "
+                    f"(+{(current / reference - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    print(f"\n{'stage':<22}{'ok':>4}{'seconds':>10}{'peak MB':>10}{'written MB':>12}{'disk +MB':>10}")
+    for stage, metrics in results.items():
+        print(
+            f"{stage:<22}{'✅' if metrics['success'] else '❌':>3}"
+            f"{metrics['seconds']:>10.1f}{metrics['peak_rss_mb']:>10.0f}"
+            f"{metrics['bytes_written'] / 1e6:>12.1f}{metrics['disk_delta_bytes'] / 1e6:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the proto_loc pipeline on synthetic data")
+    parser.add_argument("--rows", default="1M", help="Total trip rows, e.g. 1M, 10M, 100M (default: 1M)")
+    parser.add_argument("--months", type=int, default=3, help="Number of monthly files (default: 3)")
+    parser.add_argument("--workdir", default="/tmp/proto_loc_bench", help="Scratch directory for data and databases")
+    parser.add_argument("--generate", action="store_true", help="(Re)generate the synthetic source data first")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run, in order")
+    parser.add_argument(
+        "--baseline",
+        default=str(SCRIPT_DIR / "benchmark_baselines.json"),
+        help="Baseline file, keyed by scale (default: benchmark_baselines.json next to this script)",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression ratio (default: 0.25)")
+    parser.add_argument("--dagster-dir", default=str(default_dagster_dir()), help="Directory with definitions.py")
+    parser.add_argument("--child-stage", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    dagster_dir = Path(args.dagster_dir)
+    if args.child_stage:
+        run_stage(args.child_stage, dagster_dir)
+        return
+
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from generate_synthetic_taxi_data import generate, parse_rows
+
+    workdir = Path(args.workdir)
+    row_count = parse_rows(args.rows)
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+        sys.exit(1)
+
+    source_dir = workdir / "source_data"
+    if args.generate or not (source_dir / "yellow_cab_data_monthly").exists():
+        shutil.rmtree(source_dir, ignore_errors=True)
+        print(f"🚕 Generating {row_count:,} trips over {args.months} month(s)")
+        generate(row_count, args.months, "2024-01", source_dir, seed=42)
+
+    # Every benchmark starts from empty databases and exports
+    for stale in ("db", "export", "logs"):
+        shutil.rmtree(workdir / stale, ignore_errors=True)
+    (workdir / "db").mkdir(parents=True)
+
+    env = bench_environment(workdir)
+    results = {}
+    for stage in stages:
+        print(f"⏱️  {stage}...", flush=True)
+        results[stage] = measure_stage(stage, dagster_dir, workdir, env)
+        if not results[stage]["success"]:
+            print(f"❌ Stage {stage} failed, see {results[stage]['log']}")
+            print_results(results)
+            sys.exit(1)
+    print_results(results)
+
+    scale = f"{row_count}x{args.months}"
+    run_record = {
+        "scale": scale,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "stages": results,
+    }
+    results_dir = workdir / "results"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    results_file = results_dir / f"benchmark_{scale}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    results_file.write_text(json.dumps(run_record, indent=2))
+    print(f"\n📄 Results written to {results_file}")
+
+    baseline_path = Path(args.baseline)
+    baselines = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    if args.save_baseline:
+        baselines[scale] = {
+            stage: {metric: metrics[metric] for metric in METRICS} for stage, metrics in results.items()
+        }
+        baseline_path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"💾 Saved baseline for {scale} to {baseline_path}")
+        return
+
+    if scale not in baselines:
+        print(f"ℹ️  No baseline for {scale}; run with --save-baseline to record one")
+        return
+    regressions = compare_with_baseline(results, baselines[scale], args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance:.0%} tolerance:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        sys.exit(1)
+    print(f"\n🎉 No regressions against the {scale} baseline (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Generate Synthetic NYC Yellow Taxi Data
+
+Writes schema-faithful yellow taxi trip files (one Parquet file per pickup
+month, named like the TLC files: yellow_tripdata_YYYY-MM.parquet) and a
+taxi zone lookup CSV, at any scale and without network access. Used by
+benchmark_pipeline.py to measure how the pipeline scales.
+
+Rows are generated inside DuckDB from range() and hashed row numbers, so
+generation streams to disk with bounded memory (100M+ rows are fine) and
+the same --seed always produces the same files.
+
+Distributions are rough approximations of the real data (hot Manhattan and
+airport zones, log-normal trip durations, card payments tipping ~20%), plus
+a small share of the rows the pipeline filters out (zero passengers, NULL
+passenger counts), so the dbt filters and validations do realistic work.
+
+Usage:
+    python generate_synthetic_taxi_data.py --rows 10M --months 3 \\
+        --output-dir /tmp/proto_loc_bench/source_data
+"""
+
+import argparse
+import calendar
+import csv
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+# Boroughs by LocationID range; 264/265 are the TLC "Unknown" / "Outside of NYC" zones
+BOROUGH_RANGES = [
+    (1, 1, "EWR", "EWR"),
+    (2, 56, "Queens", "Boro Zone"),
+    (57, 114, "Brooklyn", "Boro Zone"),
+    (115, 180, "Manhattan", "Yellow Zone"),
+    (181, 220, "Bronx", "Boro Zone"),
+    (221, 263, "Staten Island", "Boro Zone"),
+    (264, 264, "Unknown", "N/A"),
+    (265, 265, "N/A", "N/A"),
+]
+
+# Busiest pickup/dropoff zones (Midtown, Upper East Side, JFK, LaGuardia, ...)
+HOT_ZONES = [132, 138, 161, 162, 186, 230, 236, 237, 142, 170, 163, 239, 48, 68, 79, 141, 234, 249, 107, 140]
+
+AIRPORT_ZONES = [132, 138]
+
+SCALE_SUFFIXES = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+
+def parse_rows(value: str) -> int:
+    """Parse a row count such as 1000000, 1M, 10M or 1.5B."""
+    suffix = value[-1].upper()
+    if suffix in SCALE_SUFFIXES:
+        return int(float(value[:-1]) * SCALE_SUFFIXES[suffix])
+    return int(value)
+
+
+def month_starts(start_month: str, months: int) -> list:
+    """Return (year, month) for `months` consecutive months from YYYY-MM."""
+    year, month = (int(part) for part in start_month.split("-"))
+    result = []
+    for _ in range(months):
+        result.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+
+def write_zone_lookup(path: Path) -> None:
+    """Write a 265-zone lookup CSV with the TLC columns."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["LocationID", "Borough", "Zone", "service_zone"])
+        for first, last, borough, service_zone in BOROUGH_RANGES:
+            for location_id in range(first, last + 1):
+                zone = "Newark Airport" if location_id == 1 else f"{borough} Zone {location_id}"
+                if location_id in AIRPORT_ZONES:
+                    zone, service_zone_out = ("JFK Airport" if location_id == 132 else "LaGuardia Airport"), "Airports"
+                else:
+                    service_zone_out = service_zone
+                writer.writerow([location_id, borough, zone, service_zone_out])
+
+
+def trips_query(row_count: int, year: int, month: int, seed: int) -> str:
+    """
+    SQL producing `row_count` synthetic trips picked up in the given month.
+
+    u(k) is a deterministic uniform [0, 1) value per row and stream k.
+    """
+    days = calendar.monthrange(year, month)[1]
+
+    def u(k):
+        return f"((hash(i, {seed}, {k}) % 1000000007) / 1000000007.0)"
+
+    hot_zones = f"[{', '.join(str(z) for z in HOT_ZONES)}]"
+    return f"""
+        WITH base AS (
+            SELECT
+                i,
+                TIMESTAMP '{year:04d}-{month:02d}-01' + to_microseconds(CAST({u(1)} * {days} * 86400e6 AS BIGINT)) AS pickup,
+                -- Log-normal duration in minutes (median ~11, long tail)
+                GREATEST(1.0, exp(2.4 + 0.6 * sqrt(-2 * ln(GREATEST({u(2)}, 1e-9))) * cos(2 * pi() * {u(3)}))) AS duration_minutes,
+                {u(4)} AS u_passengers,
+                {u(5)} AS u_payment,
+                CASE WHEN {u(6)} < 0.6
+                    THEN list_extract({hot_zones}, 1 + CAST(floor({u(7)} * {len(HOT_ZONES)}) AS INTEGER))
+                    ELSE 1 + CAST(floor({u(7)} * 263) AS INTEGER)
+                END AS pu_location,
+                CASE WHEN {u(8)} < 0.5
+                    THEN list_extract({hot_zones}, 1 + CAST(floor({u(9)} * {len(HOT_ZONES)}) AS INTEGER))
+                    ELSE 1 + CAST(floor({u(9)} * 265) AS INTEGER)
+                END AS do_location,
+                {u(10)} AS u_misc,
+                {u(11)} AS u_tip
+            FROM range({row_count}) AS t(i)
+        ),
+        trips AS (
+            SELECT
+                *,
+                -- ~3% of records come from street-hail devices without passenger/rate data
+                u_passengers < 0.03 AS missing_meta,
+                ROUND(duration_minutes * (0.12 + 0.2 * u_misc), 2) AS distance,
+                CASE WHEN u_payment < 0.75 THEN 1 WHEN u_payment < 0.95 THEN 2
+                     WHEN u_payment < 0.975 THEN 3 ELSE 4 END AS payment
+            FROM base
+        ),
+        priced AS (
+            SELECT
+                *,
+                ROUND(3.0 + 2.5 * distance + 0.7 * duration_minutes, 2) AS fare,
+                CASE WHEN u_misc < 0.4 THEN 0.0 WHEN u_misc < 0.8 THEN 1.0 ELSE 2.5 END AS extra_charge,
+                CASE WHEN u_misc > 0.95 THEN 6.94 ELSE 0.0 END AS tolls,
+                CASE WHEN u_misc < 0.9 THEN 2.5 ELSE 0.0 END AS congestion,
+                CASE WHEN list_contains({AIRPORT_ZONES}, pu_location) THEN 1.75 ELSE 0.0 END AS airport
+            FROM trips
+        )
+        SELECT
+            CAST(CASE WHEN u_misc < 0.25 THEN 1 ELSE 2 END AS INTEGER) AS VendorID,
+            pickup AS tpep_pickup_datetime,
+            pickup + to_microseconds(CAST(duration_minutes * 60e6 AS BIGINT)) AS tpep_dropoff_datetime,
+            CAST(CASE WHEN missing_meta THEN NULL
+                      WHEN u_passengers < 0.05 THEN 0
+                      WHEN u_passengers < 0.75 THEN 1
+                      WHEN u_passengers < 0.90 THEN 2
+                      ELSE 3 + CAST(floor((u_passengers - 0.90) * 40) AS INTEGER)
+                 END AS BIGINT) AS passenger_count,
+            distance AS trip_distance,
+            CAST(CASE WHEN missing_meta THEN NULL
+                      WHEN list_contains({AIRPORT_ZONES}, pu_location) AND u_tip < 0.5 THEN 2
+                      WHEN u_tip > 0.99 THEN 5
+                      ELSE 1
+                 END AS BIGINT) AS RatecodeID,
+            CASE WHEN missing_meta THEN NULL WHEN u_tip > 0.995 THEN 'Y' ELSE 'N' END AS store_and_fwd_flag,
+            CAST(pu_location AS INTEGER) AS PULocationID,
+            CAST(do_location AS INTEGER) AS DOLocationID,
+            CAST(CASE WHEN missing_meta THEN 0 ELSE payment END AS BIGINT) AS payment_type,
+            fare AS fare_amount,
+            CAST(extra_charge AS DOUBLE) AS extra,
+            CAST(0.5 AS DOUBLE) AS mta_tax,
+            CAST(CASE WHEN payment = 1 THEN ROUND(fare * (0.1 + 0.2 * u_tip), 2) ELSE 0.0 END AS DOUBLE) AS tip_amount,
+            CAST(tolls AS DOUBLE) AS tolls_amount,
+            CAST(1.0 AS DOUBLE) AS improvement_surcharge,
+            CAST(ROUND(
+                fare + extra_charge + 0.5 + 1.0 + tolls + congestion + airport
+                + CASE WHEN payment = 1 THEN ROUND(fare * (0.1 + 0.2 * u_tip), 2) ELSE 0.0 END,
+                2
+            ) AS DOUBLE) AS total_amount,
+            CAST(congestion AS DOUBLE) AS congestion_surcharge,
+            CAST(airport AS DOUBLE) AS Airport_fee
+        FROM priced
+    """
+
+
+def generate(row_count: int, months: int, start_month: str, output_dir: Path, seed: int, threads: int = None) -> dict:
+    """
+    Generate trip files and the zone lookup under output_dir.
+
+    Returns:
+        {"rows": total rows, "bytes": total bytes written, "seconds": elapsed}
+    """
+    trips_dir = output_dir / "yellow_cab_data_monthly"
+    trips_dir.mkdir(parents=True, exist_ok=True)
+    write_zone_lookup(output_dir / "taxi_zones" / "taxi_zone_lookup.csv")
+
+    start = time.perf_counter()
+    total_bytes = 0
+    conn = duckdb.connect()
+    if threads:
+        conn.execute(f"SET threads = {int(threads)}")
+    # Rows are spread evenly over the months; the first months take the remainder
+    per_month, remainder = divmod(row_count, months)
+    for index, (year, month) in enumerate(month_starts(start_month, months)):
+        month_rows = per_month + (1 if index < remainder else 0)
+        path = trips_dir / f"yellow_tripdata_{year:04d}-{month:02d}.parquet"
+        tmp_path = path.with_suffix(".parquet.tmp")
+        conn.execute(f"""
+            COPY ({trips_query(month_rows, year, month, seed)})
+            TO '{tmp_path}' (FORMAT PARQUET, COMPRESSION SNAPPY)
+        """)
+        tmp_path.replace(path)
+        total_bytes += path.stat().st_size
+        print(f"✅ {path.name}: {month_rows:,} rows, {path.stat().st_size / 1e6:,.1f} MB")
+    conn.close()
+    return {"rows": row_count, "bytes": total_bytes, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NYC yellow taxi data")
+    parser.add_argument("--rows", default="1M", help="Total trip rows, e.g. 1M, 10M, 100M (default: 1M)")
+    parser.add_argument("--months", type=int, default=3, help="Number of monthly files (default: 3)")
+    parser.add_argument("--start-month", default="2024-01", help="First pickup month, YYYY-MM (default: 2024-01)")
+    parser.add_argument(
+        "--output-dir",
+        default="/tmp/proto_loc_bench/source_data",
+        help="Directory that receives yellow_cab_data_monthly/ and taxi_zones/",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed; the same seed gives the same files")
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB threads (default: all cores)")
+    args = parser.parse_args()
+
+    row_count = parse_rows(args.rows)
+    if row_count <= 0 or args.months <= 0:
+        print("❌ --rows and --months must be positive")
+        sys.exit(1)
+
+    print(f"🚕 Generating {row_count:,} trips over {args.months} month(s) into {args.output_dir}")
+    result = generate(row_count, args.months, args.start_month, Path(args.output_dir), args.seed, args.threads)
+    print(
+        f"\n🎉 Generated {result['rows']:,} rows ({result['bytes'] / 1e6:,.1f} MB) "
+        f"in {result['seconds']:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
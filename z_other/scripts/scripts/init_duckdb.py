@@ -1,12 +1,39 @@
 #!/usr/bin/env python3
 """
 Initialize empty DuckDB databases for proto_loc platform
+
+Also bootstraps the DuckDB extensions the platform needs (spatial) into a
+local extension directory shared by the Dagster, dbt and Cube containers
+(DUCKDB_EXTENSION_DIRECTORY, /app/02_duck_db/00_extensions in
+docker-compose). Services only LOAD extensions from there, with automatic
+installs disabled, so pipeline runs never download anything.
+
+Usage:
+    # Vendor the extensions (downloads once) and create the databases
+    python init_duckdb.py
+
+    # Air-gapped host: install from a mirror with the same layout
+    # (<repo>/<duckdb version>/<platform>/<name>.duckdb_extension), e.g. a
+    # copy of an extension directory vendored on a connected machine
+    python init_duckdb.py --repository /mnt/duckdb_extensions
+
+    # Also vendor binaries for another DuckDB build, e.g. Cube's DuckDB driver
+    python init_duckdb.py --duckdb-version v1.1.3
+
+    # Only check that every extension loads from the directory (never downloads)
+    python init_duckdb.py --verify-only
 """
 
-import duckdb
+import argparse
+import gzip
 import os
+import shutil
+import sys
+import urllib.request
 from pathlib import Path
 
+import duckdb
+
 # Define database paths
 base_path = Path(__file__).parent
 db_paths = [
@@ -15,35 +42,160 @@ db_paths = [
     base_path / "02_duck_db" / "03_prod" / "prod.duckdb"
 ]
 
-def create_database(db_path: Path):
+# Extensions used by the dbt models (dim_taxi_zones_geospatial, dim_taxi_zone_shapes, dim_taxi_zone_pairs)
+REQUIRED_EXTENSIONS = ["spatial"]
+
+DEFAULT_EXTENSION_DIRECTORY = os.getenv(
+    "DUCKDB_EXTENSION_DIRECTORY", str(base_path / "02_duck_db" / "00_extensions")
+)
+
+# DuckDB's public extension repository
+DEFAULT_REPOSITORY = "http://extensions.duckdb.org"
+
+
+def offline_connection(extension_dir: str):
+    """In-memory connection that uses extension_dir and never installs extensions implicitly."""
+    conn = duckdb.connect(config={"extension_directory": extension_dir, "autoinstall_known_extensions": False})
+    return conn
+
+
+def vendor_extensions(extension_dir: str, repository: str = None) -> None:
+    """
+    Install the required extensions for this DuckDB build into extension_dir.
+
+    Extensions already in the directory are left alone, so this only
+    touches the network (or the mirror) for missing ones.
+    """
+    conn = offline_connection(extension_dir)
+    try:
+        installed = {
+            row[0] for row in conn.execute(
+                "SELECT extension_name FROM duckdb_extensions() WHERE installed"
+            ).fetchall()
+        }
+        for name in REQUIRED_EXTENSIONS:
+            if name in installed:
+                print(f"  - {name}: already vendored")
+                continue
+            source = f" FROM '{repository}'" if repository else ""
+            conn.execute(f"INSTALL {name}{source}")
+            print(f"  - {name}: installed{' from ' + repository if repository else ''}")
+    finally:
+        conn.close()
+
+
+def vendor_for_version(extension_dir: str, version: str, platform: str, repository: str = None) -> None:
+    """
+    Copy the required extensions for another DuckDB version into extension_dir.
+
+    These cannot be loaded by this Python DuckDB, so they are fetched as
+    files: from a local mirror directory, or gzipped from an HTTP repository.
+    """
+    repository = repository or DEFAULT_REPOSITORY
+    target_dir = Path(extension_dir) / version / platform
+    target_dir.mkdir(parents=True, exist_ok=True)
+    for name in REQUIRED_EXTENSIONS:
+        target = target_dir / f"{name}.duckdb_extension"
+        if target.exists():
+            print(f"  - {name} ({version}): already vendored")
+            continue
+        tmp_target = target.with_name(f".{target.name}.tmp")
+        if repository.startswith(("http://", "https://")):
+            url = f"{repository}/{version}/{platform}/{name}.duckdb_extension.gz"
+            with urllib.request.urlopen(url) as response, open(tmp_target, "wb") as f:
+                shutil.copyfileobj(gzip.GzipFile(fileobj=response), f)
+        else:
+            shutil.copyfile(Path(repository) / version / platform / f"{name}.duckdb_extension", tmp_target)
+        os.replace(tmp_target, target)
+        print(f"  - {name} ({version}): vendored")
+
+
+def verify_extensions(extension_dir: str) -> bool:
+    """LOAD every required extension from extension_dir without installing; return True if all load."""
+    conn = offline_connection(extension_dir)
+    ok = True
+    try:
+        for name in REQUIRED_EXTENSIONS:
+            try:
+                conn.execute(f"LOAD {name}")
+            except duckdb.Error as e:
+                print(f"  ✗ {name}: {str(e).splitlines()[0]}")
+                ok = False
+                continue
+            version = conn.execute(
+                "SELECT extension_version FROM duckdb_extensions() WHERE extension_name = ?", [name]
+            ).fetchone()[0]
+            print(f"  ✓ {name} {version}")
+    finally:
+        conn.close()
+    return ok
+
+
+def create_database(db_path: Path, extension_dir: str):
     """Create an empty DuckDB database at the specified path."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    
+
     # Connect to create the database file
-    conn = duckdb.connect(str(db_path))
-    
-    # Install essential extensions
-    conn.execute("INSTALL spatial")
+    conn = duckdb.connect(
+        str(db_path),
+        config={"extension_directory": extension_dir, "autoinstall_known_extensions": False},
+    )
+
+    # Extensions are vendored once (see vendor_extensions); only load them here
     conn.execute("LOAD spatial")
     print(f"  - Loaded spatial extension for geospatial analysis")
-    
+
     # Create basic schemas
     if "raw" in str(db_path):
         conn.execute("CREATE SCHEMA IF NOT EXISTS raw")
     else:
         conn.execute("CREATE SCHEMA IF NOT EXISTS stg")
         conn.execute("CREATE SCHEMA IF NOT EXISTS mart")
-    
+
     conn.close()
     print(f"✓ Created database: {db_path}")
 
 def main():
-    """Initialize all DuckDB databases."""
+    """Vendor and verify the DuckDB extensions, then initialize all DuckDB databases."""
+    parser = argparse.ArgumentParser(description="Initialize the proto_loc DuckDB databases and extensions")
+    parser.add_argument(
+        "--extension-dir",
+        default=DEFAULT_EXTENSION_DIRECTORY,
+        help="Shared extension directory (default: $DUCKDB_EXTENSION_DIRECTORY or 02_duck_db/00_extensions)",
+    )
+    parser.add_argument("--repository", help="Extension mirror: a local directory or an HTTP repository URL")
+    parser.add_argument(
+        "--duckdb-version",
+        action="append",
+        default=[],
+        help="Also vendor extensions for this DuckDB version, e.g. v1.1.3 (repeatable)",
+    )
+    parser.add_argument("--verify-only", action="store_true", help="Only check the vendored extensions load")
+    args = parser.parse_args()
+
+    extension_dir = str(Path(args.extension_dir).resolve())
+    Path(extension_dir).mkdir(parents=True, exist_ok=True)
+
+    if not args.verify_only:
+        print(f"Vendoring DuckDB extensions into {extension_dir}...")
+        vendor_extensions(extension_dir, args.repository)
+        platform = duckdb.connect().execute("PRAGMA platform").fetchone()[0]
+        for version in args.duckdb_version:
+            vendor_for_version(extension_dir, version, platform, args.repository)
+
+    print(f"Verifying DuckDB {duckdb.__version__} extensions load offline from {extension_dir}...")
+    if not verify_extensions(extension_dir):
+        print("\n✗ Missing extensions; run without --verify-only on a connected host, or pass --repository")
+        sys.exit(1)
+    if args.verify_only:
+        print("\n✓ All DuckDB extensions are vendored")
+        return
+
     print("Initializing DuckDB databases...")
-    
+
     for db_path in db_paths:
-        create_database(db_path)
-    
+        create_database(db_path, extension_dir)
+
     print("\n✓ All DuckDB databases initialized successfully!")
     print("\nDatabase locations:")
     for db_path in db_paths: